@@ -0,0 +1,32 @@
+"""
+wallet change log
+
+Revision ID: 0002_wallet_changes
+Revises: 0001_wallet_init
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002_wallet_changes'
+down_revision = '0001_wallet_init'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'walletchange',
+        sa.Column('seq', sa.Integer(), primary_key=True),
+        sa.Column('group_id', sa.String(), nullable=False, index=True),
+        sa.Column('request_id', sa.Integer(), nullable=False, index=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('payload', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, index=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('walletchange')
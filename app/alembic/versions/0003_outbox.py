@@ -0,0 +1,35 @@
+"""
+transactional outbox
+
+Revision ID: 0003_outbox
+Revises: 0002_wallet_changes
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003_outbox'
+down_revision = '0002_wallet_changes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outboxevent',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('aggregate_type', sa.String(), nullable=False),
+        sa.Column('aggregate_id', sa.String(), nullable=False, index=True),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('payload', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('dispatched_at', sa.DateTime(), nullable=True, index=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('outboxevent')
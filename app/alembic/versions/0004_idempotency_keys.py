@@ -0,0 +1,32 @@
+"""
+idempotency keys
+
+Revision ID: 0004_idempotency_keys
+Revises: 0003_outbox
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004_idempotency_keys'
+down_revision = '0003_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('key', sa.String(length=64), primary_key=True),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.Integer(), nullable=True),
+        sa.Column('headers', sa.Text(), nullable=True),
+        sa.Column('body', sa.LargeBinary(), nullable=True),
+        sa.Column('expires_at', sa.Float(), nullable=False, index=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,40 @@
+"""
+wallet group summaries
+
+Revision ID: 0005_wallet_summaries
+Revises: 0004_idempotency_keys
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005_wallet_summaries'
+down_revision = '0004_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'groupstatussummary',
+        sa.Column('group_id', sa.String(), primary_key=True),
+        sa.Column('status', sa.String(), primary_key=True),
+        sa.Column('currency', sa.String(), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('amount_cents', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'groupmonthlypaid',
+        sa.Column('group_id', sa.String(), primary_key=True),
+        sa.Column('month', sa.String(), primary_key=True),
+        sa.Column('currency', sa.String(), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('amount_cents', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('groupmonthlypaid')
+    op.drop_table('groupstatussummary')
@@ -0,0 +1,36 @@
+"""
+wallet shard map
+
+Revision ID: 0006_wallet_shards
+Revises: 0005_wallet_summaries
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006_wallet_shards'
+down_revision = '0005_wallet_summaries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'walletgroupshard',
+        sa.Column('group_id', sa.String(), primary_key=True),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('moving', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        'walletrequestlocator',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('group_id', sa.String(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('walletrequestlocator')
+    op.drop_table('walletgroupshard')
@@ -0,0 +1,41 @@
+"""
+per-group wallet change feed positions
+
+Revision ID: 0007_wallet_change_group_seq
+Revises: 0006_wallet_shards
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007_wallet_change_group_seq'
+down_revision = '0006_wallet_shards'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'walletchangecounter',
+        sa.Column('group_id', sa.String(), primary_key=True),
+        sa.Column('last_seq', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.add_column('walletchange', sa.Column('group_seq', sa.Integer(), nullable=True))
+    # Existing rows keep their seq as the position, so cursors held by followers stay valid
+    op.execute('UPDATE walletchange SET group_seq = seq')
+    op.execute(
+        'INSERT INTO walletchangecounter (group_id, last_seq) '
+        'SELECT group_id, MAX(group_seq) FROM walletchange GROUP BY group_id'
+    )
+    with op.batch_alter_table('walletchange') as batch:
+        batch.alter_column('group_seq', existing_type=sa.Integer(), nullable=False)
+        batch.create_unique_constraint('uq_walletchange_group_seq', ['group_id', 'group_seq'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('walletchange') as batch:
+        batch.drop_constraint('uq_walletchange_group_seq', type_='unique')
+        batch.drop_column('group_seq')
+    op.drop_table('walletchangecounter')
@@ -0,0 +1,28 @@
+"""
+outbox retry backoff and dead letters
+
+Revision ID: 0008_outbox_retries
+Revises: 0007_wallet_change_group_seq
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008_outbox_retries'
+down_revision = '0007_wallet_change_group_seq'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('outboxevent', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+    op.add_column('outboxevent', sa.Column('dead_lettered_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_outboxevent_dead_lettered_at', 'outboxevent', ['dead_lettered_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outboxevent_dead_lettered_at', table_name='outboxevent')
+    op.drop_column('outboxevent', 'dead_lettered_at')
+    op.drop_column('outboxevent', 'next_attempt_at')
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from .db import shards
+from .models import WalletChange, WalletChangeCounter, WalletRequest
+
+
+def _next_seq(session: Session, group_id: str) -> int:
+    """Takes the group's next feed position, holding its counter row locked until commit.
+
+    A second writer to the same group waits on that lock, so positions
+    become visible in order and a follower reading ``seq > cursor`` never
+    skips one that commits late (an autoincrement key gives no such promise).
+    """
+    table = WalletChangeCounter.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert(table).values(group_id=group_id, last_seq=1)
+        session.execute(stmt.on_conflict_do_update(index_elements=["group_id"], set_={"last_seq": table.c.last_seq + 1}))
+    elif not session.execute(update(table).where(table.c.group_id == group_id).values(last_seq=table.c.last_seq + 1)).rowcount:
+        session.execute(table.insert().values(group_id=group_id, last_seq=1))
+    return session.execute(select(table.c.last_seq).where(table.c.group_id == group_id)).scalar_one()
+
+
+def record_change(session: Session, req: WalletRequest) -> dict:
+    """Append the current state of ``req`` to the change log in the caller's transaction.
+
+    The returned event carries the assigned sequence number; publish it once
+    the transaction has committed.
+    """
+    if req.id is None:
+        session.flush()
+    snapshot = {
+        "id": req.id,
+        "group_id": req.group_id,
+        "requester_id": req.requester_id,
+        "amount_cents": req.amount_cents,
+        "currency": req.currency,
+        "status": req.status,
+        "expires_at": req.expires_at.isoformat() if req.expires_at else None,
+        "accepted_by": req.accepted_by,
+        "paid_by": req.paid_by,
+        "canceled_by": req.canceled_by,
+        "updated_at": req.updated_at.isoformat(),
+    }
+    change = WalletChange(
+        group_id=req.group_id,
+        group_seq=_next_seq(session, req.group_id),
+        request_id=req.id,
+        status=req.status,
+        payload=json.dumps(snapshot),
+        created_at=req.updated_at,
+    )
+    session.add(change)
+    session.flush()
+    return _to_event(change)
+
+
+def _to_event(change: WalletChange) -> dict:
+    return {
+        "seq": change.group_seq,
+        "group_id": change.group_id,
+        "request_id": change.request_id,
+        "status": change.status,
+        "created_at": change.created_at.isoformat(),
+        "request": json.loads(change.payload),
+    }
+
+
+def changes_since(group_id: str, after: int, limit: int = 500) -> List[dict]:
+    with Session(shards.shard_for(group_id).engine) as session:
+        rows = session.exec(
+            select(WalletChange)
+            .where(WalletChange.group_id == group_id)
+            .where(WalletChange.group_seq > after)
+            .order_by(WalletChange.group_seq.asc())
+            .limit(limit)
+        ).all()
+        return [_to_event(row) for row in rows]
+
+
+def prune_changes(session: Session, retention: timedelta) -> int:
+    cutoff = datetime.utcnow() - retention
+    result = session.exec(delete(WalletChange).where(WalletChange.created_at < cutoff))  # type: ignore[call-overload]
+    return result.rowcount or 0
+
+
+class _Subscription:
+    def __init__(self, group_id: str, maxsize: int) -> None:
+        self.group_id = group_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+
+class WalletChangeHub:
+    """In-process pub/sub of wallet change events, keyed by group_id.
+
+    Handlers run in the threadpool, so ``publish`` hands events over to the
+    event loop thread. A subscriber that falls more than ``maxsize`` events
+    behind is dropped and marked lagged; its stream then catches up from the
+    change log instead of holding an unbounded backlog in memory.
+
+    The hub only reaches subscribers in the worker process that made the
+    change. With several workers, a stream served by one worker does not see
+    changes written through another, so streaming clients need a single
+    worker or should poll ``/wallet/groups/{group_id}/changes`` instead.
+    """
+
+    def __init__(self, maxsize: int = 1000) -> None:
+        self._maxsize = maxsize
+        self._subscribers: Dict[str, Set[_Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+
+    def subscribe(self, group_id: str) -> _Subscription:
+        sub = _Subscription(group_id, self._maxsize)
+        self._subscribers.setdefault(group_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: _Subscription) -> None:
+        subs = self._subscribers.get(sub.group_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.group_id]
+
+    def publish(self, events: List[dict]) -> None:
+        if not events or self._loop is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._dispatch(events)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch, events)
+            except RuntimeError:
+                # loop already closed during shutdown
+                pass
+
+    def _dispatch(self, events: List[dict]) -> None:
+        for event in events:
+            for sub in list(self._subscribers.get(event["group_id"], ())):
+                try:
+                    sub.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    sub.lagged = True
+                    self.unsubscribe(sub)
+
+
+async def iter_changes(
+    hub: WalletChangeHub, group_id: str, after: int = 0, heartbeat: float = 15.0
+) -> AsyncIterator[Optional[dict]]:
+    """Yield change events for ``group_id`` with ``seq > after``, forever.
+
+    Catches up from the change log first, then follows the hub. Yields
+    ``None`` every ``heartbeat`` seconds without traffic so transports can
+    send keepalives.
+    """
+    sub = hub.subscribe(group_id)
+    cursor = after
+    try:
+        while True:
+            # Subscribed before reading the log, so nothing committed in between is missed
+            while True:
+                batch = await asyncio.to_thread(changes_since, group_id, cursor)
+                for event in batch:
+                    cursor = event["seq"]
+                    yield event
+                if len(batch) < 500:
+                    break
+            while not sub.lagged:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event["seq"] <= cursor:
+                    continue
+                cursor = event["seq"]
+                yield event
+            sub = hub.subscribe(group_id)
+    finally:
+        hub.unsubscribe(sub)
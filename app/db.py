@@ -1,8 +1,16 @@
-from typing import Iterator
+from typing import Any, Callable, Iterator
 
 import os
+from fastapi import Request
 from sqlmodel import SQLModel, Session, create_engine
 
+from shared.archive import SegmentArchive
+from shared.replicas import ReplicaRouter, client_key
+from shared.sqlite_writer import WriteQueue, configure_sqlite, immediate_engine
+from shared.sqlstats import instrument_engine
+
+from .sharding import Shard, ShardMap
+
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./events.db")
 
@@ -11,15 +19,72 @@ engine = create_engine(
     echo=False,
     connect_args={"check_same_thread": False},
 )
+instrument_engine(engine)
+
+# SQLITE_PRODUCTION=1: WAL and tuned pragmas, and writes go through one group-committing writer thread
+SQLITE_PRODUCTION = DATABASE_URL.startswith("sqlite") and os.environ.get("SQLITE_PRODUCTION", "").lower() in ("1", "true", "yes")
+if SQLITE_PRODUCTION:
+    configure_sqlite(engine)
+# Engine for sessions that may write; in SQLite production mode they take the write lock up front
+write_engine = immediate_engine(engine) if SQLITE_PRODUCTION else engine
+write_queue = WriteQueue(engine) if SQLITE_PRODUCTION else None
+
+# Read replicas from REPLICA_DATABASE_URLS; without any, reads use the primary
+replicas = ReplicaRouter.from_env(engine)
+for _replica in replicas.replicas:
+    instrument_engine(_replica)
+
+# Wallet groups are spread over WALLET_SHARD_URLS by group_id; without it the primary is the only shard
+shards = ShardMap.from_env(Shard(0, engine, write_queue), DATABASE_URL, SQLITE_PRODUCTION)
+
+# Ledger entries moved out by scripts/archive_cold_rows.py; None unless ARCHIVE_DIR is set
+archive = SegmentArchive.from_env()
 
 
 def init_db() -> None:
     from . import models  # noqa: F401 - ensure models are imported for table creation
 
     SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist; add indexes introduced later
+    for index in models.Event.__table__.indexes:
+        index.create(engine, checkfirst=True)
+    shards.init_shards()
 
 
 def get_session() -> Iterator[Session]:
-    with Session(engine) as session:
+    with Session(write_engine) as session:
+        yield session
+
+
+def run_write(fn: Callable[[Session], Any]) -> Any:
+    """Run ``fn(session)`` in a write transaction and return its result once committed.
+
+    ``fn`` should flush rather than commit. In SQLite production mode the
+    transaction is batched by the writer thread with other requests' writes.
+    """
+    if write_queue is not None:
+        return write_queue.submit(fn)
+    with Session(engine, expire_on_commit=False) as session:
+        result = fn(session)
+        session.commit()
+        return result
+
+
+def get_read_session(request: Request) -> Iterator[Session]:
+    """Session for read-only handlers, bound to a replica when one is usable."""
+    bind = replicas.engine_for(client_key(request)) if replicas.enabled else engine
+    with Session(bind) as session:
         yield session
 
+
+def read_session(request: Request, shard: Shard) -> Session:
+    """Read-only session on ``shard``; the primary's reads may go to a replica."""
+    if shard.engine is engine and replicas.enabled:
+        return Session(replicas.engine_for(client_key(request)))
+    return Session(shard.engine)
+
+
+def get_group_read_session(request: Request, group_id: str) -> Iterator[Session]:
+    """``get_read_session`` for handlers with a ``group_id`` path parameter, on that group's shard."""
+    with read_session(request, shards.shard_for(group_id)) as session:
+        yield session
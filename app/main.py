@@ -1,27 +1,39 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from starlette.responses import RedirectResponse
 
-from .db import init_db, get_session
+from shared.compression import install_compression
+from shared.idempotency import install_idempotency
+from shared.logs import log_exception
+from shared.outbox import OutboxDispatcher
+from shared.profiling import RequestProfiler, install_profiling
+from shared.replicas import client_key
+from shared.serialization import FastJSONResponse
+from shared.sqlstats import begin_request, end_request
+from shared.staticassets import StaticAssets
+
+from .changefeed import WalletChangeHub, prune_changes
+from .db import engine, init_db, get_session, replicas, shards, write_engine, write_queue
+from .reminder_scheduler import ReminderScheduler
 from .routers.events import router as events_router
 from .routers.rsvps import router as rsvps_router
 from .routers.reminders import router as reminders_router
-from .routers.wallet import router as wallet_router
+from .routers.wallet import expire_due, router as wallet_router
+from .sharding import GroupMovingError
 from fastapi import Request
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response
 from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 import time
 import uuid
 import json
 import asyncio
-from datetime import datetime
-from sqlmodel import select
-from .models import WalletRequest
+import os
+from datetime import timedelta
+from sqlmodel import Session
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Events Service", version="0.1.0")
+    app = FastAPI(title="Events Service", version="0.1.0", default_response_class=FastJSONResponse)
 
     app.add_middleware(
         CORSMiddleware,
@@ -31,9 +43,30 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    app.state.wallet_hub = WalletChangeHub()
+
     @app.on_event("startup")
-    def on_startup() -> None:
+    async def on_startup() -> None:
         init_db()
+        # Seed data on first boot rather than at import time
+        from .seeds import seed_initial_data
+        for session in get_session():
+            seed_initial_data(session)
+            break
+        app.state.wallet_hub.bind(asyncio.get_running_loop())
+        app.state.expiry_task = asyncio.create_task(_expiry_loop())
+
+    @app.on_event("shutdown")
+    async def on_shutdown() -> None:
+        app.state.expiry_task.cancel()
+        try:
+            await app.state.expiry_task
+        except asyncio.CancelledError:
+            pass
+        # Lets queued writes commit before the process exits
+        for queue in {shard.write_queue for shard in shards.shards} | {write_queue}:
+            if queue is not None:
+                await asyncio.to_thread(queue.close)
     # Metrics and logging
     registry: CollectorRegistry = CollectorRegistry()
     http_requests_total = Counter(
@@ -49,6 +82,26 @@ def create_app() -> FastAPI:
         buckets=(5,10,25,50,100,250,500,1000,2500,5000),
         registry=registry,
     )
+    db_queries_per_request = Histogram(
+        "db_queries_per_request",
+        "SQL statements issued per HTTP request",
+        labelnames=("service", "method", "route"),
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+        registry=registry,
+    )
+    db_time_per_request_ms = Histogram(
+        "db_time_per_request_ms",
+        "Time spent in SQL per HTTP request in ms",
+        labelnames=("service", "method", "route"),
+        buckets=(1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000),
+        registry=registry,
+    )
+    db_n_plus_one_total = Counter(
+        "db_n_plus_one_total",
+        "Requests that repeated one SQL statement past the N+1 threshold",
+        labelnames=("service", "method", "route"),
+        registry=registry,
+    )
     wallet_request_total = Counter("wallet_request_total", "Wallet requests created", registry=registry)
     wallet_mark_paid_total = Counter("wallet_mark_paid_total", "Wallet mark paid operations", registry=registry)
     wallet_state_change_total = Counter("wallet_state_change_total", "Wallet state transitions", registry=registry)
@@ -58,17 +111,57 @@ def create_app() -> FastAPI:
     app.state.wallet_mark_paid_total = wallet_mark_paid_total
     app.state.wallet_state_change_total = wallet_state_change_total
 
+    # Outbox relay is only started when OUTBOX_SINK names a file or webhook
+    # Wallet events are staged on the shard that owns the group, so every shard is drained
+    outbox_engines = [write_engine if shard.engine is engine else shard.engine for shard in shards.shards]
+    app.state.outbox = OutboxDispatcher.from_env(outbox_engines, registry=registry)
+
+    @app.on_event("startup")
+    async def start_outbox() -> None:
+        if app.state.outbox is not None:
+            await app.state.outbox.start()
+
+    @app.on_event("shutdown")
+    async def stop_outbox() -> None:
+        if app.state.outbox is not None:
+            await app.state.outbox.stop()
+
+    # Event reminders are persisted as jobs and delivered by a background worker pool
+    app.state.reminders = ReminderScheduler.from_env(write_engine, registry=registry)
+
+    @app.on_event("startup")
+    async def start_reminders() -> None:
+        await app.state.reminders.start()
+
+    @app.on_event("shutdown")
+    async def stop_reminders() -> None:
+        await app.state.reminders.stop()
+
+    # Retried creates and payments with the same Idempotency-Key get the first response back
+    install_idempotency(
+        app,
+        write_engine,
+        [("POST", "/wallet/requests"), ("POST", "/wallet/requests/{request_id}/pay")],
+        registry=registry,
+    )
+
     @app.middleware("http")
     async def metrics_and_logs(request: Request, call_next):
         service = "wallet_py"
         req_id = request.headers.get("x-request-id") or str(uuid.uuid4())
         start = time.perf_counter()
-        response = await call_next(request)
+        stats, stats_token = begin_request()
+        try:
+            response = await call_next(request)
+        finally:
+            end_request(stats_token)
         duration_ms = (time.perf_counter() - start) * 1000.0
         route = request.url.path
         status = str(response.status_code)
         http_requests_total.labels(service, request.method, route, status).inc()
         http_request_duration_ms.labels(service, request.method, route, status).observe(duration_ms)
+        db_queries_per_request.labels(service, request.method, route).observe(stats.count)
+        db_time_per_request_ms.labels(service, request.method, route).observe(stats.time_ms)
         response.headers["x-request-id"] = req_id
         print(json.dumps({
             "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
@@ -79,54 +172,90 @@ def create_app() -> FastAPI:
             "method": request.method,
             "status": int(status),
             "latency_ms": round(duration_ms, 3),
+            "db_queries": stats.count,
+            "db_time_ms": round(stats.time_ms, 3),
         }))
+        repeated = stats.repeated()
+        if repeated:
+            db_n_plus_one_total.labels(service, request.method, route).inc()
+            print(json.dumps({
+                "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "level": "warning",
+                "service": service,
+                "request_id": req_id,
+                "msg": "n_plus_one",
+                "route": route,
+                "method": request.method,
+                "statements": [{"sql": sql, "count": n} for sql, n in repeated],
+            }))
         return response
 
     @app.get("/metrics")
     def metrics() -> Response:
         return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
 
-    # seed data and start expiry loop
-    from .seeds import seed_initial_data
-    for session in get_session():
-        seed_initial_data(session)
-        break
+    # Clients that just wrote keep reading from the primary for a short window
+    if replicas.enabled:
+        @app.middleware("http")
+        async def track_writes(request: Request, call_next):
+            response = await call_next(request)
+            if request.method not in ("GET", "HEAD", "OPTIONS"):
+                replicas.note_write(client_key(request))
+            return response
+
+        @app.on_event("startup")
+        async def start_replicas() -> None:
+            await replicas.start()
+
+        @app.on_event("shutdown")
+        async def stop_replicas() -> None:
+            await replicas.stop()
+
+    # Request profiling is only wired in when PROFILE_DIR and a trigger are configured
+    profiler = RequestProfiler.from_env()
+    if profiler is not None:
+        install_profiling(app, profiler)
+
+    # Outermost, so every response (including profiled ones) is compressed once
+    install_compression(app, registry=registry)
+
+    # expiry loop, started on startup
+    change_retention = timedelta(days=int(os.environ.get("WALLET_CHANGES_RETENTION_DAYS", "7")))
+
+    def _sweep_shard(shard) -> list:
+        changes = expire_due(shard)
+        with Session(shard.engine) as session:
+            if prune_changes(session, change_retention):
+                session.commit()
+        return changes
 
     async def _expiry_loop():
         while True:
             try:
-                now = datetime.utcnow()
-                for session in get_session():
-                    items = session.exec(
-                        select(WalletRequest).where(WalletRequest.status == "requested").where(
-                            WalletRequest.expires_at != None  # type: ignore[comparison-overlap]
-                        )
-                    ).all()
-                    touched = 0
-                    for item in items:
-                        if item.expires_at and item.expires_at < now:
-                            item.status = "expired"
-                            item.updated_at = now
-                            session.add(item)
-                            touched += 1
-                    if touched:
-                        session.commit()
-            except Exception:
-                pass
+                batches = await asyncio.to_thread(shards.scatter, _sweep_shard)
+                changes = [change for batch in batches for change in batch]
+                if changes:
+                    app.state.wallet_hub.publish(changes)
+            except Exception as exc:
+                log_exception("wallet_expiry_failed", exc)
             await asyncio.sleep(60)
 
-    try:
-        loop = asyncio.get_event_loop()
-        loop.create_task(_expiry_loop())
-    except RuntimeError:
-        pass
+    # Writes to a wallet group are refused for the few seconds it takes to move it between shards
+    @app.exception_handler(GroupMovingError)
+    async def group_moving(request: Request, exc: GroupMovingError) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+        )
 
     app.include_router(events_router, prefix="/events", tags=["events"]) 
     app.include_router(rsvps_router, tags=["rsvps"]) 
     app.include_router(reminders_router, tags=["reminders"]) 
     app.include_router(wallet_router)
 
-    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    app.state.static_assets = StaticAssets("app/static")
+    app.mount("/static", app.state.static_assets, name="static")
 
     @app.get("/", include_in_schema=False)
     def index() -> RedirectResponse:
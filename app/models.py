@@ -1,16 +1,18 @@
-from __future__ import annotations
-
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import BigInteger, UniqueConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
+# Re-exported: one outbox table definition serves every service
+from shared.outbox import OutboxEvent  # noqa: F401
+
 
 class EventBase(SQLModel):
     title: str = Field(index=True)
     description: Optional[str] = None
     location: Optional[str] = None
-    start_time: datetime
+    start_time: datetime = Field(index=True)
     end_time: datetime
 
 
@@ -19,7 +21,7 @@ class Event(EventBase, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
-    rsvps: List[RSVP] = Relationship(back_populates="event")  # type: ignore[name-defined]
+    rsvps: List["RSVP"] = Relationship(back_populates="event")
 
 
 class EventCreate(EventBase):
@@ -52,7 +54,7 @@ class RSVP(RSVPBase, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
-    event: Optional[Event] = Relationship(back_populates="rsvps")  # type: ignore[name-defined]
+    event: Optional[Event] = Relationship(back_populates="rsvps")
 
 
 class RSVPCreate(RSVPBase):
@@ -72,6 +74,25 @@ class RSVPUpdate(SQLModel):
     status: Optional[str] = None
 
 
+class ReminderJob(SQLModel, table=True):
+    """One reminder run for an event; ``cursor`` is the last RSVP id already notified."""
+
+    __table_args__ = (UniqueConstraint("event_id", "kind"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    event_id: int = Field(foreign_key="event.id", index=True)
+    kind: str = Field(description="e.g. 24h")
+    status: str = Field(default="pending", index=True, description="pending|running|done|failed")
+    due_at: datetime = Field(index=True)
+    cursor: int = Field(default=0)
+    sent_count: int = Field(default=0)
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
 # ----------------------
 # Wallet V2
 # ----------------------
@@ -123,6 +144,26 @@ class GroupLedger(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class GroupStatusSummary(SQLModel, table=True):
+    """Count and total of a group's wallet requests currently in ``status``, per currency."""
+
+    group_id: str = Field(primary_key=True)
+    status: str = Field(primary_key=True)
+    currency: str = Field(primary_key=True)
+    count: int = Field(default=0)
+    amount_cents: int = Field(default=0, sa_type=BigInteger)
+
+
+class GroupMonthlyPaid(SQLModel, table=True):
+    """Requests paid per group, calendar month (UTC, ``YYYY-MM``) and currency."""
+
+    group_id: str = Field(primary_key=True)
+    month: str = Field(primary_key=True)
+    currency: str = Field(primary_key=True)
+    count: int = Field(default=0)
+    amount_cents: int = Field(default=0, sa_type=BigInteger)
+
+
 class LedgerEntry(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     group_id: str = Field(index=True)
@@ -132,3 +173,40 @@ class LedgerEntry(SQLModel, table=True):
     related_request_id: Optional[int] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+
+
+class WalletChange(SQLModel, table=True):
+    """Append-only log of wallet request state transitions, read by the change feed."""
+
+    __table_args__ = (UniqueConstraint("group_id", "group_seq", name="uq_walletchange_group_seq"),)
+
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    group_id: str = Field(index=True)
+    group_seq: int = Field(description="Feed cursor: position in the group's log, allocated in commit order")
+    request_id: int = Field(index=True)
+    status: str
+    payload: str = Field(description="JSON snapshot of the request after the transition")
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class WalletChangeCounter(SQLModel, table=True):
+    """Last feed position handed out per group; its row lock orders a group's changes by commit."""
+
+    group_id: str = Field(primary_key=True)
+    last_seq: int = Field(default=0)
+
+
+class WalletGroupShard(SQLModel, table=True):
+    """Shard pin for a wallet group that does not live on its hashed shard, or is being moved."""
+
+    group_id: str = Field(primary_key=True)
+    shard: int
+    moving: bool = Field(default=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class WalletRequestLocator(SQLModel, table=True):
+    """Allocates wallet request ids across shards and records each request's group."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    group_id: str
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, select
+
+from shared.logs import log_exception
+
+from .models import RSVP, Event, ReminderJob
+
+
+def print_reminders(event: Event, rsvps: List[RSVP]) -> None:
+    # Placeholder side effect; in real life, integrate with email/SMS provider
+    for rsvp in rsvps:
+        print(f"[reminder] {rsvp.email or rsvp.name}: event '{event.title}' at {event.start_time.isoformat()}")
+
+
+class ReminderScheduler:
+    """Persists and delivers reminders for events starting within ``lead``.
+
+    ``schedule()`` inserts one ReminderJob per event and ``kind``; the unique
+    ``(event_id, kind)`` key makes it safe to call repeatedly and from several
+    workers. The poll loop claims due jobs with a conditional UPDATE and runs
+    them on a pool of ``workers`` threads. A job sends the event's RSVPs in
+    id order, ``batch_size`` at a time, and saves its cursor after every batch,
+    so after a crash it resumes with at most one batch sent twice. Jobs whose
+    heartbeat is older than ``lease`` are reclaimed; failures retry with
+    backoff until ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        registry: Optional[CollectorRegistry] = None,
+        send: Callable[[Event, List[RSVP]], None] = print_reminders,
+        kind: str = "24h",
+        lead: timedelta = timedelta(hours=24),
+        workers: int = 4,
+        batch_size: int = 200,
+        poll_interval: float = 30.0,
+        lease: timedelta = timedelta(minutes=5),
+        max_attempts: int = 5,
+    ) -> None:
+        self.engine = engine
+        self.send = send
+        self.kind = kind
+        self.lead = lead
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        # Created by start() and shut down by stop(), so a stopped scheduler can be started again
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.sent_total = Counter(
+            "reminder_notifications_sent_total", "Reminder notifications sent", registry=registry
+        )
+        self.jobs_finished_total = Counter(
+            "reminder_jobs_finished_total", "Reminder jobs finished", labelnames=("status",), registry=registry
+        )
+        self.delivery_latency_seconds = Histogram(
+            "reminder_delivery_latency_seconds",
+            "Time from a reminder job falling due to its last notification being sent",
+            buckets=(1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600),
+            registry=registry,
+        )
+        self.backlog = Gauge("reminder_jobs_backlog", "Reminder jobs due and not finished", registry=registry)
+        self.oldest_due_seconds = Gauge(
+            "reminder_oldest_due_seconds", "Age of the oldest due, unfinished reminder job", registry=registry
+        )
+        self.poll_errors_total = Counter(
+            "reminder_poll_errors_total", "Reminder poll rounds that failed", registry=registry
+        )
+
+    @classmethod
+    def from_env(cls, engine: Engine, registry: Optional[CollectorRegistry] = None) -> "ReminderScheduler":
+        return cls(
+            engine,
+            registry=registry,
+            lead=timedelta(hours=float(os.environ.get("REMINDER_LEAD_HOURS", "24"))),
+            workers=int(os.environ.get("REMINDER_WORKERS", "4")),
+            batch_size=int(os.environ.get("REMINDER_BATCH_SIZE", "200")),
+            poll_interval=float(os.environ.get("REMINDER_POLL_SECONDS", "30")),
+        )
+
+    # --- scheduling ---
+
+    def schedule(self, now: Optional[datetime] = None) -> int:
+        """Creates missing jobs for events starting within the lead time; returns how many."""
+        now = now or datetime.utcnow()
+        with Session(self.engine) as session:
+            existing = select(ReminderJob.event_id).where(ReminderJob.kind == self.kind)
+            upcoming = session.exec(
+                select(Event.id, Event.start_time)
+                .where(Event.start_time >= now, Event.start_time <= now + self.lead)
+                .where(col(Event.id).not_in(existing))
+            ).all()
+            for event_id, start_time in upcoming:
+                session.add(ReminderJob(event_id=event_id, kind=self.kind, due_at=max(now, start_time - self.lead)))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker scheduled the same events; the next poll picks up any remainder
+                session.rollback()
+                return 0
+        return len(upcoming)
+
+    def _claimable(self, now: datetime):
+        return and_(
+            ReminderJob.due_at <= now,
+            or_(
+                ReminderJob.status == "pending",
+                and_(ReminderJob.status == "running", ReminderJob.heartbeat_at < now - self.lease),
+            ),
+        )
+
+    def claim(self, now: Optional[datetime] = None) -> List[int]:
+        now = now or datetime.utcnow()
+        claimed: List[int] = []
+        with Session(self.engine) as session:
+            candidates = session.exec(
+                select(ReminderJob.id).where(self._claimable(now)).order_by(ReminderJob.due_at).limit(self.workers * 2)
+            ).all()
+            for job_id in candidates:
+                result = session.execute(
+                    update(ReminderJob)
+                    .where(ReminderJob.id == job_id)
+                    .where(self._claimable(now))
+                    .values(status="running", heartbeat_at=now, attempts=ReminderJob.attempts + 1)
+                )
+                if result.rowcount:
+                    claimed.append(job_id)
+            session.commit()
+        return claimed
+
+    # --- delivery ---
+
+    def run_job(self, job_id: int) -> None:
+        with Session(self.engine, expire_on_commit=False) as session:
+            job = session.get(ReminderJob, job_id)
+            if job is None:
+                return
+            try:
+                event = session.get(Event, job.event_id)
+                while event is not None:
+                    rsvps = session.exec(
+                        select(RSVP)
+                        .where(RSVP.event_id == job.event_id, RSVP.id > job.cursor, RSVP.status != "declined")
+                        .order_by(RSVP.id)
+                        .limit(self.batch_size)
+                    ).all()
+                    if not rsvps:
+                        break
+                    self.send(event, rsvps)
+                    job.cursor = rsvps[-1].id
+                    job.sent_count += len(rsvps)
+                    job.heartbeat_at = datetime.utcnow()
+                    session.add(job)
+                    session.commit()
+                    self.sent_total.inc(len(rsvps))
+                job.status = "done"
+                job.finished_at = datetime.utcnow()
+                session.add(job)
+                session.commit()
+                self.jobs_finished_total.labels("done").inc()
+                self.delivery_latency_seconds.observe(max(0.0, (job.finished_at - job.due_at).total_seconds()))
+            except Exception as exc:
+                session.rollback()
+                job.last_error = str(exc)[:500]
+                if job.attempts >= self.max_attempts:
+                    job.status = "failed"
+                    job.finished_at = datetime.utcnow()
+                    self.jobs_finished_total.labels("failed").inc()
+                else:
+                    job.status = "pending"
+                    job.due_at = datetime.utcnow() + timedelta(seconds=30 * 2 ** job.attempts)
+                session.add(job)
+                session.commit()
+
+    async def run_due(self) -> int:
+        """Claims and runs due jobs until none are left; returns how many ran."""
+        loop = asyncio.get_running_loop()
+        total = 0
+        while True:
+            job_ids = await asyncio.to_thread(self.claim)
+            if not job_ids:
+                return total
+            await asyncio.gather(*(loop.run_in_executor(self._pool, self.run_job, job_id) for job_id in job_ids))
+            total += len(job_ids)
+
+    def update_backlog(self, now: Optional[datetime] = None) -> None:
+        now = now or datetime.utcnow()
+        with Session(self.engine) as session:
+            count, oldest = session.exec(
+                select(func.count(), func.min(ReminderJob.due_at))
+                .where(col(ReminderJob.status).in_(("pending", "running")))
+                .where(ReminderJob.due_at <= now)
+            ).one()
+        self.backlog.set(count)
+        self.oldest_due_seconds.set((now - oldest).total_seconds() if oldest else 0)
+
+    # --- loop ---
+
+    def wake(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reminders")
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.schedule)
+                await self.run_due()
+                await asyncio.to_thread(self.update_backlog)
+            except Exception as exc:
+                self.poll_errors_total.inc()
+                log_exception("reminder_poll_failed", exc)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
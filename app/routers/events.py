@@ -2,9 +2,12 @@ from datetime import datetime, timedelta
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
 from sqlmodel import Session, select
 
-from ..db import get_session
+from shared.serialization import rows_response
+
+from ..db import get_read_session, get_session
 from ..models import Event, EventCreate, EventRead, EventUpdate
 
 
@@ -14,15 +17,15 @@ router = APIRouter()
 @router.get("/", response_model=List[EventRead])
 def list_events(
     *,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     q: Optional[str] = Query(default=None, description="Search in title/description"),
-) -> List[EventRead]:
+) -> Response:
     statement = select(Event)
     if q:
         like = f"%{q}%"
         statement = statement.where((Event.title.ilike(like)) | (Event.description.ilike(like)))
     statement = statement.order_by(Event.start_time.asc())
-    return session.exec(statement).all()
+    return rows_response(session.exec(statement).all(), EventRead)
 
 
 @router.post("/", response_model=EventRead, status_code=201)
@@ -38,7 +41,7 @@ def create_event(*, session: Session = Depends(get_session), data: EventCreate)
 
 
 @router.get("/{event_id}", response_model=EventRead)
-def get_event(*, session: Session = Depends(get_session), event_id: int) -> EventRead:
+def get_event(*, session: Session = Depends(get_read_session), event_id: int) -> EventRead:
     event = session.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -1,33 +1,15 @@
-from datetime import datetime, timedelta
-from typing import List
+import asyncio
 
-from fastapi import APIRouter, BackgroundTasks, Depends
-from sqlmodel import Session, select
-
-from ..db import get_session
-from ..models import Event
+from fastapi import APIRouter, Request
 
 
 router = APIRouter()
 
 
-def _send_reminder(event: Event) -> None:
-    # Placeholder side effect; in real life, integrate with email/SMS provider
-    print(f"[reminder] Event '{event.title}' at {event.start_time.isoformat()}")
-
-
 @router.post("/reminders/queue-upcoming", status_code=202)
-def queue_upcoming_event_reminders(
-    *,
-    session: Session = Depends(get_session),
-    background: BackgroundTasks,
-) -> dict:
-    now = datetime.utcnow()
-    soon = now + timedelta(hours=24)
-    events: List[Event] = session.exec(
-        select(Event).where(Event.start_time >= now, Event.start_time <= soon)
-    ).all()
-    for event in events:
-        background.add_task(_send_reminder, event)
-    return {"queued": len(events)}
-
+async def queue_upcoming_event_reminders(request: Request) -> dict:
+    # Jobs are persisted with a unique (event_id, kind) key, so repeat calls queue nothing new
+    scheduler = request.app.state.reminders
+    queued = await asyncio.to_thread(scheduler.schedule)
+    scheduler.wake()
+    return {"queued": queued}
@@ -2,50 +2,49 @@ from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
 from sqlmodel import Session, select
 
-from ..db import get_session
+from shared.serialization import rows_response
+
+from ..db import get_read_session, get_session, run_write
 from ..models import RSVP, RSVPCreate, RSVPRead, RSVPUpdate
 
 
 router = APIRouter()
 
 
-@router.post("/events/{event_id}/rsvps", response_model=RSVPRead, status_code=201)
-def create_rsvp_for_event(*, session: Session = Depends(get_session), event_id: int, data: RSVPCreate) -> RSVPRead:
-    if data.event_id != event_id:
-        # Allow payload to omit event_id when using nested route
-        data.event_id = event_id
+def _insert_rsvp(session: Session, data: RSVPCreate) -> RSVP:
     rsvp = RSVP.from_orm(data)
     now = datetime.utcnow()
     rsvp.created_at = now
     rsvp.updated_at = now
     session.add(rsvp)
-    session.commit()
-    session.refresh(rsvp)
+    session.flush()
     return rsvp
 
 
+@router.post("/events/{event_id}/rsvps", response_model=RSVPRead, status_code=201)
+def create_rsvp_for_event(*, event_id: int, data: RSVPCreate) -> RSVPRead:
+    if data.event_id != event_id:
+        # Allow payload to omit event_id when using nested route
+        data.event_id = event_id
+    return run_write(lambda session: _insert_rsvp(session, data))
+
+
 @router.get("/events/{event_id}/rsvps", response_model=List[RSVPRead])
-def list_rsvps_for_event(*, session: Session = Depends(get_session), event_id: int) -> List[RSVPRead]:
+def list_rsvps_for_event(*, session: Session = Depends(get_read_session), event_id: int) -> Response:
     statement = select(RSVP).where(RSVP.event_id == event_id)
-    return session.exec(statement).all()
+    return rows_response(session.exec(statement).all(), RSVPRead)
 
 
 @router.post("/rsvps", response_model=RSVPRead, status_code=201)
-def create_rsvp(*, session: Session = Depends(get_session), data: RSVPCreate) -> RSVPRead:
-    rsvp = RSVP.from_orm(data)
-    now = datetime.utcnow()
-    rsvp.created_at = now
-    rsvp.updated_at = now
-    session.add(rsvp)
-    session.commit()
-    session.refresh(rsvp)
-    return rsvp
+def create_rsvp(*, data: RSVPCreate) -> RSVPRead:
+    return run_write(lambda session: _insert_rsvp(session, data))
 
 
 @router.get("/rsvps/{rsvp_id}", response_model=RSVPRead)
-def get_rsvp(*, session: Session = Depends(get_session), rsvp_id: int) -> RSVPRead:
+def get_rsvp(*, session: Session = Depends(get_read_session), rsvp_id: int) -> RSVPRead:
     rsvp = session.get(RSVP, rsvp_id)
     if not rsvp:
         raise HTTPException(status_code=404, detail="RSVP not found")
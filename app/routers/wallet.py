@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import PlainTextResponse
+import heapq
+import json
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from sqlmodel import Session, select
 
-from ..db import get_session
+from shared.outbox import add_event
+from shared.serialization import FastJSONResponse, row_serializer, rows_response
+
+from ..changefeed import changes_since, iter_changes, record_change
+from ..db import archive, get_group_read_session, read_session, shards
+from ..sharding import Shard
+from ..summaries import apply_transition, group_summary, rebuild_summaries
 from ..models import (
     WalletRequest,
     WalletRequestCreate,
@@ -20,22 +29,44 @@ from ..models import (
 router = APIRouter(prefix="/wallet", tags=["wallet"])
 
 
+def record_transition(session: Session, req: WalletRequest, previous_status: Optional[str]) -> dict:
+    """Log a state transition to the change feed, outbox and group summaries, in the caller's transaction."""
+    apply_transition(session, req, previous_status)
+    change = record_change(session, req)
+    add_event(session, "wallet_request", req.id, f"wallet_request.{req.status}", change["request"])
+    return change
+
+
+def _publish(request: Request, events: List[dict]) -> None:
+    try:
+        request.app.state.wallet_hub.publish(events)
+    except Exception:
+        pass
+
+
 @router.post("/requests", response_model=WalletRequestRead, status_code=201)
-def create_request(*, request: Request, session: Session = Depends(get_session), data: WalletRequestCreate) -> WalletRequestRead:
-    req = WalletRequest(
-        group_id=data.group_id,
-        requester_id=data.requester_id,
-        amount_cents=data.amount_cents,
-        currency=data.currency or "ZAR",
-        status="requested",
-        expires_at=data.expires_at,
-    )
-    now = datetime.utcnow()
-    req.created_at = now
-    req.updated_at = now
-    session.add(req)
-    session.commit()
-    session.refresh(req)
+def create_request(*, request: Request, data: WalletRequestCreate) -> WalletRequestRead:
+    shard = shards.writable_shard(data.group_id)
+    request_id = shards.allocate_request_id(data.group_id)
+
+    def write(session: Session):
+        req = WalletRequest(
+            id=request_id,
+            group_id=data.group_id,
+            requester_id=data.requester_id,
+            amount_cents=data.amount_cents,
+            currency=data.currency or "ZAR",
+            status="requested",
+            expires_at=data.expires_at,
+        )
+        now = datetime.utcnow()
+        req.created_at = now
+        req.updated_at = now
+        session.add(req)
+        return req, record_transition(session, req, None)
+
+    req, change = shard.run_write(write)
+    _publish(request, [change])
     # metrics
     try:
         request.app.state.wallet_request_total.inc()
@@ -48,17 +79,60 @@ def create_request(*, request: Request, session: Session = Depends(get_session),
 @router.get("/requests", response_model=List[WalletRequestRead])
 def list_requests(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
     group_id: Optional[str] = Query(default=None),
     status: Optional[str] = Query(default=None),
-) -> List[WalletRequestRead]:
+) -> Response:
     stmt = select(WalletRequest)
     if group_id:
         stmt = stmt.where(WalletRequest.group_id == group_id)
     if status:
         stmt = stmt.where(WalletRequest.status == status)
     stmt = stmt.order_by(WalletRequest.created_at.desc())
-    return session.exec(stmt).all()
+    if group_id:
+        with read_session(request, shards.shard_for(group_id)) as session:
+            return rows_response(session.exec(stmt).all(), WalletRequestRead)
+
+    def fetch(shard: Shard) -> List[WalletRequest]:
+        with read_session(request, shard) as session:
+            return session.exec(stmt).all()
+
+    # Without a group every shard is queried; each result is already newest first
+    rows = heapq.merge(*shards.scatter(fetch), key=lambda r: r.created_at, reverse=True)
+    return rows_response(rows, WalletRequestRead)
+
+
+def expire_due(shard: Shard) -> List[dict]:
+    """Marks ``shard``'s overdue requests expired and returns their change events."""
+
+    def write(session: Session) -> List[dict]:
+        now = datetime.utcnow()
+        # Groups being moved to another shard are left for the next sweep
+        moving = shards.moving_groups()
+        # Minimal sweep: mark requested items with expires_at < now as expired
+        items = session.exec(
+            select(WalletRequest).where(WalletRequest.status == "requested").where(
+                WalletRequest.expires_at != None  # type: ignore[comparison-overlap]
+            )
+        ).all()
+        changes = []
+        for item in items:
+            if item.expires_at and item.expires_at < now and item.group_id not in moving:
+                item.status = "expired"
+                item.updated_at = now
+                session.add(item)
+                changes.append(record_transition(session, item, "requested"))
+        return changes
+
+    return shard.run_write(write)
+
+
+@router.post("/maintenance/expire", status_code=202)
+def expire_requests(*, request: Request) -> dict:
+    changes = [change for batch in shards.scatter(expire_due) for change in batch]
+    if changes:
+        _publish(request, changes)
+    return {"expired": len(changes)}
 
 
 def _ensure_not_expired(req: WalletRequest) -> None:
@@ -66,43 +140,36 @@ def _ensure_not_expired(req: WalletRequest) -> None:
         req.status = "expired"
 
 
-@router.post("/maintenance/expire", status_code=202)
-def expire_requests(*, session: Session = Depends(get_session)) -> dict:
-    now = datetime.utcnow()
-    # Minimal sweep: mark requested items with expires_at < now as expired
-    items = session.exec(
-        select(WalletRequest).where(WalletRequest.status == "requested").where(
-            WalletRequest.expires_at != None  # type: ignore[comparison-overlap]
-        )
-    ).all()
-    updated = 0
-    for item in items:
-        if item.expires_at and item.expires_at < now:
-            item.status = "expired"
-            item.updated_at = now
-            session.add(item)
-            updated += 1
-    if updated:
-        session.commit()
-    return {"expired": updated}
+def _request_shard(request_id: int) -> Shard:
+    shard = shards.shard_for_request(request_id)
+    if shard is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return shard
 
 
-@router.post("/requests/{request_id}/accept", response_model=WalletRequestRead)
-def accept_request(
-    *, request: Request, session: Session = Depends(get_session), request_id: int, actor_id: str
-) -> WalletRequestRead:
+def _load_request(session: Session, request_id: int) -> WalletRequest:
     req = session.get(WalletRequest, request_id)
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
     _ensure_not_expired(req)
-    if req.status != "requested":
-        raise HTTPException(status_code=400, detail="Invalid state transition")
-    req.status = "accepted"
-    req.accepted_by = actor_id
-    req.updated_at = datetime.utcnow()
-    session.add(req)
-    session.commit()
-    session.refresh(req)
+    return req
+
+
+@router.post("/requests/{request_id}/accept", response_model=WalletRequestRead)
+def accept_request(*, request: Request, request_id: int, actor_id: str) -> WalletRequestRead:
+    def write(session: Session):
+        req = _load_request(session, request_id)
+        previous = req.status
+        if req.status != "requested":
+            raise HTTPException(status_code=400, detail="Invalid state transition")
+        req.status = "accepted"
+        req.accepted_by = actor_id
+        req.updated_at = datetime.utcnow()
+        session.add(req)
+        return req, record_transition(session, req, previous)
+
+    req, change = _request_shard(request_id).run_write(write)
+    _publish(request, [change])
     try:
         request.app.state.wallet_state_change_total.inc()
     except Exception:
@@ -111,21 +178,20 @@ def accept_request(
 
 
 @router.post("/requests/{request_id}/cancel", response_model=WalletRequestRead)
-def cancel_request(
-    *, request: Request, session: Session = Depends(get_session), request_id: int, actor_id: str
-) -> WalletRequestRead:
-    req = session.get(WalletRequest, request_id)
-    if not req:
-        raise HTTPException(status_code=404, detail="Request not found")
-    _ensure_not_expired(req)
-    if req.status in ("paid", "canceled", "expired"):
-        raise HTTPException(status_code=400, detail="Invalid state transition")
-    req.status = "canceled"
-    req.canceled_by = actor_id
-    req.updated_at = datetime.utcnow()
-    session.add(req)
-    session.commit()
-    session.refresh(req)
+def cancel_request(*, request: Request, request_id: int, actor_id: str) -> WalletRequestRead:
+    def write(session: Session):
+        req = _load_request(session, request_id)
+        previous = req.status
+        if req.status in ("paid", "canceled", "expired"):
+            raise HTTPException(status_code=400, detail="Invalid state transition")
+        req.status = "canceled"
+        req.canceled_by = actor_id
+        req.updated_at = datetime.utcnow()
+        session.add(req)
+        return req, record_transition(session, req, previous)
+
+    req, change = _request_shard(request_id).run_write(write)
+    _publish(request, [change])
     try:
         request.app.state.wallet_state_change_total.inc()
     except Exception:
@@ -134,34 +200,33 @@ def cancel_request(
 
 
 @router.post("/requests/{request_id}/pay", response_model=WalletRequestRead)
-def mark_paid(
-    *, request: Request, session: Session = Depends(get_session), request_id: int, payer_id: str
-) -> WalletRequestRead:
-    req = session.get(WalletRequest, request_id)
-    if not req:
-        raise HTTPException(status_code=404, detail="Request not found")
-    _ensure_not_expired(req)
-    if req.status not in ("accepted", "requested"):
-        raise HTTPException(status_code=400, detail="Invalid state transition")
-    # If paying directly from requested, treat as accept+pay
-    if req.status == "requested":
-        req.accepted_by = payer_id
-    req.status = "paid"
-    req.paid_by = payer_id
-    req.updated_at = datetime.utcnow()
-
-    # Ledger entries: requester receives funds, payer pays out
-    # Idempotency: if ledger entries for this request already exist, skip
-    existing_entries = session.exec(
-        select(LedgerEntry).where(LedgerEntry.related_request_id == req.id)
-    ).all()
-    if not existing_entries:
-        _apply_ledger_delta(session, req.group_id, req.requester_id, req.amount_cents, req.id)
-        _apply_ledger_delta(session, req.group_id, payer_id, -req.amount_cents, req.id)
+def mark_paid(*, request: Request, request_id: int, payer_id: str) -> WalletRequestRead:
+    def write(session: Session):
+        req = _load_request(session, request_id)
+        previous = req.status
+        if req.status not in ("accepted", "requested"):
+            raise HTTPException(status_code=400, detail="Invalid state transition")
+        # If paying directly from requested, treat as accept+pay
+        if req.status == "requested":
+            req.accepted_by = payer_id
+        req.status = "paid"
+        req.paid_by = payer_id
+        req.updated_at = datetime.utcnow()
 
-    session.add(req)
-    session.commit()
-    session.refresh(req)
+        # Ledger entries: requester receives funds, payer pays out
+        # Idempotency: if ledger entries for this request already exist, skip
+        existing_entries = session.exec(
+            select(LedgerEntry).where(LedgerEntry.related_request_id == req.id)
+        ).all()
+        if not existing_entries:
+            _apply_ledger_delta(session, req.group_id, req.requester_id, req.amount_cents, req.id)
+            _apply_ledger_delta(session, req.group_id, payer_id, -req.amount_cents, req.id)
+
+        session.add(req)
+        return req, record_transition(session, req, previous)
+
+    req, change = _request_shard(request_id).run_write(write)
+    _publish(request, [change])
     try:
         request.app.state.wallet_mark_paid_total.inc()
         request.app.state.wallet_state_change_total.inc()
@@ -192,17 +257,56 @@ def _apply_ledger_delta(
     )
 
 
+@router.get("/groups/{group_id}/summary")
+def get_group_summary(
+    *,
+    session: Session = Depends(get_group_read_session),
+    group_id: str,
+    months: int = Query(default=12, ge=1, le=120, description="Months of paid totals to include"),
+):
+    return FastJSONResponse(group_summary(session, group_id, months=months))
+
+
+@router.post("/maintenance/rebuild-summaries", status_code=202)
+def rebuild_group_summaries(*, group_id: Optional[str] = Query(default=None)) -> dict:
+    """Backfill the group summary counters from wallet requests (all groups unless ``group_id``)."""
+    if group_id is not None:
+        counted = shards.run_write(group_id, lambda session: rebuild_summaries(session, group_id))
+    else:
+        counted = sum(shards.scatter(lambda shard: shard.run_write(rebuild_summaries)))
+    return {"group_id": group_id, "requests": counted}
+
+
 @router.get("/groups/{group_id}/balances")
-def get_group_balances(*, session: Session = Depends(get_session), group_id: str):
+def get_group_balances(*, session: Session = Depends(get_group_read_session), group_id: str):
     rows = session.exec(select(GroupLedger).where(GroupLedger.group_id == group_id)).all()
-    return {"group_id": group_id, "balances": [row.dict() for row in rows]}
+    serialize = row_serializer(GroupLedger)
+    return FastJSONResponse({"group_id": group_id, "balances": [serialize(row) for row in rows]})
 
 
-@router.get("/groups/{group_id}/ledger.csv")
-def export_group_ledger_csv(*, session: Session = Depends(get_session), group_id: str):
+def _ledger_entries(session: Session, group_id: str) -> List[LedgerEntry]:
+    """Hot and archived ledger entries for a group, oldest first."""
     entries: List[LedgerEntry] = session.exec(
         select(LedgerEntry).where(LedgerEntry.group_id == group_id).order_by(LedgerEntry.created_at.asc())
     ).all()
+    if archive is None:
+        return entries
+    # A row can be in both places if archival was interrupted; the DB copy wins. Ids are left out
+    # of the match: moving a group to another shard renumbers its hot entries
+    hot = {(e.member_id, e.amount_cents, e.reason, e.related_request_id, e.created_at) for e in entries}
+    cold = [
+        LedgerEntry(**row)
+        for row in archive.scan("ledgerentry", key=group_id)
+        if (row["member_id"], row["amount_cents"], row["reason"], row["related_request_id"], row["created_at"]) not in hot
+    ]
+    if not cold:
+        return entries
+    return sorted(cold + entries, key=lambda e: (e.created_at, e.id or 0))
+
+
+@router.get("/groups/{group_id}/ledger.csv")
+def export_group_ledger_csv(*, session: Session = Depends(get_group_read_session), group_id: str):
+    entries = _ledger_entries(session, group_id)
     lines = ["id,group_id,member_id,amount_cents,reason,related_request_id,created_at"]
     for e in entries:
         lines.append(
@@ -220,3 +324,74 @@ def export_group_ledger_csv(*, session: Session = Depends(get_session), group_id
         )
     return PlainTextResponse("\n".join(lines) + "\n", media_type="text/csv")
 
+
+@router.get("/groups/{group_id}/reconciliation")
+def reconcile_group_ledger(*, session: Session = Depends(get_group_read_session), group_id: str):
+    """Compares each member's balance with the sum of their hot and archived ledger entries."""
+    totals: Dict[str, int] = {}
+    for e in _ledger_entries(session, group_id):
+        totals[e.member_id] = totals.get(e.member_id, 0) + e.amount_cents
+    balances = {
+        row.member_id: row.balance_cents
+        for row in session.exec(select(GroupLedger).where(GroupLedger.group_id == group_id)).all()
+    }
+    members = []
+    for member_id in sorted(set(totals) | set(balances)):
+        balance = balances.get(member_id, 0)
+        ledger = totals.get(member_id, 0)
+        members.append(
+            {"member_id": member_id, "balance_cents": balance, "ledger_cents": ledger, "difference_cents": balance - ledger}
+        )
+    return {"group_id": group_id, "ok": all(m["difference_cents"] == 0 for m in members), "members": members}
+
+
+@router.get("/groups/{group_id}/changes")
+def list_group_changes(
+    *,
+    group_id: str,
+    after: int = Query(default=0, ge=0, description="Return changes with seq greater than this cursor"),
+    limit: int = Query(default=500, ge=1, le=500),
+):
+    changes = changes_since(group_id, after, limit)
+    next_after = changes[-1]["seq"] if changes else after
+    return FastJSONResponse({"group_id": group_id, "changes": changes, "next_after": next_after})
+
+
+@router.get("/groups/{group_id}/changes/stream")
+async def stream_group_changes(
+    *,
+    request: Request,
+    group_id: str,
+    after: Optional[int] = Query(default=None, ge=0),
+    last_event_id: Optional[str] = Header(default=None),
+):
+    # EventSource reconnects send Last-Event-ID; an explicit ?after= wins
+    cursor = after if after is not None else int(last_event_id) if (last_event_id or "").isdigit() else 0
+
+    async def events():
+        async for change in iter_changes(request.app.state.wallet_hub, group_id, cursor):
+            if await request.is_disconnected():
+                break
+            if change is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {change['seq']}\nevent: wallet_change\ndata: {json.dumps(change)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/groups/{group_id}/changes/ws")
+async def group_changes_ws(websocket: WebSocket, group_id: str, after: int = 0):
+    await websocket.accept()
+    try:
+        async for change in iter_changes(websocket.app.state.wallet_hub, group_id, after):
+            if change is None:
+                await websocket.send_json({"type": "keepalive"})
+            else:
+                await websocket.send_json({"type": "wallet_change", **change})
+    except WebSocketDisconnect:
+        pass
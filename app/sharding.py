@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from shared.outbox import upgrade_outbox_table
+from shared.sqlite_writer import WriteQueue, configure_sqlite
+from shared.sqlstats import instrument_engine
+
+from .models import (
+    GroupLedger,
+    GroupMonthlyPaid,
+    GroupStatusSummary,
+    LedgerEntry,
+    OutboxEvent,
+    WalletChange,
+    WalletChangeCounter,
+    WalletGroupShard,
+    WalletRequest,
+    WalletRequestLocator,
+)
+
+T = TypeVar("T")
+
+# A group's wallet state; all of its rows in these tables live on one shard
+GROUP_TABLES = [
+    WalletRequest.__table__,
+    GroupLedger.__table__,
+    LedgerEntry.__table__,
+    GroupStatusSummary.__table__,
+    GroupMonthlyPaid.__table__,
+    WalletChange.__table__,
+    WalletChangeCounter.__table__,
+]
+# Created on every shard; the shard map and request locator stay on the primary
+SHARD_TABLES = GROUP_TABLES + [OutboxEvent.__table__]
+
+
+class GroupMovingError(RuntimeError):
+    """A write hit a group that is being moved to another shard; retry shortly."""
+
+    def __init__(self, group_id: str, retry_after: float) -> None:
+        super().__init__(f"wallet group {group_id!r} is moving between shards")
+        self.group_id = group_id
+        self.retry_after = retry_after
+
+
+def group_hash(group_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(group_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping & Veach): going from N to N+1 buckets moves only 1/(N+1) of keys."""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def _sync_sequence(session: Session, table, column: str) -> None:
+    """Moves a Postgres serial past ids inserted explicitly; SQLite picks max(rowid) + 1 by itself."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    session.execute(
+        text(f"SELECT setval(pg_get_serial_sequence(:table, :column), GREATEST((SELECT MAX({column}) FROM {table.name}), 1))"),
+        {"table": table.name, "column": column},
+    )
+
+
+class Shard:
+    """One wallet database: its engine and, in SQLite production mode, its writer queue."""
+
+    def __init__(self, index: int, engine: Engine, write_queue: Optional[WriteQueue] = None) -> None:
+        self.index = index
+        self.engine = engine
+        self.write_queue = write_queue
+
+    @classmethod
+    def from_url(cls, index: int, url: str, sqlite_production: bool = False) -> "Shard":
+        if url.startswith("sqlite"):
+            engine = create_engine(url, echo=False, connect_args={"check_same_thread": False})
+        else:
+            engine = create_engine(url, echo=False, pool_pre_ping=True)
+        instrument_engine(engine)
+        production = sqlite_production and url.startswith("sqlite")
+        if production:
+            configure_sqlite(engine)
+        return cls(index, engine, WriteQueue(engine) if production else None)
+
+    def run_write(self, fn: Callable[[Session], T]) -> T:
+        if self.write_queue is not None:
+            return self.write_queue.submit(fn)
+        with Session(self.engine, expire_on_commit=False) as session:
+            result = fn(session)
+            session.commit()
+            return result
+
+
+class ShardMap:
+    """Routes each wallet group's rows to one of ``shards``.
+
+    A group lives on ``jump_hash(group_hash(group_id), len(shards))`` unless
+    the ``walletgroupshard`` table on the primary pins it elsewhere. Pins
+    are written by ``move_group`` and cached for ``refresh_interval``
+    seconds. With several shards, request ids are allocated by the
+    ``walletrequestlocator`` table on the primary, so they stay unique across
+    shards and ``/wallet/requests/{id}`` routes can look up the group. With a
+    single shard (the default) neither table is consulted.
+    """
+
+    def __init__(self, primary: Shard, shards: Sequence[Shard], refresh_interval: float = 2.0) -> None:
+        self.primary = primary
+        self.shards: List[Shard] = list(shards)
+        self.refresh_interval = refresh_interval
+        self._pins: Dict[str, Tuple[int, bool]] = {}
+        self._pins_loaded = float("-inf")
+        self._lock = threading.Lock()
+        self._pool = (
+            ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="wallet-shards") if self.sharded else None
+        )
+
+    @classmethod
+    def from_env(cls, primary: Shard, primary_url: str, sqlite_production: bool = False) -> "ShardMap":
+        urls = [u.strip() for u in os.environ.get("WALLET_SHARD_URLS", "").split(",") if u.strip()]
+        if not urls:
+            return cls(primary, [primary])
+        shards = [
+            Shard(i, primary.engine, primary.write_queue) if url == primary_url else Shard.from_url(i, url, sqlite_production)
+            for i, url in enumerate(urls)
+        ]
+        return cls(primary, shards, refresh_interval=float(os.environ.get("WALLET_SHARD_REFRESH_SECONDS", "2")))
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.shards) > 1
+
+    def init_shards(self) -> None:
+        """Creates the wallet tables on every shard and backfills locators for pre-sharding requests."""
+        for shard in self.shards:
+            if shard.engine is not self.primary.engine:
+                SQLModel.metadata.create_all(shard.engine, tables=SHARD_TABLES)
+                upgrade_outbox_table(shard.engine)
+        if self.sharded:
+            self.backfill_locators()
+
+    # --- routing ---
+
+    def _load_pins(self) -> Dict[str, Tuple[int, bool]]:
+        if not self.sharded:
+            return {}
+        if time.monotonic() - self._pins_loaded < self.refresh_interval:
+            return self._pins
+        with self._lock:
+            if time.monotonic() - self._pins_loaded >= self.refresh_interval:
+                with Session(self.primary.engine) as session:
+                    rows = session.execute(select(WalletGroupShard.group_id, WalletGroupShard.shard, WalletGroupShard.moving)).all()
+                self._pins = {group_id: (shard, moving) for group_id, shard, moving in rows}
+                self._pins_loaded = time.monotonic()
+        return self._pins
+
+    def home_index(self, group_id: str) -> int:
+        return jump_hash(group_hash(group_id), len(self.shards))
+
+    def shard_index(self, group_id: str) -> int:
+        if not self.sharded:
+            return 0
+        pin = self._load_pins().get(group_id)
+        return pin[0] if pin is not None else self.home_index(group_id)
+
+    def shard_for(self, group_id: str) -> Shard:
+        """Shard to read ``group_id`` from."""
+        return self.shards[self.shard_index(group_id)]
+
+    def moving_groups(self) -> Set[str]:
+        """Groups that must not be written right now."""
+        return {group_id for group_id, (_, moving) in self._load_pins().items() if moving}
+
+    def writable_shard(self, group_id: str) -> Shard:
+        """Shard to write ``group_id`` to; raises GroupMovingError while the group is being moved."""
+        if not self.sharded:
+            return self.shards[0]
+        pin = self._load_pins().get(group_id)
+        if pin is not None and pin[1]:
+            raise GroupMovingError(group_id, retry_after=self.refresh_interval)
+        return self.shards[pin[0] if pin is not None else self.home_index(group_id)]
+
+    def run_write(self, group_id: str, fn: Callable[[Session], T]) -> T:
+        """``run_write`` on the shard that owns ``group_id``."""
+        return self.writable_shard(group_id).run_write(fn)
+
+    def allocate_request_id(self, group_id: str) -> Optional[int]:
+        """Reserves a cluster-wide wallet request id for ``group_id``; None with a single shard."""
+        if not self.sharded:
+            return None
+
+        def write(session: Session) -> int:
+            locator = WalletRequestLocator(group_id=group_id)
+            session.add(locator)
+            session.flush()
+            return locator.id
+
+        return self.primary.run_write(write)
+
+    def shard_for_request(self, request_id: int) -> Optional[Shard]:
+        """Writable shard holding wallet request ``request_id``, or None if the id was never allocated."""
+        if not self.sharded:
+            return self.shards[0]
+        with Session(self.primary.engine) as session:
+            locator = session.get(WalletRequestLocator, request_id)
+        return self.writable_shard(locator.group_id) if locator is not None else None
+
+    def scatter(self, fn: Callable[[Shard], T]) -> List[T]:
+        """Runs ``fn`` on every shard in parallel; results are in shard order."""
+        if self._pool is None:
+            return [fn(shard) for shard in self.shards]
+        return list(self._pool.map(fn, self.shards))
+
+    def backfill_locators(self, batch_size: int = 10_000) -> int:
+        """Adds locators for requests created before sharding was enabled (ids above the highest locator)."""
+        added = 0
+        for shard in self.shards:
+            with Session(self.primary.engine) as session:
+                floor = session.execute(select(func.coalesce(func.max(WalletRequestLocator.id), 0))).scalar_one()
+            while True:
+                with Session(shard.engine) as session:
+                    rows = session.execute(
+                        select(WalletRequest.id, WalletRequest.group_id)
+                        .where(WalletRequest.id > floor)
+                        .order_by(WalletRequest.id)
+                        .limit(batch_size)
+                    ).all()
+                if not rows:
+                    break
+
+                def write(session: Session, rows=rows) -> None:
+                    session.execute(WalletRequestLocator.__table__.insert(), [{"id": i, "group_id": g} for i, g in rows])
+                    _sync_sequence(session, WalletRequestLocator.__table__, "id")
+
+                self.primary.run_write(write)
+                added += len(rows)
+                floor = rows[-1][0]
+        return added
+
+    # --- rebalancing ---
+
+    def _pin(self, group_id: str, shard: int, moving: bool) -> None:
+        def write(session: Session) -> None:
+            if shard == self.home_index(group_id) and not moving:
+                session.execute(delete(WalletGroupShard).where(WalletGroupShard.group_id == group_id))
+            else:
+                session.merge(WalletGroupShard(group_id=group_id, shard=shard, moving=moving, updated_at=datetime.utcnow()))
+
+        self.primary.run_write(write)
+        self._pins_loaded = float("-inf")
+
+    def move_group(self, group_id: str, target: int, settle: Optional[float] = None) -> Dict[str, int]:
+        """Moves ``group_id``'s wallet rows to shard ``target`` while the service keeps serving.
+
+        The group is pinned as moving, so writes to it fail with
+        GroupMovingError (503) until the move finishes; reads keep going to
+        the source until the pin switches to the target. After each pin
+        change this waits ``settle`` seconds (default: twice the refresh
+        interval plus one) so every process has reloaded its pins and
+        in-flight writes have committed. Re-running after a crash is safe:
+        the target is cleared of the group before the copy. Returns rows
+        copied per table.
+        """
+        if not 0 <= target < len(self.shards):
+            raise ValueError(f"no shard {target}; shards are 0..{len(self.shards) - 1}")
+        settle = self.refresh_interval * 2 + 1 if settle is None else settle
+        self._pins_loaded = float("-inf")
+        source = self.shard_index(group_id)
+        if source == target:
+            self._pin(group_id, target, moving=False)
+            return {}
+        self._pin(group_id, source, moving=True)
+        time.sleep(settle)
+        copied, request_ids = self._copy_group(group_id, self.shards[source], self.shards[target])
+        self._pin(group_id, target, moving=True)
+        time.sleep(settle)
+        self._pin(group_id, target, moving=False)
+        self.shards[source].run_write(lambda session: _delete_group(session, group_id, request_ids))
+        return copied
+
+    def _copy_group(self, group_id: str, source: Shard, target: Shard) -> Tuple[Dict[str, int], List[str]]:
+        with Session(source.engine) as session:
+            rows = {
+                table.name: [dict(r) for r in session.execute(select(table).where(table.c.group_id == group_id)).mappings()]
+                for table in GROUP_TABLES
+            }
+            request_ids = [str(r["id"]) for r in rows["walletrequest"]]
+            rows["outboxevent"] = [dict(r) for r in session.execute(_pending_outbox(request_ids)).mappings()]
+
+        def write(session: Session) -> None:
+            _delete_group(session, group_id, request_ids)
+            # Feed cursors are the per-group group_seq, copied as is with the group's counter;
+            # the shard-wide seq key is renumbered after the target's own changes
+            base = session.execute(select(func.coalesce(func.max(WalletChange.seq), 0))).scalar_one()
+            for i, change in enumerate(sorted(rows["walletchange"], key=lambda r: r["seq"]), start=1):
+                change["seq"] = base + i
+            # Ledger entry and outbox ids are per shard; they are renumbered, in order
+            for row in rows["ledgerentry"] + rows["outboxevent"]:
+                row.pop("id")
+            for table in SHARD_TABLES:
+                if rows[table.name]:
+                    session.execute(table.insert(), rows[table.name])
+            _sync_sequence(session, WalletChange.__table__, "seq")
+
+        target.run_write(write)
+        return {name: len(table_rows) for name, table_rows in rows.items()}, request_ids
+
+
+def _pending_outbox(request_ids: List[str]):
+    table = OutboxEvent.__table__
+    return (
+        select(table)
+        .where(table.c.aggregate_type == "wallet_request", table.c.aggregate_id.in_(request_ids), table.c.dispatched_at.is_(None))
+        .order_by(table.c.id)
+    )
+
+
+def _delete_group(session: Session, group_id: str, request_ids: List[str]) -> None:
+    for table in GROUP_TABLES:
+        session.execute(delete(table).where(table.c.group_id == group_id))
+    outbox = OutboxEvent.__table__
+    session.execute(
+        delete(outbox).where(
+            outbox.c.aggregate_type == "wallet_request", outbox.c.aggregate_id.in_(request_ids), outbox.c.dispatched_at.is_(None)
+        )
+    )
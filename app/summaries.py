@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from .models import GroupMonthlyPaid, GroupStatusSummary, WalletRequest
+
+
+def _month(ts: datetime) -> str:
+    return ts.strftime("%Y-%m")
+
+
+def _bump(session: Session, model, key: Dict[str, str], count: int, amount_cents: int) -> None:
+    """Adds to a summary row in one statement, creating it on first use."""
+    table = model.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert(table).values(**key, count=count, amount_cents=amount_cents)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={"count": table.c.count + count, "amount_cents": table.c.amount_cents + amount_cents},
+        )
+        session.execute(stmt)
+        return
+    result = session.execute(
+        update(table)
+        .where(*(table.c[k] == v for k, v in key.items()))
+        .values(count=table.c.count + count, amount_cents=table.c.amount_cents + amount_cents)
+    )
+    if not result.rowcount:
+        session.execute(table.insert().values(**key, count=count, amount_cents=amount_cents))
+
+
+def apply_transition(session: Session, req: WalletRequest, previous: Optional[str]) -> None:
+    """Moves ``req`` from the ``previous`` status bucket (None when new) to its current one, in the caller's transaction."""
+    if previous == req.status:
+        return
+    currency = req.currency or "ZAR"
+    if previous is not None:
+        _bump(session, GroupStatusSummary, {"group_id": req.group_id, "status": previous, "currency": currency}, -1, -req.amount_cents)
+    _bump(session, GroupStatusSummary, {"group_id": req.group_id, "status": req.status, "currency": currency}, 1, req.amount_cents)
+    if req.status == "paid":
+        key = {"group_id": req.group_id, "month": _month(req.updated_at), "currency": currency}
+        _bump(session, GroupMonthlyPaid, key, 1, req.amount_cents)
+
+
+def group_summary(session: Session, group_id: str, months: int = 12, now: Optional[datetime] = None) -> dict:
+    """Reads a group's maintained counters; cost depends on statuses and months, not requests."""
+    now = now or datetime.utcnow()
+    by_status: Dict[str, Dict[str, dict]] = {}
+    for row in session.exec(select(GroupStatusSummary).where(GroupStatusSummary.group_id == group_id)).all():
+        if row.count:
+            by_status.setdefault(row.status, {})[row.currency] = {"count": row.count, "amount_cents": row.amount_cents}
+    # First month of the window, e.g. 12 months ending in 2026-10 start at 2025-11
+    months_back = now.year * 12 + now.month - 1 - (months - 1)
+    first_month = f"{months_back // 12:04d}-{months_back % 12 + 1:02d}"
+    paid_by_month: Dict[str, Dict[str, dict]] = {}
+    rows = session.exec(
+        select(GroupMonthlyPaid)
+        .where(GroupMonthlyPaid.group_id == group_id, GroupMonthlyPaid.month >= first_month)
+        .order_by(GroupMonthlyPaid.month.desc())
+    ).all()
+    for row in rows:
+        paid_by_month.setdefault(row.month, {})[row.currency] = {"count": row.count, "amount_cents": row.amount_cents}
+    return {
+        "group_id": group_id,
+        "by_status": by_status,
+        "paid_this_month": paid_by_month.get(_month(now), {}),
+        "paid_by_month": paid_by_month,
+    }
+
+
+def rebuild_summaries(session: Session, group_id: Optional[str] = None) -> int:
+    """Recomputes the counters from WalletRequest, for one group or all; returns requests counted.
+
+    Runs in the caller's transaction. Transitions committed concurrently on
+    another connection can be missed, so backfill while writes are quiet or
+    run it again afterwards.
+    """
+    for model in (GroupStatusSummary, GroupMonthlyPaid):
+        stmt = delete(model)
+        if group_id is not None:
+            stmt = stmt.where(model.group_id == group_id)
+        session.execute(stmt)
+
+    totals = select(
+        WalletRequest.group_id, WalletRequest.status, WalletRequest.currency,
+        func.count(), func.coalesce(func.sum(WalletRequest.amount_cents), 0),
+    ).group_by(WalletRequest.group_id, WalletRequest.status, WalletRequest.currency)
+    if group_id is not None:
+        totals = totals.where(WalletRequest.group_id == group_id)
+    counted = 0
+    for gid, status, currency, count, amount in session.exec(totals).all():
+        session.add(GroupStatusSummary(group_id=gid, status=status, currency=currency or "ZAR", count=count, amount_cents=amount))
+        counted += count
+
+    paid = select(WalletRequest.group_id, WalletRequest.currency, WalletRequest.amount_cents, WalletRequest.updated_at).where(
+        WalletRequest.status == "paid"
+    )
+    if group_id is not None:
+        paid = paid.where(WalletRequest.group_id == group_id)
+    monthly: Dict[tuple, list] = {}
+    for gid, currency, amount, updated_at in session.exec(paid):
+        bucket = monthly.setdefault((gid, _month(updated_at), currency or "ZAR"), [0, 0])
+        bucket[0] += 1
+        bucket[1] += amount
+    for (gid, month, currency), (count, amount) in monthly.items():
+        session.add(GroupMonthlyPaid(group_id=gid, month=month, currency=currency, count=count, amount_cents=amount))
+    session.flush()
+    return counted
@@ -1,16 +1,64 @@
 from __future__ import annotations
 
+from typing import Any, Callable
+
+from fastapi import Request
 from sqlmodel import SQLModel, create_engine, Session
+
+from shared.archive import SegmentArchive
+from shared.outbox import upgrade_outbox_table
+from shared.replicas import ReplicaRouter, client_key
+from shared.sqlite_writer import WriteQueue, configure_sqlite, immediate_engine
+from shared.sqlstats import instrument_engine
+
 from .settings import get_settings
 
 settings = get_settings()
 engine = create_engine(settings.database_url, echo=False)
+instrument_engine(engine)
+
+sqlite_production = settings.sqlite_production and settings.database_url.startswith("sqlite")
+if sqlite_production:
+    configure_sqlite(engine)
+# Engine for sessions that may write; in SQLite production mode they take the write lock up front
+write_engine = immediate_engine(engine) if sqlite_production else engine
+write_queue = WriteQueue(engine) if sqlite_production else None
+
+# Read replicas from REPLICA_DATABASE_URLS; without any, reads use the primary
+replicas = ReplicaRouter.from_env(engine)
+for _replica in replicas.replicas:
+    instrument_engine(_replica)
+
+# Ward ingests moved out by scripts/archive_cold_rows.py
+archive = SegmentArchive(settings.archive_dir) if settings.archive_dir else None
 
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    upgrade_outbox_table(engine)
 
 
 def get_session():
-    with Session(engine) as session:
+    with Session(write_engine) as session:
+        yield session
+
+
+def run_write(fn: Callable[[Session], Any]) -> Any:
+    """Run ``fn(session)`` in a write transaction and return its result once committed.
+
+    ``fn`` should flush rather than commit. In SQLite production mode the
+    transaction is batched by the writer thread with other requests' writes.
+    """
+    if write_queue is not None:
+        return write_queue.submit(fn)
+    with Session(engine, expire_on_commit=False) as session:
+        result = fn(session)
+        session.commit()
+        return result
+
+
+def get_read_session(request: Request):
+    """Session for read-only handlers, bound to a replica when one is usable."""
+    bind = replicas.engine_for(client_key(request)) if replicas.enabled else engine
+    with Session(bind) as session:
         yield session
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import tempfile
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlmodel import Session, select
+
+from .models import RSVP, Event, GuestImport, OutboxEvent, Ticket
+from .security import sign_ticket_payloads
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Rejected rows kept on the job for the status endpoint; the counters cover the rest
+MAX_ERRORS = 100
+
+Guest = Tuple[int, str, str]  # (line, name, email)
+
+
+class ImportRejected(ValueError):
+    """The upload cannot be imported at all (bad header, unknown event)."""
+
+
+class UploadTooLarge(ImportRejected):
+    """The upload is bigger than ``max_bytes``."""
+
+
+def _columns(header: List[str]) -> Tuple[int, int]:
+    names = [h.strip().lower() for h in header]
+    if "name" not in names or "email" not in names:
+        raise ImportRejected("CSV header needs 'name' and 'email' columns")
+    return names.index("name"), names.index("email")
+
+
+def _open_csv(path: str):
+    # utf-8-sig drops the BOM spreadsheet exports start with
+    return open(path, newline="", encoding="utf-8-sig", errors="replace")
+
+
+class GuestImporter:
+    """Turns uploaded guest lists into RSVPs and tickets in the background.
+
+    ``spool()`` writes the request body to disk as it arrives and counts its
+    lines; ``start()`` creates the GuestImport row and queues the file on a
+    single worker thread, so imports for one event never race each other's
+    duplicate checks. The worker reads the CSV lazily, ``chunk_size`` rows
+    at a time: rows are validated and deduped by lower-cased email against
+    earlier rows, then, in one transaction per chunk, checked against the
+    event's RSVPs and remaining capacity as they are at that moment, and
+    RSVPs, tickets and their outbox events are bulk-inserted and the job's
+    counters updated. Ticket tokens are signed with one serializer per
+    chunk, or across ``sign_processes`` worker processes. Uploads over
+    ``max_bytes`` are refused while spooling.
+    """
+
+    def __init__(
+        self,
+        engine,
+        run_write: Callable,
+        secret_key: str,
+        spool_dir: Optional[str] = None,
+        chunk_size: int = 1000,
+        sign_processes: int = 0,
+        max_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        self.engine = engine
+        self.run_write = run_write
+        self.secret_key = secret_key
+        self.spool_dir = spool_dir or os.path.join(tempfile.gettempdir(), "events-imports")
+        self.chunk_size = chunk_size
+        self.sign_processes = sign_processes
+        self.max_bytes = max_bytes
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guest-import")
+        self._sign_pool: Optional[Executor] = None
+
+    # --- upload ---
+
+    async def spool(self, chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+        """Writes an upload to the spool directory; returns its path and data row count.
+
+        Raises UploadTooLarge, leaving nothing behind, once more than ``max_bytes`` arrive.
+        """
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"{uuid.uuid4().hex}.csv")
+        size, lines, last = 0, 0, b"\n"
+        try:
+            with open(path, "wb") as f:
+                async for chunk in chunks:
+                    if chunk:
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise UploadTooLarge(f"upload is larger than {self.max_bytes} bytes")
+                        f.write(chunk)
+                        lines += chunk.count(b"\n")
+                        last = chunk[-1:]
+        except BaseException:
+            os.unlink(path)
+            raise
+        if last != b"\n":
+            lines += 1
+        # Minus the header; quoted fields with newlines make this an upper bound
+        return path, max(0, lines - 1)
+
+    def start(self, event_id: int, path: str, total_rows: int, filename: Optional[str] = None) -> GuestImport:
+        """Checks the header, records the job and queues it; raises ImportRejected for unusable files."""
+        try:
+            with _open_csv(path) as f:
+                _columns(next(csv.reader(f), []))
+        except ImportRejected:
+            os.unlink(path)
+            raise
+        job = GuestImport(id=uuid.uuid4().hex, event_id=event_id, filename=filename, total_rows=total_rows)
+        self.run_write(lambda session: session.add(job))
+        self._worker.submit(self._run, job.id, event_id, path)
+        return job
+
+    # --- worker ---
+
+    def _sign(self, payloads: List[dict]) -> List[str]:
+        if self.sign_processes <= 0 or len(payloads) < 2 * self.sign_processes:
+            return sign_ticket_payloads(payloads, self.secret_key)
+        if self._sign_pool is None:
+            self._sign_pool = ProcessPoolExecutor(max_workers=self.sign_processes)
+        size = -(-len(payloads) // self.sign_processes)
+        slices = [payloads[i : i + size] for i in range(0, len(payloads), size)]
+        sign = partial(sign_ticket_payloads, secret_key=self.secret_key)
+        return [token for tokens in self._sign_pool.map(sign, slices) for token in tokens]
+
+    def _update(self, job_id: str, **values) -> None:
+        self.run_write(lambda session: session.execute(update(GuestImport).where(GuestImport.id == job_id).values(**values)))
+
+    def _run(self, job_id: str, event_id: int, path: str) -> None:
+        try:
+            self._update(job_id, status="running", started_at=datetime.utcnow())
+            self._import(job_id, event_id, path)
+            self._update(job_id, status="done", finished_at=datetime.utcnow())
+        except Exception as exc:
+            self._update(job_id, status="failed", error=str(exc)[:500], finished_at=datetime.utcnow())
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _import(self, job_id: str, event_id: int, path: str) -> None:
+        with Session(self.engine) as session:
+            event = session.get(Event, event_id)
+            if event is None:
+                raise ImportRejected("event was deleted")
+        # Emails earlier in the file; RSVPs already on the event are checked per chunk, at write time
+        seen = set()
+        stats = {"processed_rows": 0, "imported": 0, "duplicates": 0, "invalid": 0, "over_capacity": 0}
+        errors: List[dict] = []
+
+        with _open_csv(path) as f:
+            reader = csv.reader(f)
+            name_col, email_col = _columns(next(reader, []))
+            while True:
+                guests: List[Guest] = []
+                rows = 0
+                chunk_stats = dict(stats)
+                chunk_errors = list(errors)
+                for row in islice(reader, self.chunk_size):
+                    rows += 1
+                    # Source line, which quoted multi-line fields can advance by more than one
+                    line = reader.line_num
+                    chunk_stats["processed_rows"] += 1
+                    if not any(cell.strip() for cell in row):
+                        continue
+                    name = row[name_col].strip() if len(row) > name_col else ""
+                    email = row[email_col].strip().lower() if len(row) > email_col else ""
+                    if not name or not EMAIL_RE.match(email):
+                        _reject(chunk_stats, chunk_errors, line, email, "invalid", "invalid")
+                    elif email in seen:
+                        _reject(chunk_stats, chunk_errors, line, email, "duplicate", "duplicates")
+                    else:
+                        seen.add(email)
+                        guests.append((line, name, email))
+                if not rows:
+                    break
+                # Counters only advance once the chunk has committed
+                stats, errors = self.run_write(
+                    lambda session: self._insert_chunk(session, job_id, event, guests, chunk_stats, chunk_errors)
+                )
+
+    def _insert_chunk(
+        self, session: Session, job_id: str, event: Event, guests: List[Guest], stats: Dict[str, int], errors: List[dict]
+    ) -> Tuple[Dict[str, int], List[dict]]:
+        """Inserts one chunk's RSVPs, tickets and outbox events and records progress, in one transaction.
+
+        Guests already on the event or past its capacity are rejected here,
+        against the current rows, so RSVPs added since the import started
+        (by the form or anything else) are respected. Returns the updated
+        counters and errors; the inputs are not modified, so a retried
+        transaction starts from the same state.
+        """
+        stats, errors = dict(stats), list(errors)
+        # Locks the event row on Postgres, so concurrent writers to the event take turns
+        capacity = session.execute(select(Event.capacity).where(Event.id == event.id).with_for_update()).first()
+        if capacity is None:
+            raise ImportRejected("event was deleted")
+        if guests:
+            existing = {
+                email
+                for email in session.exec(
+                    select(func.lower(func.trim(RSVP.email))).where(
+                        RSVP.event_id == event.id, func.lower(func.trim(RSVP.email)).in_([email for _, _, email in guests])
+                    )
+                )
+            }
+            remaining = None
+            if capacity[0] is not None:
+                taken = session.exec(select(func.count()).select_from(RSVP).where(RSVP.event_id == event.id)).one()
+                remaining = max(0, capacity[0] - taken)
+            accepted: List[Guest] = []
+            for line, name, email in guests:
+                if email in existing:
+                    _reject(stats, errors, line, email, "duplicate", "duplicates")
+                elif remaining is not None and len(accepted) >= remaining:
+                    _reject(stats, errors, line, email, "over_capacity", "over_capacity")
+                else:
+                    accepted.append((line, name, email))
+            guests = accepted
+        if guests:
+            now = datetime.utcnow()
+            rsvps, tickets = RSVP.__table__, Ticket.__table__
+            # RETURNING rows are matched back by email (unique within a chunk) and rsvp_id rather than
+            # by position; asking for parameter order makes SQLite fall back to one INSERT per row
+            by_email = dict(
+                session.execute(
+                    insert(rsvps).returning(rsvps.c.email, rsvps.c.id),
+                    [{"event_id": event.id, "name": name, "email": email, "status": "confirmed", "created_at": now} for _, name, email in guests],
+                ).all()
+            )
+            rsvp_ids = [by_email[email] for _, _, email in guests]
+            tokens = self._sign([{"r": rsvp_id, "e": event.id, "ts": now.isoformat()} for rsvp_id in rsvp_ids])
+            by_rsvp = dict(
+                session.execute(
+                    insert(tickets).returning(tickets.c.rsvp_id, tickets.c.id),
+                    [{"rsvp_id": rsvp_id, "token": token, "status": "valid", "issued_at": now} for rsvp_id, token in zip(rsvp_ids, tokens)],
+                ).all()
+            )
+            ticket_ids = [by_rsvp[rsvp_id] for rsvp_id in rsvp_ids]
+            # Same events as a form RSVP, so outbox consumers see imported guests too
+            events = []
+            for (_, name, email), rsvp_id, ticket_id in zip(guests, rsvp_ids, ticket_ids):
+                rsvp = {"rsvp_id": rsvp_id, "event_id": event.id, "event_slug": event.slug, "name": name, "email": email}
+                ticket = {"ticket_id": ticket_id, "rsvp_id": rsvp_id, "event_id": event.id, "issued_at": now.isoformat()}
+                for event_type, payload in (("rsvp.created", rsvp), ("ticket.issued", ticket)):
+                    events.append(
+                        {"aggregate_type": "rsvp", "aggregate_id": str(rsvp_id), "event_type": event_type, "payload": json.dumps(payload), "created_at": now, "attempts": 0}
+                    )
+            session.execute(insert(OutboxEvent.__table__), events)
+        stats["imported"] += len(guests)
+        session.execute(update(GuestImport).where(GuestImport.id == job_id).values(**stats, errors=json.dumps(errors)))
+        return stats, errors
+
+    # --- lifecycle ---
+
+    def fail_interrupted(self) -> int:
+        """Marks jobs left queued or running by a previous process as failed; their spool files are gone."""
+        result = self.run_write(
+            lambda session: session.execute(
+                update(GuestImport)
+                .where(GuestImport.status.in_(("queued", "running")))
+                .values(status="failed", error="interrupted by a restart", finished_at=datetime.utcnow())
+            )
+        )
+        return result.rowcount or 0
+
+    def close(self) -> None:
+        self._worker.shutdown(wait=True)
+        if self._sign_pool is not None:
+            self._sign_pool.shutdown(wait=True)
+
+
+def _reject(stats: Dict[str, int], errors: List[dict], line: int, email: str, reason: str, counter: str) -> None:
+    stats[counter] += 1
+    if len(errors) < MAX_ERRORS:
+        errors.append({"line": line, "email": email, "reason": reason})
+
+
+def job_status(job: GuestImport) -> dict:
+    return {
+        "id": job.id,
+        "event_id": job.event_id,
+        "status": job.status,
+        "filename": job.filename,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "progress": 1.0 if job.status == "done" else round(min(1.0, job.processed_rows / job.total_rows), 4) if job.total_rows else 0.0,
+        "imported": job.imported,
+        "duplicates": job.duplicates,
+        "invalid": job.invalid,
+        "over_capacity": job.over_capacity,
+        "errors": json.loads(job.errors),
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
@@ -1,33 +1,45 @@
 from __future__ import annotations
 
 from datetime import datetime
+from functools import lru_cache
 
 from fastapi import FastAPI, Request, Depends, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, Response, JSONResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, JSONResponse, PlainTextResponse, StreamingResponse
 from prometheus_client import Counter, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+import asyncio
 import uuid
 import time
 import json
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import func
 from sqlmodel import select, Session
 
-from slowapi import Limiter, _rate_limiter
+from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.util import get_remote_address
 
-from .db import init_db, get_session, engine
-from .models import Event, RSVP, Ticket, CheckIn, WardIngest
+from shared.compression import install_compression
+from shared.idempotency import install_idempotency
+from shared.outbox import OutboxDispatcher, add_event
+from shared.profiling import RequestProfiler, install_profiling
+from shared.replicas import client_key
+from shared.serialization import FastJSONResponse, make_serializer
+from shared.sqlstats import begin_request, end_request
+from shared.staticassets import StaticAssets
+
+from .db import archive, engine, init_db, get_read_session, get_session, replicas, run_write, write_engine, write_queue
+from .guest_import import GuestImporter, ImportRejected, UploadTooLarge, job_status
+from .models import Event, RSVP, Ticket, CheckIn, GuestImport, WardIngest
+from .rendering import FragmentCache, Renderer, iter_rows
 from .security import sign_ticket_payload, verify_ticket_token
 from .settings import get_settings
 from .utils import generate_qr_base64_png, build_event_ics
 
 
-app = FastAPI(title="Events Service")
-app.mount("/static", StaticFiles(directory="/workspace/events_service/static"), name="static")
-templates = Jinja2Templates(directory="/workspace/events_service/templates")
+app = FastAPI(title="Events Service", default_response_class=FastJSONResponse)
+static_assets = StaticAssets("/workspace/events_service/static")
+app.mount("/static", static_assets, name="static")
 settings = get_settings()
 
 app.add_middleware(
@@ -38,10 +50,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@lru_cache(maxsize=1)
+def get_renderer() -> Renderer:
+    # jinja2 is only imported once the first HTML page is rendered
+    renderer = Renderer("/workspace/events_service/templates", settings.template_cache_dir, fragment_cache)
+    renderer.env.globals["static_url"] = static_assets.url
+    return renderer
+
+
+@lru_cache(maxsize=1)
+def get_templates():
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(env=get_renderer().env)
+
+
 # Rate limiting
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, enabled=settings.rate_limit_enabled)
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limiter)
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 
 
@@ -59,6 +87,46 @@ http_request_duration_ms: Histogram = Histogram(
     buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
     registry=metrics_registry,
 )
+db_queries_per_request: Histogram = Histogram(
+    "db_queries_per_request",
+    "SQL statements issued per HTTP request",
+    labelnames=("service", "method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    registry=metrics_registry,
+)
+db_time_per_request_ms: Histogram = Histogram(
+    "db_time_per_request_ms",
+    "Time spent in SQL per HTTP request in ms",
+    labelnames=("service", "method", "route"),
+    buckets=(1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000),
+    registry=metrics_registry,
+)
+db_n_plus_one_total: Counter = Counter(
+    "db_n_plus_one_total",
+    "Requests that repeated one SQL statement past the N+1 threshold",
+    labelnames=("service", "method", "route"),
+    registry=metrics_registry,
+)
+
+# Rendered event cards and detail blocks, reused until the event changes
+fragment_cache = FragmentCache(
+    settings.fragment_cache_size,
+    counter=Counter(
+        "template_fragment_cache_total",
+        "Per-event template fragment lookups",
+        labelnames=("result",),
+        registry=metrics_registry,
+    ),
+)
+fragment_cache.watch(Event)
+
+# Retried RSVPs with the same Idempotency-Key get the first response back
+install_idempotency(
+    app,
+    write_engine,
+    [("POST", "/events/{slug}/rsvp"), ("POST", "/api/events/{slug}/rsvp")],
+    registry=metrics_registry,
+)
 
 
 @app.middleware("http")
@@ -66,12 +134,18 @@ async def metrics_and_logging(request: Request, call_next):
     service = "events_py"
     request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
     start = time.perf_counter()
-    response = await call_next(request)
+    stats, stats_token = begin_request()
+    try:
+        response = await call_next(request)
+    finally:
+        end_request(stats_token)
     duration_ms = (time.perf_counter() - start) * 1000.0
     route = request.url.path
     status = str(response.status_code)
     http_requests_total.labels(service, request.method, route, status).inc()
     http_request_duration_ms.labels(service, request.method, route, status).observe(duration_ms)
+    db_queries_per_request.labels(service, request.method, route).observe(stats.count)
+    db_time_per_request_ms.labels(service, request.method, route).observe(stats.time_ms)
     response.headers["x-request-id"] = request_id
     print(
         json.dumps(
@@ -84,9 +158,28 @@ async def metrics_and_logging(request: Request, call_next):
                 "method": request.method,
                 "status": int(status),
                 "latency_ms": round(duration_ms, 3),
+                "db_queries": stats.count,
+                "db_time_ms": round(stats.time_ms, 3),
             }
         )
     )
+    repeated = stats.repeated()
+    if repeated:
+        db_n_plus_one_total.labels(service, request.method, route).inc()
+        print(
+            json.dumps(
+                {
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "level": "warning",
+                    "service": service,
+                    "request_id": request_id,
+                    "msg": "n_plus_one",
+                    "route": route,
+                    "method": request.method,
+                    "statements": [{"sql": sql, "count": n} for sql, n in repeated],
+                }
+            )
+        )
     return response
 
 
@@ -94,11 +187,92 @@ async def metrics_and_logging(request: Request, call_next):
 def metrics() -> Response:
     return Response(generate_latest(metrics_registry), media_type=CONTENT_TYPE_LATEST)
 
+
+# Clients that just wrote keep reading from the primary for a short window
+if replicas.enabled:
+    @app.middleware("http")
+    async def track_writes(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS"):
+            replicas.note_write(client_key(request))
+        return response
+
+    @app.on_event("startup")
+    async def start_replicas() -> None:
+        await replicas.start()
+
+    @app.on_event("shutdown")
+    async def stop_replicas() -> None:
+        await replicas.stop()
+
+
+# Request profiling is only wired in when PROFILE_DIR and a trigger are configured
+profiler = RequestProfiler.from_env()
+if profiler is not None:
+    install_profiling(app, profiler)
+
+# Outermost, so every response (including profiled ones) is compressed once
+install_compression(app, registry=metrics_registry)
+
+
+# Outbox relay is only started when OUTBOX_SINK names a file or webhook
+outbox = OutboxDispatcher.from_env(write_engine, registry=metrics_registry)
+
+
+@app.on_event("startup")
+async def start_outbox() -> None:
+    if outbox is not None:
+        await outbox.start()
+
+
+@app.on_event("shutdown")
+async def stop_outbox() -> None:
+    if outbox is not None:
+        await outbox.stop()
+
+
+# Guest-list CSV imports run on one background worker, chunk by chunk
+importer = GuestImporter(
+    engine,
+    run_write,
+    settings.secret_key,
+    spool_dir=settings.import_dir,
+    chunk_size=settings.import_chunk_size,
+    sign_processes=settings.import_sign_processes,
+    max_bytes=settings.import_max_bytes,
+)
+
+
+@app.on_event("shutdown")
+async def stop_write_queue() -> None:
+    await asyncio.to_thread(importer.close)
+    # Lets queued writes commit before the process exits
+    if write_queue is not None:
+        await asyncio.to_thread(write_queue.close)
+
+
+def _stage_rsvp_events(session: Session, event: Event, rsvp: RSVP, ticket: Ticket) -> None:
+    session.flush()
+    add_event(
+        session,
+        "rsvp",
+        rsvp.id,
+        "rsvp.created",
+        {"rsvp_id": rsvp.id, "event_id": event.id, "event_slug": event.slug, "name": rsvp.name, "email": rsvp.email},
+    )
+    add_event(
+        session,
+        "rsvp",
+        rsvp.id,
+        "ticket.issued",
+        {"ticket_id": ticket.id, "rsvp_id": rsvp.id, "event_id": event.id, "issued_at": ticket.issued_at.isoformat()},
+    )
+
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
     # Seed a sample event for local usage if none exists
-    with Session(engine) as s:
+    with Session(write_engine) as s:
         existing = s.exec(select(Event)).first()
         if not existing:
             e = Event(
@@ -113,13 +287,16 @@ def on_startup() -> None:
             )
             s.add(e)
             s.commit()
+    importer.fail_interrupted()
 
 
 @app.get("/", response_class=HTMLResponse)
 @limiter.limit("60/minute")
-def index(request: Request, session=Depends(get_session)):
-    events = session.exec(select(Event).where(Event.is_published == True)).all()
-    return templates.TemplateResponse("index.html", {"request": request, "events": events})
+def index(request: Request):
+    # Streamed: the page head is sent before events are loaded, and cards follow as they render
+    events = iter_rows(engine, select(Event).where(Event.is_published == True))
+    body = get_renderer().stream("index.html", {"request": request, "events": events})
+    return StreamingResponse(body, media_type="text/html; charset=utf-8")
 
 
 # JSON API
@@ -128,47 +305,28 @@ def health():
     return {"status": "ok"}
 
 
+# Public JSON shapes, read straight off the rows and encoded by orjson
+serialize_event = make_serializer(
+    ("id", "slug", "title", "description", "location", "start_at", "end_at", "capacity", "is_published")
+)
+serialize_ticket = make_serializer(("id", "rsvp_id", "token", "issued_at", "checked_in_at", "status"))
+
+
 @app.get("/api/events")
 @limiter.limit("60/minute")
-def api_events(session=Depends(get_session)):
+def api_events(request: Request, session=Depends(get_read_session)):
     events = session.exec(select(Event).where(Event.is_published == True)).all()
-    def serialize(e: Event):
-        return {
-            "id": e.id,
-            "slug": e.slug,
-            "title": e.title,
-            "description": e.description,
-            "location": e.location,
-            "start_at": e.start_at.isoformat(),
-            "end_at": e.end_at.isoformat() if e.end_at else None,
-            "capacity": e.capacity,
-            "is_published": e.is_published,
-        }
-    return {"ok": True, "events": [serialize(e) for e in events]}
+    return FastJSONResponse({"ok": True, "events": [serialize_event(e) for e in events]})
 
 
 @app.get("/api/events/{slug}")
 @limiter.limit("60/minute")
-def api_event_detail(slug: str, session=Depends(get_session)):
+def api_event_detail(slug: str, request: Request, session=Depends(get_read_session)):
     event = session.exec(select(Event).where(Event.slug == slug)).first()
     if not event or not event.is_published:
         raise HTTPException(404, "Event not found")
-    rsvp_count = len(session.exec(select(RSVP).where(RSVP.event_id == event.id)).all())
-    return {
-        "ok": True,
-        "event": {
-            "id": event.id,
-            "slug": event.slug,
-            "title": event.title,
-            "description": event.description,
-            "location": event.location,
-            "start_at": event.start_at.isoformat(),
-            "end_at": event.end_at.isoformat() if event.end_at else None,
-            "capacity": event.capacity,
-            "is_published": event.is_published,
-            "rsvp_count": rsvp_count,
-        },
-    }
+    rsvp_count = session.exec(select(func.count()).select_from(RSVP).where(RSVP.event_id == event.id)).one()
+    return FastJSONResponse({"ok": True, "event": {**serialize_event(event), "rsvp_count": rsvp_count}})
 
 
 @app.get("/events/{slug}", response_class=HTMLResponse)
@@ -177,12 +335,12 @@ def event_detail(slug: str, request: Request, session=Depends(get_session)):
     event = session.exec(select(Event).where(Event.slug == slug)).first()
     if not event or not event.is_published:
         raise HTTPException(404, "Event not found")
-    return templates.TemplateResponse("event_detail.html", {"request": request, "event": event})
+    return get_templates().TemplateResponse("event_detail.html", {"request": request, "event": event})
 
 
 @app.get("/events/{slug}/ics")
 @limiter.limit("30/minute")
-def event_ics(slug: str, session=Depends(get_session)):
+def event_ics(slug: str, request: Request, session=Depends(get_session)):
     event = session.exec(select(Event).where(Event.slug == slug)).first()
     if not event:
         raise HTTPException(404, "Event not found")
@@ -197,22 +355,16 @@ def event_ics(slug: str, session=Depends(get_session)):
     return Response(content=ics_text, media_type="text/calendar")
 
 
-@app.post("/events/{slug}/rsvp")
-@limiter.limit("10/minute")
-def create_rsvp(
-    slug: str,
-    name: str = Form(...),
-    email: str = Form(...),
-    session=Depends(get_session),
-):
+def _rsvp_or_existing(session: Session, slug: str, name: str, email: str) -> dict:
+    """Create an RSVP and its ticket, or return the existing one for this email; flushes only."""
     event = session.exec(select(Event).where(Event.slug == slug)).first()
     if not event or not event.is_published:
         raise HTTPException(404, "Event not found")
 
     # Basic capacity check
     if event.capacity is not None:
-        count = session.exec(select(RSVP).where(RSVP.event_id == event.id)).all()
-        if len(count) >= event.capacity:
+        count = session.exec(select(func.count()).select_from(RSVP).where(RSVP.event_id == event.id)).one()
+        if count >= event.capacity:
             raise HTTPException(400, "Event is at capacity")
 
     # Prevent duplicate RSVP per event/email
@@ -220,7 +372,12 @@ def create_rsvp(
         select(RSVP).where(RSVP.event_id == event.id).where(RSVP.email == email)
     ).first()
     if existing:
-        return RedirectResponse(url=f"/rsvp/{existing.id}/confirm", status_code=303)
+        ticket = session.exec(select(Ticket).where(Ticket.rsvp_id == existing.id)).first()
+        return {
+            "rsvp_id": existing.id,
+            "ticket_id": ticket.id if ticket else None,
+            "token": ticket.token if ticket else None,
+        }
 
     rsvp = RSVP(event_id=event.id, name=name, email=email, status="confirmed")
     session.add(rsvp)
@@ -231,52 +388,32 @@ def create_rsvp(
 
     ticket = Ticket(rsvp_id=rsvp.id, token=token, status="valid")
     session.add(ticket)
-    session.commit()
+    _stage_rsvp_events(session, event, rsvp, ticket)
+    return {"rsvp_id": rsvp.id, "ticket_id": ticket.id, "token": token}
+
 
-    return RedirectResponse(url=f"/rsvp/{rsvp.id}/confirm", status_code=303)
+@app.post("/events/{slug}/rsvp")
+@limiter.limit("10/minute")
+def create_rsvp(
+    slug: str,
+    request: Request,
+    name: str = Form(...),
+    email: str = Form(...),
+):
+    result = run_write(lambda session: _rsvp_or_existing(session, slug, name, email))
+    return RedirectResponse(url=f"/rsvp/{result['rsvp_id']}/confirm", status_code=303)
 
 
 @app.post("/api/events/{slug}/rsvp")
 @limiter.limit("10/minute")
 def api_create_rsvp(
     slug: str,
+    request: Request,
     name: str = Form(...),
     email: str = Form(...),
-    session=Depends(get_session),
 ):
-    event = session.exec(select(Event).where(Event.slug == slug)).first()
-    if not event or not event.is_published:
-        raise HTTPException(404, "Event not found")
-
-    if event.capacity is not None:
-        count = session.exec(select(RSVP).where(RSVP.event_id == event.id)).all()
-        if len(count) >= event.capacity:
-            raise HTTPException(400, "Event is at capacity")
-
-    existing = session.exec(
-        select(RSVP).where(RSVP.event_id == event.id).where(RSVP.email == email)
-    ).first()
-    if existing:
-        ticket = session.exec(select(Ticket).where(Ticket.rsvp_id == existing.id)).first()
-        return {
-            "ok": True,
-            "rsvp_id": existing.id,
-            "ticket_id": ticket.id if ticket else None,
-            "token": ticket.token if ticket else None,
-        }
-
-    rsvp = RSVP(event_id=event.id, name=name, email=email, status="confirmed")
-    session.add(rsvp)
-    session.flush()
-
-    payload = {"r": rsvp.id, "e": event.id, "ts": datetime.utcnow().isoformat()}
-    token = sign_ticket_payload(payload)
-
-    ticket = Ticket(rsvp_id=rsvp.id, token=token, status="valid")
-    session.add(ticket)
-    session.commit()
-
-    return {"ok": True, "rsvp_id": rsvp.id, "ticket_id": ticket.id, "token": token}
+    result = run_write(lambda session: _rsvp_or_existing(session, slug, name, email))
+    return {"ok": True, **result}
 
 
 @app.get("/rsvp/{rsvp_id}/confirm", response_class=HTMLResponse)
@@ -287,7 +424,7 @@ def rsvp_confirm(rsvp_id: int, request: Request, session=Depends(get_session)):
         raise HTTPException(404, "RSVP not found")
     event = session.get(Event, rsvp.event_id)
     ticket = session.exec(select(Ticket).where(Ticket.rsvp_id == rsvp.id)).first()
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "rsvp_confirm.html",
         {"request": request, "rsvp": rsvp, "event": event, "ticket": ticket},
     )
@@ -302,7 +439,7 @@ def ticket_page(ticket_id: int, request: Request, session=Depends(get_session)):
     rsvp = session.get(RSVP, ticket.rsvp_id)
     event = session.get(Event, rsvp.event_id) if rsvp else None
     qr_data_url = generate_qr_base64_png(ticket.token)
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "ticket.html",
         {"request": request, "ticket": ticket, "rsvp": rsvp, "event": event, "qr": qr_data_url},
     )
@@ -311,27 +448,20 @@ def ticket_page(ticket_id: int, request: Request, session=Depends(get_session)):
 @app.get("/scanner", response_class=HTMLResponse)
 @limiter.limit("60/minute")
 def scanner_page(request: Request):
-    return templates.TemplateResponse("scanner.html", {"request": request})
+    return get_templates().TemplateResponse("scanner.html", {"request": request})
 
 
 @app.get("/api/tickets/{ticket_id}")
 @limiter.limit("60/minute")
-def api_ticket(ticket_id: int, session=Depends(get_session)):
+def api_ticket(ticket_id: int, request: Request, session=Depends(get_read_session)):
     ticket = session.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(404, "Ticket not found")
     rsvp = session.get(RSVP, ticket.rsvp_id)
     event = session.get(Event, rsvp.event_id) if rsvp else None
-    return {
+    return FastJSONResponse({
         "ok": True,
-        "ticket": {
-            "id": ticket.id,
-            "rsvp_id": ticket.rsvp_id,
-            "token": ticket.token,
-            "issued_at": ticket.issued_at.isoformat(),
-            "checked_in_at": ticket.checked_in_at.isoformat() if ticket.checked_in_at else None,
-            "status": ticket.status,
-        },
+        "ticket": serialize_ticket(ticket),
         "event": {
             "id": event.id,
             "slug": event.slug,
@@ -342,7 +472,7 @@ def api_ticket(ticket_id: int, session=Depends(get_session)):
             "name": rsvp.name,
             "email": rsvp.email,
         } if rsvp else None,
-    }
+    })
 
 
 # Ward metrics ingestion and freshness endpoints
@@ -360,17 +490,17 @@ def ingest_ward_metric(ward: str, source: str | None = None, payload: str | None
 
 
 @app.get("/api/metrics/ward/freshness")
-def ward_freshness(threshold_seconds: int = 900, session=Depends(get_session)):
+def ward_freshness(threshold_seconds: int = 900, session=Depends(get_read_session)):
     # Compute freshness from latest ingests persisted, fallback to in-memory map
     results: list[dict] = []
     wards = set(latest_ward_ingest.keys())
-    db_latest: dict[str, datetime] = {}
-    rows = session.exec(select(WardIngest.ward, WardIngest.received_at)).all()
+    # Archived segments only matter for wards with no ingest left in the table
+    db_latest: dict[str, datetime] = archive.latest("wardingest") if archive is not None else {}
+    rows = session.exec(select(WardIngest.ward, func.max(WardIngest.received_at)).group_by(WardIngest.ward)).all()
     for ward, ts in rows:
-        prev = db_latest.get(ward)
-        if prev is None or (ts and ts > prev):
+        if ts:
             db_latest[ward] = ts
-            wards.add(ward)
+    wards.update(db_latest)
     now = datetime.utcnow()
     for ward in sorted(wards):
         ts = latest_ward_ingest.get(ward) or db_latest.get(ward)
@@ -384,7 +514,7 @@ def ward_freshness(threshold_seconds: int = 900, session=Depends(get_session)):
 
 @app.get("/checkin/verify")
 @limiter.limit("60/minute")
-def verify(token: str, session=Depends(get_session)):
+def verify(token: str, request: Request, session=Depends(get_session)):
     payload = verify_ticket_token(token)
     if not payload:
         return JSONResponse(status_code=400, content={"ok": False, "error": "invalid_token"})
@@ -400,12 +530,7 @@ def verify(token: str, session=Depends(get_session)):
     }
 
 
-@app.post("/checkin")
-@limiter.limit("60/minute")
-def check_in(token: str = Form(...), session=Depends(get_session)):
-    payload = verify_ticket_token(token)
-    if not payload:
-        return JSONResponse(status_code=400, content={"ok": False, "error": "invalid_token"})
+def _check_in_ticket(session: Session, token: str):
     ticket = session.exec(select(Ticket).where(Ticket.token == token)).first()
     if not ticket:
         return JSONResponse(status_code=404, content={"ok": False, "error": "ticket_not_found"})
@@ -414,13 +539,22 @@ def check_in(token: str = Form(...), session=Depends(get_session)):
     ticket.checked_in_at = datetime.utcnow()
     session.add(ticket)
     session.add(CheckIn(ticket_id=ticket.id))
-    session.commit()
+    session.flush()
     return {"ok": True, "ticket_id": ticket.id, "checked_in_at": ticket.checked_in_at.isoformat()}
 
 
+@app.post("/checkin")
+@limiter.limit("60/minute")
+def check_in(request: Request, token: str = Form(...)):
+    payload = verify_ticket_token(token)
+    if not payload:
+        return JSONResponse(status_code=400, content={"ok": False, "error": "invalid_token"})
+    return run_write(lambda session: _check_in_ticket(session, token))
+
+
 @app.get("/admin/events/{slug}/rsvps.csv")
 @limiter.limit("10/minute")
-def export_rsvps_csv(slug: str, session=Depends(get_session)):
+def export_rsvps_csv(slug: str, request: Request, session=Depends(get_session)):
     event = session.exec(select(Event).where(Event.slug == slug)).first()
     if not event:
         raise HTTPException(404, "Event not found")
@@ -440,3 +574,55 @@ def export_rsvps_csv(slug: str, session=Depends(get_session)):
         )
     csv_text = "\n".join(lines) + "\n"
     return PlainTextResponse(content=csv_text, media_type="text/csv")
+
+
+@app.post("/admin/events/{slug}/guests/import", status_code=202)
+@limiter.limit("10/minute")
+async def import_guests(slug: str, request: Request):
+    """Queues a guest-list CSV (``name,email`` header) sent as the raw body or a multipart ``file`` field."""
+    event_id = await asyncio.to_thread(_event_id_for_import, slug)
+    # Refused before multipart parsing, which would otherwise buffer the whole file first
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > importer.max_bytes:
+        raise HTTPException(413, f"upload is larger than {importer.max_bytes} bytes")
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(400, "multipart upload needs a 'file' field")
+            filename = upload.filename
+
+            async def chunks():
+                while chunk := await upload.read(1 << 16):
+                    yield chunk
+
+            path, total_rows = await importer.spool(chunks())
+        else:
+            filename = request.headers.get("x-filename")
+            path, total_rows = await importer.spool(request.stream())
+    except UploadTooLarge as exc:
+        raise HTTPException(413, str(exc))
+    try:
+        job = await asyncio.to_thread(importer.start, event_id, path, total_rows, filename)
+    except ImportRejected as exc:
+        raise HTTPException(400, str(exc))
+    return FastJSONResponse(status_code=202, content={"ok": True, "job": job_status(job), "status_url": f"/admin/imports/{job.id}"})
+
+
+def _event_id_for_import(slug: str) -> int:
+    with Session(engine) as session:
+        event_id = session.exec(select(Event.id).where(Event.slug == slug)).first()
+    if event_id is None:
+        raise HTTPException(404, "Event not found")
+    return event_id
+
+
+@app.get("/admin/imports/{job_id}")
+@limiter.limit("120/minute")
+def import_status(job_id: str, request: Request, session=Depends(get_session)):
+    # Read from the primary: a replica would lag behind the per-chunk progress updates
+    job = session.get(GuestImport, job_id)
+    if not job:
+        raise HTTPException(404, "Import not found")
+    return FastJSONResponse({"ok": True, "job": job_status(job)})
@@ -4,6 +4,9 @@ from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
 
+# Re-exported: one outbox table definition serves every service
+from shared.outbox import OutboxEvent  # noqa: F401
+
 
 class Event(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -45,10 +48,29 @@ class CheckIn(SQLModel, table=True):
     note: Optional[str] = None
 
 
+class GuestImport(SQLModel, table=True):
+    """A guest-list CSV being turned into RSVPs and tickets; counters are updated after every chunk."""
+
+    id: str = Field(primary_key=True)
+    event_id: int = Field(foreign_key="event.id", index=True)
+    status: str = Field(default="queued")  # queued|running|done|failed
+    filename: Optional[str] = None
+    total_rows: int = 0
+    processed_rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    over_capacity: int = 0
+    errors: str = Field(default="[]", description="JSON list of the first rejected rows: {line, email, reason}")
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class WardIngest(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     ward: str = Field(index=True)
     source: Optional[str] = None
     received_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     payload: Optional[str] = None
-
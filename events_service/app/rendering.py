@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import event as sa_event
+from sqlmodel import Session
+
+from .models import Event
+
+# jinja2 is imported when the first page renders, not at boot (checked by tests/test_startup.py)
+
+
+class FragmentCache:
+    """LRU of rendered per-event HTML fragments.
+
+    Entries are keyed by template, event id and ``updated_at``, so an edited
+    event misses on its next render in every worker without any messaging;
+    ``invalidate`` drops the stale entries in this process right away.
+    """
+
+    def __init__(self, max_entries: int = 2048, counter: Any = None) -> None:
+        self.max_entries = max_entries
+        self.counter = counter
+        self._entries: "OrderedDict[Tuple[str, int, datetime], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int, datetime]) -> Optional[str]:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+        if self.counter is not None:
+            self.counter.labels("hit" if html is not None else "miss").inc()
+        return html
+
+    def put(self, key: Tuple[str, int, datetime], html: str) -> None:
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, event_id: int) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == event_id]:
+                del self._entries[key]
+
+    def watch(self, model=Event) -> None:
+        """Invalidates an event's fragments when this process updates or deletes it through the ORM."""
+        for identifier in ("after_update", "after_delete"):
+            sa_event.listen(model, identifier, lambda mapper, connection, target: self.invalidate(target.id))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Renderer:
+    """Jinja environment for the HTML pages.
+
+    Compiled templates are kept in a bytecode cache under ``cache_dir`` so a
+    fresh worker loads them instead of re-parsing. Templates render a
+    per-event fragment with ``{{ event_fragment("_event_card.html", e) }}``,
+    served from ``fragments`` while the event is unchanged. ``stream``
+    yields a page while it renders, in chunks of at least ``chunk_size``
+    bytes after the first.
+    """
+
+    def __init__(self, template_dir: str, cache_dir: Optional[str] = None, fragments: Optional[FragmentCache] = None) -> None:
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+        from markupsafe import Markup
+
+        bytecode_cache = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(("html", "xml")),
+            bytecode_cache=bytecode_cache,
+        )
+        self.fragments = fragments if fragments is not None else FragmentCache()
+        self._markup = Markup
+        self.env.globals["event_fragment"] = self.event_fragment
+
+    def event_fragment(self, template_name: str, event: Event):
+        key = (template_name, event.id, event.updated_at)
+        html = self.fragments.get(key)
+        if html is None:
+            html = self.env.get_template(template_name).render(e=event)
+            self.fragments.put(key, html)
+        return self._markup(html)
+
+    def stream(self, template_name: str, context: dict, chunk_size: int = 8192) -> Iterator[str]:
+        """Renders ``template_name`` incrementally; the first chunk (page head) is sent as soon as it exists."""
+        pending, size, first = [], 0, True
+        for piece in self.env.get_template(template_name).generate(context):
+            pending.append(piece)
+            size += len(piece)
+            if first or size >= chunk_size:
+                yield "".join(pending)
+                pending, size, first = [], 0, False
+        if pending:
+            yield "".join(pending)
+
+
+def iter_rows(engine, statement, batch_size: int = 100) -> Iterable[Any]:
+    """Streams ORM rows for ``statement`` in batches on a session of its own, for use while a response is sent."""
+    with Session(engine) as session:
+        yield from session.exec(statement.execution_options(yield_per=batch_size))
+
+
+@sa_event.listens_for(Event, "before_update")
+def _touch_event(mapper, connection, target: Event) -> None:
+    # updated_at versions the fragment cache, so every ORM update must move it
+    target.updated_at = datetime.utcnow()
@@ -13,6 +13,15 @@ def sign_ticket_payload(payload: dict) -> str:
     return _serializer().dumps(payload)
 
 
+def sign_ticket_payloads(payloads: list[dict], secret_key: str | None = None) -> list[str]:
+    """Signs many payloads with one serializer; the tokens match ``sign_ticket_payload``'s.
+
+    ``secret_key`` lets process-pool workers sign without loading settings.
+    """
+    serializer = URLSafeSerializer(secret_key or get_settings().secret_key, salt="ticket")
+    return [serializer.dumps(payload) for payload in payloads]
+
+
 def verify_ticket_token(token: str) -> dict | None:
     try:
         return _serializer().loads(token)
@@ -9,6 +9,21 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///events.db"
     base_url: str = "http://localhost:8000"
     cors_origins: list[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
+    rate_limit_enabled: bool = True
+    # WAL/pragmas and a single group-committing writer thread for sqlite URLs
+    sqlite_production: bool = False
+    # Segment archive for WardIngest rows past the retention horizon; unset disables it
+    archive_dir: str | None = None
+    archive_retention_days: int = 30
+    # Guest-list imports: spooled uploads (default: the temp dir), rows per transaction, signing processes (0: in-process),
+    # largest accepted upload in bytes
+    import_dir: str | None = None
+    import_chunk_size: int = 1000
+    import_sign_processes: int = 0
+    import_max_bytes: int = 50 * 1024 * 1024
+    # Compiled Jinja templates survive restarts here; rendered per-event fragments kept in memory
+    template_cache_dir: str | None = "/workspace/events_service/.events_cache"
+    fragment_cache_size: int = 2048
 
     model_config = {
         "env_prefix": "events_",
@@ -4,11 +4,12 @@ import base64
 import io
 from typing import Optional
 
-import qrcode
-from ics import Calendar, Event as IcsEvent
+# qrcode (PIL) and ics (arrow) are slow to import, so they are imported on first use
 
 
 def generate_qr_base64_png(data: str) -> str:
+    import qrcode
+
     qr = qrcode.QRCode(version=1, box_size=8, border=2)
     qr.add_data(data)
     qr.make(fit=True)
@@ -28,6 +29,8 @@ def build_event_ics(
     end_iso: Optional[str],
     url: Optional[str] = None,
 ) -> str:
+    from ics import Calendar, Event as IcsEvent
+
     cal = Calendar()
     event = IcsEvent()
     event.name = title
@@ -4,6 +4,8 @@ cd "$(dirname "$0")"
 if [ -d .venv ]; then
   source .venv/bin/activate || true
 fi
+# The shared/ package at the repository root is imported by every service
+export PYTHONPATH="$(cd .. && pwd)${PYTHONPATH:+:$PYTHONPATH}"
 export EVENTS_SECRET_KEY=${EVENTS_SECRET_KEY:-change-me}
 export EVENTS_DATABASE_URL=${EVENTS_DATABASE_URL:-sqlite:///events.db}
 uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
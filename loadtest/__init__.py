@@ -0,0 +1 @@
+"""In-repo load harness; run with ``python -m loadtest``."""
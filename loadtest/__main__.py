@@ -0,0 +1,109 @@
+"""Load harness for the wallet, events and moderation services.
+
+Examples:
+
+    python -m loadtest --service all
+    python -m loadtest --service events --iterations 2000 --concurrency 32 --save-baseline
+    python -m loadtest --service wallet --mode http --base-url http://127.0.0.1:8000
+
+Exits with status 1 when any route's p95 regressed past ``--threshold``
+relative to the stored baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .data import SyntheticData
+from .harness import Recorder, compare_to_baseline, format_table, load_baseline, open_client, save_baseline
+from .scenarios import SERVICES, Options, scratch_dir
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="python -m loadtest", description="Drive realistic traffic at the services")
+    p.add_argument("--service", choices=[*SERVICES, "all"], default="all")
+    p.add_argument("--mode", choices=["inprocess", "http"], default="inprocess",
+                   help="inprocess drives the ASGI app directly; http targets a running uvicorn")
+    p.add_argument("--base-url", help="target for --mode http (defaults per service: wallet :8000, events :8001, moderation :8002)")
+    p.add_argument("--iterations", type=int, default=200, help="flows per service")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--event-slugs", help="comma-separated published events to RSVP to instead of seeding new ones")
+    p.add_argument("--baseline-dir", default=os.path.join(os.path.dirname(__file__), "baselines"))
+    p.add_argument("--threshold", type=float, default=0.2, help="allowed p95 growth over baseline (0.2 = 20%%)")
+    p.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    p.add_argument("--show-logs", action="store_true", help="keep the apps' request logs on stdout (inprocess mode)")
+    p.add_argument("--raw", action="store_true", help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+
+async def _run_service(name: str, args: argparse.Namespace) -> dict:
+    service = SERVICES[name]
+    inprocess = args.mode == "inprocess"
+    app = service.load_app(scratch_dir()) if inprocess else None
+    base_url = None if inprocess else (args.base_url or service.default_base_url)
+    rec = Recorder()
+    opts = Options(iterations=args.iterations, concurrency=args.concurrency, inprocess=inprocess)
+    async with open_client(app=app, base_url=base_url) as client:
+        rec.started = time.perf_counter()
+        await service.scenario(client, rec, SyntheticData(args.seed), opts)
+        rec.finished = time.perf_counter()
+    return rec.summary()
+
+
+def _run_isolated(name: str, argv: list) -> dict:
+    child_argv = [a for a in argv if a not in ("--save-baseline", "--json")]
+    cmd = [sys.executable, "-m", "loadtest", *child_argv, "--service", name, "--raw"]
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])[name]
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.event_slugs:
+        os.environ["LOADTEST_EVENT_SLUGS"] = args.event_slugs
+    names = list(SERVICES) if args.service == "all" else [args.service]
+
+    results = {}
+    for name in names:
+        if len(names) > 1 and args.mode == "inprocess":
+            # The wallet and events apps declare tables with the same names on
+            # SQLModel's shared metadata, so each app gets its own interpreter
+            results[name] = _run_isolated(name, argv if argv is not None else sys.argv[1:])
+            continue
+        quiet = args.mode == "inprocess" and not args.show_logs
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+            results[name] = asyncio.run(_run_service(name, args))
+    if args.raw:
+        print(json.dumps(results))
+        return 0
+
+    failed = False
+    report = {}
+    for name, summary in results.items():
+        path = os.path.join(args.baseline_dir, f"{name}-{args.mode}.json")
+        regressions = compare_to_baseline(summary, load_baseline(path), args.threshold)
+        report[name] = {"routes": summary, "regressions": regressions}
+        if args.save_baseline:
+            save_baseline(path, summary)
+        elif regressions:
+            failed = True
+        if not args.json:
+            print(format_table(f"\n== {name} ({args.mode}) ==", summary))
+            for line in regressions:
+                print(f"REGRESSION {line}")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
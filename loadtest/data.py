@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import random
+import string
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+REASONS = ("spam", "harassment", "hate", "scam", "nudity", "violence", "other")
+WORDS = (
+    "braai", "taxi", "stokvel", "spaza", "market", "soccer", "church", "school", "clinic", "jobs",
+    "water", "load", "shedding", "ward", "meeting", "tickets", "free", "offer", "click", "winner",
+)
+
+
+class SyntheticData:
+    """Deterministic generator for load-test payloads; the same seed gives the same run."""
+
+    def __init__(self, seed: int = 1) -> None:
+        self.rng = random.Random(seed)
+        self.run_id = "".join(self.rng.choice(string.ascii_lowercase) for _ in range(6))
+
+    # --- wallet ---
+
+    def group(self, i: int, size: int) -> Dict[str, object]:
+        return {
+            "group_id": f"lt-{self.run_id}-g{i}",
+            "members": [f"lt-{self.run_id}-g{i}-m{j}" for j in range(size)],
+        }
+
+    def bill_cents(self) -> int:
+        return self.rng.randrange(2_000, 250_000, 50)
+
+    # --- events ---
+
+    def attendee(self, i: int) -> Dict[str, str]:
+        first = self.rng.choice(("Thabo", "Lerato", "Sipho", "Naledi", "Kagiso", "Zanele", "Musa", "Ayanda"))
+        return {"name": f"{first} {i}", "email": f"lt-{self.run_id}-{i}@example.test"}
+
+    def events(self, count: int, capacity: int) -> List[Dict[str, object]]:
+        now = datetime.utcnow()
+        return [
+            {
+                "slug": f"lt-{self.run_id}-event-{i}",
+                "title": f"Load test event {i}",
+                "location": "Community Hall",
+                "start_at": now + timedelta(days=1 + i),
+                "capacity": capacity,
+                "is_published": True,
+            }
+            for i in range(count)
+        ]
+
+    # --- moderation ---
+
+    def content_id(self, pool: int) -> str:
+        # Skewed towards a few viral items so coalescing is exercised
+        return f"lt-{self.run_id}-post-{min(int(self.rng.paretovariate(1.2)) - 1, pool - 1)}"
+
+    def report(self, pool: int) -> Dict[str, str]:
+        return {
+            "content_id": self.content_id(pool),
+            "content_text": " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(5, 40))),
+            "reason": self.rng.choice(REASONS),
+            "reporter_id": f"lt-{self.run_id}-u{self.rng.randrange(100_000)}",
+        }
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+
+class Recorder:
+    """Collects latencies per route label (e.g. ``POST /wallet/requests/{id}/pay``)."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] = self.errors.get(route, 0) + 1
+            raise
+        self.samples.setdefault(route, []).append((time.perf_counter() - start) * 1000.0)
+        if response.status_code >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        out: Dict[str, Dict[str, float]] = {}
+        for route in sorted(set(self.samples) | set(self.errors)):
+            values = sorted(self.samples.get(route, []))
+            out[route] = {
+                "count": len(values),
+                "errors": self.errors.get(route, 0),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+                "rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+        return out
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def run_flows(
+    flow: Callable[[int], Awaitable[None]], iterations: int, concurrency: int
+) -> None:
+    """Run ``flow(i)`` for ``i`` in ``range(iterations)`` with at most ``concurrency`` in flight."""
+    counter = iter(range(iterations))
+
+    async def worker() -> None:
+        for i in counter:
+            try:
+                await flow(i)
+            except httpx.HTTPError:
+                # Already counted by the recorder; keep the worker going
+                continue
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+@asynccontextmanager
+async def asgi_lifespan(app: Any) -> AsyncIterator[None]:
+    """Drive the ASGI lifespan protocol so startup/shutdown hooks run in-process."""
+    receive_queue: asyncio.Queue = asyncio.Queue()
+    send_queue: asyncio.Queue = asyncio.Queue()
+
+    async def receive() -> dict:
+        return await receive_queue.get()
+
+    async def send(message: dict) -> None:
+        await send_queue.put(message)
+
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, receive, send))
+    await receive_queue.put({"type": "lifespan.startup"})
+    message = await send_queue.get()
+    if message["type"] == "lifespan.startup.failed":
+        raise RuntimeError(message.get("message", "startup failed"))
+    try:
+        yield
+    finally:
+        await receive_queue.put({"type": "lifespan.shutdown"})
+        await send_queue.get()
+        await task
+
+
+@asynccontextmanager
+async def open_client(app: Any = None, base_url: Optional[str] = None) -> AsyncIterator[httpx.AsyncClient]:
+    """In-process client over ASGI when ``app`` is given, otherwise HTTP against ``base_url``."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    if app is not None:
+        async with asgi_lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits) as client:
+                yield client
+    else:
+        async with httpx.AsyncClient(base_url=base_url or "http://127.0.0.1:8000", limits=limits, timeout=30.0) as client:
+            yield client
+
+
+def compare_to_baseline(
+    summary: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float
+) -> List[str]:
+    """Routes whose p95 grew by more than ``threshold`` (0.2 == 20%) or whose errors appeared."""
+    regressions: List[str] = []
+    for route, stats in summary.items():
+        base = baseline.get(route)
+        if not base:
+            continue
+        if base["p95_ms"] > 0 and stats["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{route}: p95 {stats['p95_ms']:.1f}ms vs baseline {base['p95_ms']:.1f}ms (+{threshold:.0%} allowed)"
+            )
+        if stats["errors"] > base.get("errors", 0):
+            regressions.append(f"{route}: {stats['errors']} errors vs baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, summary: Dict[str, Dict[str, float]]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def format_table(title: str, summary: Dict[str, Dict[str, float]]) -> str:
+    header = f"{'route':<48} {'count':>7} {'err':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9}"
+    lines = [title, header, "-" * len(header)]
+    for route, s in summary.items():
+        lines.append(
+            f"{route:<48} {int(s['count']):>7} {int(s['errors']):>5} "
+            f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['rps']:>9.1f}"
+        )
+    return "\n".join(lines)
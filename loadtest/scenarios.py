@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import httpx
+
+from .data import SyntheticData
+from .harness import Recorder, run_flows
+
+
+class Options(NamedTuple):
+    iterations: int
+    concurrency: int
+    inprocess: bool
+
+
+def _json(response: httpx.Response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+# --- wallet: split-bill flows against app.main ---
+
+
+def load_wallet_app(workdir: str) -> Any:
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'wallet.db')}")
+    from app.main import app
+
+    return app
+
+
+async def wallet_scenario(client: httpx.AsyncClient, rec: Recorder, data: SyntheticData, opts: Options) -> None:
+    """One flow = one shared bill: the payer requests a share from every other member,
+    who accept-then-pay or pay directly; every tenth bill has one share cancelled."""
+
+    async def flow(i: int) -> None:
+        group = data.group(i, size=4)
+        group_id, members = group["group_id"], group["members"]
+        payer, others = members[0], members[1:]
+        share = data.bill_cents() // len(members)
+        for j, member in enumerate(others):
+            r = await rec.call(
+                client, "POST /wallet/requests", "POST", "/wallet/requests",
+                json={"group_id": group_id, "requester_id": payer, "amount_cents": share, "currency": "ZAR"},
+            )
+            body = _json(r)
+            if r.status_code != 201 or not body:
+                continue
+            req_id = body["id"]
+            if i % 10 == 0 and j == 0:
+                await rec.call(
+                    client, "POST /wallet/requests/{id}/cancel", "POST",
+                    f"/wallet/requests/{req_id}/cancel", params={"actor_id": payer},
+                )
+                continue
+            if j % 2 == 0:
+                await rec.call(
+                    client, "POST /wallet/requests/{id}/accept", "POST",
+                    f"/wallet/requests/{req_id}/accept", params={"actor_id": member},
+                )
+            await rec.call(
+                client, "POST /wallet/requests/{id}/pay", "POST",
+                f"/wallet/requests/{req_id}/pay", params={"payer_id": member},
+            )
+        await rec.call(client, "GET /wallet/groups/{id}/balances", "GET", f"/wallet/groups/{group_id}/balances")
+        await rec.call(client, "GET /wallet/requests", "GET", "/wallet/requests", params={"group_id": group_id})
+        await rec.call(client, "GET /wallet/groups/{id}/changes", "GET", f"/wallet/groups/{group_id}/changes")
+        if i % 5 == 0:
+            await rec.call(client, "GET /wallet/groups/{id}/ledger.csv", "GET", f"/wallet/groups/{group_id}/ledger.csv")
+
+    await run_flows(flow, opts.iterations, opts.concurrency)
+
+
+# --- events: RSVP bursts followed by a check-in storm ---
+
+
+def load_events_app(workdir: str) -> Any:
+    os.environ.setdefault("EVENTS_DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'events.db')}")
+    # The per-IP limiter would reject almost all traffic from a single client
+    os.environ.setdefault("EVENTS_RATE_LIMIT_ENABLED", "false")
+    from events_service.app.main import app
+
+    return app
+
+
+def seed_events(data: SyntheticData, count: int, capacity: int) -> List[str]:
+    """Insert published events directly; the service has no create endpoint."""
+    from sqlmodel import Session
+
+    from events_service.app.db import engine, init_db
+    from events_service.app.models import Event
+
+    init_db()
+    specs = data.events(count, capacity)
+    with Session(engine) as session:
+        for spec in specs:
+            session.add(Event(**spec))
+        session.commit()
+    return [spec["slug"] for spec in specs]
+
+
+async def events_scenario(client: httpx.AsyncClient, rec: Recorder, data: SyntheticData, opts: Options) -> None:
+    """RSVP burst across a handful of events (with some resubmissions), then every
+    ticket is verified and checked in concurrently, with repeated scans at the door."""
+    slugs = os.environ.get("LOADTEST_EVENT_SLUGS", "").split(",") if os.environ.get("LOADTEST_EVENT_SLUGS") else []
+    if not slugs:
+        slugs = await asyncio.to_thread(seed_events, data, 5, opts.iterations + 10)
+    tokens: List[str] = []
+
+    async def rsvp(i: int) -> None:
+        slug = slugs[i % len(slugs)]
+        if i % 20 == 0:
+            await rec.call(client, "GET /api/events", "GET", "/api/events")
+            await rec.call(client, "GET /api/events/{slug}", "GET", f"/api/events/{slug}")
+        attendee = data.attendee(i)
+        r = await rec.call(client, "POST /api/events/{slug}/rsvp", "POST", f"/api/events/{slug}/rsvp", data=attendee)
+        body = _json(r)
+        if r.status_code == 200 and body and body.get("token"):
+            tokens.append(body["token"])
+        if i % 10 == 0:
+            # Double-submitted form
+            await rec.call(client, "POST /api/events/{slug}/rsvp (repeat)", "POST", f"/api/events/{slug}/rsvp", data=attendee)
+
+    async def check_in(i: int) -> None:
+        token = tokens[i % len(tokens)]
+        await rec.call(client, "GET /checkin/verify", "GET", "/checkin/verify", params={"token": token})
+        await rec.call(client, "POST /checkin", "POST", "/checkin", data={"token": token})
+
+    await run_flows(rsvp, opts.iterations, opts.concurrency)
+    if tokens:
+        # ~20% of tickets get scanned twice
+        await run_flows(check_in, len(tokens) + len(tokens) // 5, opts.concurrency)
+
+
+# --- moderation: report floods with escalation and triage traffic ---
+
+
+def load_moderation_app(workdir: str) -> Any:
+    os.environ.setdefault("AUDIT_LOG_PATH", os.path.join(workdir, "audit.log"))
+    from moderation_service.app.main import create_app
+
+    return create_app()
+
+
+async def moderation_scenario(client: httpx.AsyncClient, rec: Recorder, data: SyntheticData, opts: Options) -> None:
+    """Report flood skewed towards a few hot content ids, with moderators listing,
+    escalating, triaging and closing in between."""
+    pool = max(10, opts.iterations // 4)
+
+    async def flow(i: int) -> None:
+        r = await rec.call(client, "POST /api/reports", "POST", "/api/reports", json=data.report(pool))
+        body = _json(r)
+        report_id = body.get("id") if r.status_code == 201 and body else None
+        if report_id and i % 10 == 3:
+            await rec.call(
+                client, "POST /api/reports/{id}/escalate", "POST",
+                f"/api/reports/{report_id}/escalate", params={"sla_minutes": 30},
+            )
+        if report_id and i % 15 == 7:
+            await rec.call(
+                client, "PATCH /api/reports/{id}/status", "PATCH",
+                f"/api/reports/{report_id}/status", json={"status": "in_review"},
+            )
+        if report_id and i % 25 == 11:
+            await rec.call(client, "POST /api/reports/{id}/close", "POST", f"/api/reports/{report_id}/close")
+        if i % 20 == 0:
+            await rec.call(client, "GET /api/reports", "GET", "/api/reports", params={"status_filter": "queued"})
+            await rec.call(client, "GET /api/reports/overdue", "GET", "/api/reports/overdue")
+        if i % 50 == 0:
+            await rec.call(client, "GET /api/transparency/aggregates", "GET", "/api/transparency/aggregates")
+
+    await run_flows(flow, opts.iterations, opts.concurrency)
+
+
+class Service(NamedTuple):
+    load_app: Callable[[str], Any]
+    scenario: Callable[..., Any]
+    default_base_url: str
+
+
+SERVICES: Dict[str, Service] = {
+    "wallet": Service(load_wallet_app, wallet_scenario, "http://127.0.0.1:8000"),
+    "events": Service(load_events_app, events_scenario, "http://127.0.0.1:8001"),
+    "moderation": Service(load_moderation_app, moderation_scenario, "http://127.0.0.1:8002"),
+}
+
+
+def scratch_dir() -> str:
+    return tempfile.mkdtemp(prefix="loadtest-")
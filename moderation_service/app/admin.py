@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from starlette.templating import Jinja2Templates
 
 router = APIRouter(tags=["admin"])
 
-templates = Jinja2Templates(directory="/workspace/moderation_service/templates")
+
+@lru_cache(maxsize=1)
+def get_templates():
+    # jinja2 is only imported once the admin page is rendered
+    from starlette.templating import Jinja2Templates
+
+    return Jinja2Templates(directory="/workspace/moderation_service/templates")
 
 
 @router.get("/admin", response_class=HTMLResponse)
 async def admin_page(request: Request):
-    return templates.TemplateResponse("admin.html", {"request": request})
\ No newline at end of file
+    return get_templates().TemplateResponse("admin.html", {"request": request, "static_url": request.app.state.static_assets.url})
\ No newline at end of file
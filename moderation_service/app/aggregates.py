@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from .models import CLOSED_STATUSES
+from .sqlmodels import AppealRow, ReportRow, TransparencyCounterRow
+
+COUNTERS = ("reports_by_reason", "reports_by_status", "reports_by_escalation_level", "appeals_by_status")
+# Daily series entries; stored as the metrics daily_reports, daily_closed and daily_appeals keyed by ISO date
+DAILY = ("reports", "closed", "appeals")
+
+
+def _day(at: Any) -> str:
+    if isinstance(at, str):
+        at = datetime.fromisoformat(at)
+    return (at or datetime.now(timezone.utc)).date().isoformat()
+
+
+def _bump(counts: Dict[str, int], key: Any, delta: int = 1) -> None:
+    key = str(key)
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+class AggregateHooks(ABC):
+    """Store mutation hooks, each expressed as counter deltas through ``_bump(metric, key, delta)``."""
+
+    @abstractmethod
+    def _bump(self, metric: str, key: Any, delta: int = 1) -> None:
+        """Add ``delta`` to counter ``key`` of ``metric``."""
+
+    def report_submitted(self, reason: str, at: Optional[datetime] = None) -> None:
+        self._bump("reports_by_reason", reason)
+        self._bump("daily_reports", _day(at))
+
+    def report_opened(self, status: Any, escalation_level: int = 0) -> None:
+        self._bump("reports_by_status", getattr(status, "value", status))
+        self._bump("reports_by_escalation_level", escalation_level)
+
+    def report_status_changed(self, old: Any, new: Any) -> None:
+        old, new = getattr(old, "value", old), getattr(new, "value", new)
+        if old == new:
+            return
+        self._bump("reports_by_status", old, -1)
+        self._bump("reports_by_status", new)
+
+    def report_escalation_changed(self, old: int, new: int) -> None:
+        if old == new:
+            return
+        self._bump("reports_by_escalation_level", old, -1)
+        self._bump("reports_by_escalation_level", new)
+
+    def report_closed(self, at: Optional[datetime] = None) -> None:
+        self._bump("daily_closed", _day(at))
+
+    def appeal_created(self, status: str, at: Any = None) -> None:
+        self._bump("appeals_by_status", status)
+        self._bump("daily_appeals", _day(at))
+
+    def appeal_status_changed(self, old: str, new: str) -> None:
+        if old == new:
+            return
+        self._bump("appeals_by_status", old, -1)
+        self._bump("appeals_by_status", new)
+
+    def count_report(self, reason_counts: Dict[str, int], status: Any, escalation_level: int, created_at: Any, closed_at: Any) -> None:
+        """Backfill one existing report.
+
+        Submissions of a coalesced report are attributed to the day the
+        report was opened, since individual submission times are not kept.
+        """
+        for reason, n in reason_counts.items():
+            self._bump("reports_by_reason", reason, n)
+            self._bump("daily_reports", _day(created_at), n)
+        self.report_opened(status, escalation_level)
+        if closed_at is not None:
+            self.report_closed(closed_at)
+
+
+class TransparencyAggregates(AggregateHooks):
+    """Counters behind /api/transparency/aggregates for the in-memory stores, maintained on every mutation.
+
+    ``reports_by_reason`` and the daily ``reports`` series count individual
+    submissions (coalesced reports contribute every reporter), while
+    ``reports_by_status`` and ``reports_by_escalation_level`` count review
+    items. A snapshot is written to ``path`` every ``persist_interval``
+    seconds and loaded again on start; ``rebuild`` recomputes everything
+    from the stores. The SQL stores use ``SqlTransparencyAggregates``.
+    """
+
+    def __init__(self, path: Optional[str] = None, persist_interval: float = 60.0) -> None:
+        self._path = path
+        self._persist_interval = persist_interval
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._reset()
+
+    @classmethod
+    def from_env(cls) -> "TransparencyAggregates":
+        return cls(
+            path=os.environ.get("MOD_AGGREGATES_PATH") or None,
+            persist_interval=float(os.environ.get("MOD_AGGREGATES_PERSIST_SECONDS", "60")),
+        )
+
+    def _reset(self) -> None:
+        self.reports_by_reason: Dict[str, int] = {}
+        self.reports_by_status: Dict[str, int] = {}
+        self.reports_by_escalation_level: Dict[str, int] = {}
+        self.appeals_by_status: Dict[str, int] = {}
+        self.daily: Dict[str, Dict[str, int]] = {}
+        self._dirty = True
+
+    def _bump(self, metric: str, key: Any, delta: int = 1) -> None:
+        if metric.startswith("daily_"):
+            _bump(self.daily.setdefault(str(key), {}), metric[len("daily_"):], delta)
+        else:
+            _bump(getattr(self, metric), key, delta)
+        self._dirty = True
+
+    async def start(self) -> bool:
+        """Start periodic persistence; returns True if a saved snapshot was loaded."""
+        loaded = False
+        if self._path and os.path.exists(self._path):
+            try:
+                self._load(await asyncio.to_thread(self._read_snapshot))
+                loaded = True
+            except (OSError, ValueError):
+                loaded = False
+        if self._path and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+        return loaded
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.persist()
+
+    async def persist(self) -> None:
+        if not self._path or not self._dirty:
+            return
+        data = self.snapshot()
+        self._dirty = False
+        await asyncio.to_thread(self._write_snapshot, data)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._persist_interval)
+            try:
+                await self.persist()
+            except Exception:
+                self._dirty = True
+
+    # --- reads ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "reports_by_reason": dict(self.reports_by_reason),
+            "reports_by_status": dict(self.reports_by_status),
+            "reports_by_escalation_level": dict(self.reports_by_escalation_level),
+            "appeals_by_status": dict(self.appeals_by_status),
+            "daily": {day: dict(counts) for day, counts in self.daily.items()},
+        }
+
+    def series(self, days: int = 30, today: Optional[date] = None) -> list:
+        return _series(self.daily, days, today)
+
+    # --- backfill ---
+
+    def rebuild(self, reports: Iterable[Any], appeals: Iterable[Any]) -> None:
+        """Recompute all counters from full report and appeal listings."""
+        self._reset()
+        for report in reports:
+            counts = getattr(report, "reason_counts", None) or {report.reason: 1}
+            self.count_report(counts, report.status, report.escalation_level, report.created_at, report.closed_at)
+        for appeal in appeals:
+            self.appeal_created(appeal.status, getattr(appeal, "created_at", None))
+
+    def _load(self, data: Dict[str, Any]) -> None:
+        self._reset()
+        self.reports_by_reason.update(data.get("reports_by_reason", {}))
+        self.reports_by_status.update(data.get("reports_by_status", {}))
+        self.reports_by_escalation_level.update(data.get("reports_by_escalation_level", {}))
+        self.appeals_by_status.update(data.get("appeals_by_status", {}))
+        self.daily.update({day: dict(counts) for day, counts in data.get("daily", {}).items()})
+        self._dirty = False
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        with open(self._path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_snapshot(self, data: Dict[str, Any]) -> None:
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self._path)
+
+
+def _series(daily: Dict[str, Dict[str, int]], days: int, today: Optional[date]) -> list:
+    today = today or datetime.now(timezone.utc).date()
+    out = []
+    for i in range(days - 1, -1, -1):
+        day = (today - timedelta(days=i)).isoformat()
+        out.append({"date": day, **daily.get(day, {})})
+    return out
+
+
+class AggregateChanges(AggregateHooks):
+    """Counter deltas of one SQL transaction; ``write(session)`` adds them to that transaction."""
+
+    def __init__(self) -> None:
+        self.deltas: Dict[Tuple[str, str], int] = {}
+
+    def _bump(self, metric: str, key: Any, delta: int = 1) -> None:
+        k = (metric, str(key))
+        self.deltas[k] = self.deltas.get(k, 0) + delta
+
+    def write(self, session: Session) -> None:
+        # Sorted so concurrent transactions lock counter rows in the same order
+        rows = [{"metric": m, "key": k, "value": v} for (m, k), v in sorted(self.deltas.items()) if v]
+        if rows:
+            session.execute(_upsert(session.get_bind().dialect.name, rows, add=True))
+
+
+def _upsert(dialect: str, rows: List[Dict[str, Any]], add: bool):
+    table = TransparencyCounterRow.__table__
+    stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table).values(rows)
+    value = table.c.value + stmt.excluded.value if add else stmt.excluded.value
+    return stmt.on_conflict_do_update(index_elements=[table.c.metric, table.c.key], set_={"value": value})
+
+
+class SqlTransparencyAggregates:
+    """Transparency counters kept in the ``transparencycounter`` table next to the SQL stores.
+
+    The SQL stores record each mutation's deltas with ``changes()`` and
+    write them in the transaction that changes the rows, so every worker
+    shares one set of counters and a rolled-back change is never counted.
+    Reads query the table. ``rebuild`` recomputes the counters from the
+    report and appeal tables while holding the counter table's lock.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+
+    @staticmethod
+    def changes() -> AggregateChanges:
+        return AggregateChanges()
+
+    async def start(self) -> bool:
+        """True when counters exist; an empty table (first start on existing data) needs ``rebuild``."""
+        return await asyncio.to_thread(self._has_counters)
+
+    def _has_counters(self) -> bool:
+        with Session(self.engine) as session:
+            return session.exec(select(func.count()).select_from(TransparencyCounterRow)).one() > 0
+
+    async def stop(self) -> None:
+        pass
+
+    async def persist(self) -> None:
+        pass
+
+    # --- reads; blocking, so async callers run them in a worker thread ---
+
+    def _rows(self, *metrics: str, since: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        t = TransparencyCounterRow
+        stmt = select(t.metric, t.key, t.value).where(t.metric.in_(metrics), t.value != 0)
+        if since is not None:
+            stmt = stmt.where(t.key >= since)
+        with Session(self.engine) as session:
+            return list(session.exec(stmt).all())
+
+    def snapshot(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {metric: {} for metric in COUNTERS}
+        daily: Dict[str, Dict[str, int]] = {}
+        for metric, key, value in self._rows(*COUNTERS, *("daily_" + d for d in DAILY)):
+            if metric.startswith("daily_"):
+                daily.setdefault(key, {})[metric[len("daily_"):]] = value
+            else:
+                data[metric][key] = value
+        data["daily"] = daily
+        return data
+
+    def series(self, days: int = 30, today: Optional[date] = None) -> list:
+        today = today or datetime.now(timezone.utc).date()
+        daily: Dict[str, Dict[str, int]] = {}
+        since = (today - timedelta(days=days - 1)).isoformat()
+        for metric, key, value in self._rows(*("daily_" + d for d in DAILY), since=since):
+            daily.setdefault(key, {})[metric[len("daily_"):]] = value
+        return _series(daily, days, today)
+
+    # --- backfill ---
+
+    def rebuild(self) -> None:
+        with Session(self.engine) as session:
+            dialect = session.get_bind().dialect.name
+            # Writers add their deltas under the same lock, so none lands between the scan and the write
+            if dialect == "postgresql":
+                session.execute(text(f"LOCK TABLE {TransparencyCounterRow.__tablename__} IN EXCLUSIVE MODE"))
+            session.execute(delete(TransparencyCounterRow))
+            changes = AggregateChanges()
+            for row in session.exec(select(ReportRow)):
+                counts = json.loads(row.reason_counts_json or "{}") or {row.reason: 1}
+                closed_at = row.closed_at or (row.updated_at if row.status in {s.value for s in CLOSED_STATUSES} else None)
+                changes.count_report(counts, row.status, row.escalation_level or 0, row.created_at, closed_at)
+            for row in session.exec(select(AppealRow)):
+                changes.appeal_created(row.status, row.created_at)
+            rows = [{"metric": m, "key": k, "value": v} for (m, k), v in sorted(changes.deltas.items()) if v]
+            if rows:
+                session.execute(_upsert(dialect, rows, add=False))
+            session.commit()
@@ -1,28 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import Response
 
-from .models import Report, ReportCreate, ReportUpdateStatus, ReportStatus
+from shared.serialization import rows_response
 
+from .aggregates import SqlTransparencyAggregates
+from .models import CLOSED_STATUSES, Appeal, AppealCreate, AppealUpdateStatus, Report, ReportCreate, ReportUpdateStatus, ReportStatus
 
-# Appeals MVP
-class AppealCreate(BaseModel):
-    report_id: str
-    user_id: str
-    reason: str
-
-
-class Appeal(BaseModel):
-    id: str
-    report_id: str
-    user_id: str
-    reason: str
-    status: str
-    created_at: str
-
-appeals_store: dict[str, Appeal] = {}
 
 router = APIRouter(prefix="/api", tags=["moderation"])
 
@@ -35,6 +24,38 @@ def get_queue(request: Request):
     return request.app.state.abuse_queue
 
 
+def get_scorer(request: Request):
+    return request.app.state.scorer
+
+
+def get_sla(request: Request):
+    return request.app.state.sla
+
+
+def get_appeals(request: Request):
+    return request.app.state.appeals
+
+
+def get_aggregates(request: Request):
+    return request.app.state.aggregates
+
+
+async def rebuild_aggregates(app) -> None:
+    """Backfill transparency counters from a full scan of reports and appeals."""
+    if isinstance(app.state.aggregates, SqlTransparencyAggregates):
+        await asyncio.to_thread(app.state.aggregates.rebuild)
+        return
+    reports = await app.state.store.list_reports()
+    appeals = await app.state.appeals.list_appeals(limit=None)
+    app.state.aggregates.rebuild(reports, appeals)
+
+
+def _record_outcome_on_close(request: Request, previous: ReportStatus, updated: Report) -> None:
+    """Counts a report towards its reporter's credibility only when it moves from open to closed."""
+    if previous not in CLOSED_STATUSES and updated.status in CLOSED_STATUSES:
+        get_scorer(request).record_outcome(updated.reporter_id, updated.status)
+
+
 @router.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
@@ -44,15 +65,27 @@ async def health() -> dict:
 async def create_report(request: Request, payload: ReportCreate) -> Report:
     store = get_store(request)
     queue = get_queue(request)
-    report = await store.create_report(payload)
-    await queue.enqueue(report.id)
+    # Repeat reports of the same content are merged into the open review item
+    report, created = await store.submit_report(payload)
+    priority = get_scorer(request).score(payload)
+    if created:
+        await queue.enqueue(report.id, priority=priority)
+    else:
+        # Each merged submission raises the open report's place in the queue
+        queue.bump(report.id, priority)
     return report
 
 
 @router.get("/reports", response_model=List[Report])
-async def list_reports(request: Request, status_filter: Optional[ReportStatus] = None) -> List[Report]:
+async def list_reports(request: Request, status_filter: Optional[ReportStatus] = None) -> Response:
+    store = get_store(request)
+    return rows_response(await store.list_reports(status=status_filter), Report)
+
+
+@router.get("/reports/overdue", response_model=List[Report])
+async def list_overdue_reports(request: Request, limit: int = 100) -> Response:
     store = get_store(request)
-    return await store.list_reports(status=status_filter)
+    return rows_response(await store.get_reports(get_sla(request).overdue(limit=limit)), Report)
 
 
 @router.get("/reports/{report_id}", response_model=Report)
@@ -64,54 +97,88 @@ async def get_report(request: Request, report_id: str) -> Report:
     return report
 
 
+@router.get("/reports/{report_id}/audit")
+async def get_report_audit(
+    request: Request, report_id: str, since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> dict:
+    entries = await request.app.state.audit.query(report_id, since=since, until=until)
+    return {"report_id": report_id, "entries": entries}
+
+
 @router.patch("/reports/{report_id}/status", response_model=Report)
 async def update_report_status(request: Request, report_id: str, payload: ReportUpdateStatus) -> Report:
     store = get_store(request)
-    updated = await store.update_status(report_id, payload.status, admin_note=payload.admin_note)
-    if updated is None:
+    result = await store.update_status(report_id, payload.status, admin_note=payload.admin_note)
+    if result is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    updated, previous = result
+    get_sla(request).track(updated)
+    _record_outcome_on_close(request, previous, updated)
     return updated
 
 
 @router.post("/appeals", response_model=Appeal, status_code=status.HTTP_201_CREATED)
-async def create_appeal(payload: AppealCreate) -> Appeal:
-    import datetime, uuid
-    a = Appeal(
-        id=str(uuid.uuid4()),
-        report_id=payload.report_id,
-        user_id=payload.user_id,
-        reason=payload.reason,
-        status="new",
-        created_at=datetime.datetime.utcnow().isoformat(),
-    )
-    appeals_store[a.id] = a
-    return a
+async def create_appeal(request: Request, payload: AppealCreate) -> Appeal:
+    return await get_appeals(request).create_appeal(payload)
 
 
 @router.get("/appeals", response_model=List[Appeal])
-async def list_appeals(status_filter: Optional[str] = None) -> List[Appeal]:
-    items = list(appeals_store.values())
-    if status_filter:
-        items = [a for a in items if a.status == status_filter]
-    return items
+async def list_appeals(
+    request: Request,
+    status_filter: Optional[str] = None,
+    report_id: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+) -> Response:
+    appeals = await get_appeals(request).list_appeals(
+        status=status_filter, report_id=report_id, limit=limit, offset=offset
+    )
+    return rows_response(appeals, Appeal)
+
+
+@router.get("/appeals/{appeal_id}", response_model=Appeal)
+async def get_appeal(request: Request, appeal_id: str) -> Appeal:
+    appeal = await get_appeals(request).get_appeal(appeal_id)
+    if appeal is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appeal not found")
+    return appeal
+
+
+@router.patch("/appeals/{appeal_id}/status", response_model=Appeal)
+async def update_appeal_status(request: Request, appeal_id: str, payload: AppealUpdateStatus) -> Appeal:
+    updated = await get_appeals(request).update_status(appeal_id, payload.status)
+    if updated is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appeal not found")
+    return updated
+
+
+def _read_aggregates(aggregates, days: int):
+    return aggregates.snapshot(), aggregates.series(days)
 
 
 @router.get("/transparency/aggregates")
-async def transparency_aggregates() -> dict:
-    # Minimal aggregates from in-memory report store if available
-    counts: dict[str, int] = {}
-    try:
-        # type: ignore[attr-defined]
-        for r in await get_store.__wrapped__():  # not actually works; fallback below
-            counts[r.reason] = counts.get(r.reason, 0) + 1
-    except Exception:
-        pass
-    # Fallback to appeals counts
-    appeals_total = len(appeals_store)
-    by_status: dict[str, int] = {}
-    for a in appeals_store.values():
-        by_status[a.status] = by_status.get(a.status, 0) + 1
-    return {"ok": True, "appeals_total": appeals_total, "appeals_by_status": by_status, "reports_by_reason": counts}
+async def transparency_aggregates(request: Request, days: int = 30) -> dict:
+    aggregates = get_aggregates(request)
+    if isinstance(aggregates, SqlTransparencyAggregates):
+        counts, daily = await asyncio.to_thread(_read_aggregates, aggregates, days)
+    else:
+        counts, daily = _read_aggregates(aggregates, days)
+    return {
+        "ok": True,
+        "appeals_total": sum(counts["appeals_by_status"].values()),
+        "appeals_by_status": counts["appeals_by_status"],
+        "reports_by_reason": counts["reports_by_reason"],
+        "reports_by_status": counts["reports_by_status"],
+        "reports_by_escalation_level": counts["reports_by_escalation_level"],
+        "daily": daily,
+    }
+
+
+@router.post("/transparency/aggregates/rebuild")
+async def rebuild_transparency_aggregates(request: Request) -> dict:
+    await rebuild_aggregates(request.app)
+    await get_aggregates(request).persist()
+    return await transparency_aggregates(request)
 
 
 @router.post("/reports/{report_id}/escalate", response_model=Report)
@@ -120,6 +187,7 @@ async def escalate_report(request: Request, report_id: str, level_delta: int = 1
     updated = await store.escalate(report_id, level_delta=level_delta, sla_minutes=sla_minutes, note=note)
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    get_sla(request).track(updated)
     try:
         request.app.state.moderation_escalations_total.inc()
     except Exception:
@@ -133,13 +201,17 @@ async def deescalate_report(request: Request, report_id: str, note: Optional[str
     updated = await store.deescalate(report_id, note=note)
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    get_sla(request).track(updated)
     return updated
 
 
 @router.post("/reports/{report_id}/close", response_model=Report)
 async def close_report(request: Request, report_id: str, note: Optional[str] = None) -> Report:
     store = get_store(request)
-    updated = await store.close(report_id, note=note)
-    if updated is None:
+    result = await store.close(report_id, note=note)
+    if result is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    updated, previous = result
+    get_sla(request).track(updated)
+    _record_outcome_on_close(request, previous, updated)
     return updated
\ No newline at end of file
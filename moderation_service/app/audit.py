@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.logs import log_exception
+
+# (segment, time, offset, length); segment None is the active file
+IndexRef = Tuple[Optional[int], str, int, int]
+
+
+class AuditLogWriter:
+    """Append-only audit log with a background writer task.
+
+    Callers enqueue entries with ``record`` (never blocks, never touches disk);
+    a single task drains the buffer in batches, writes them off the event loop
+    and fsyncs at most once per ``fsync_interval`` seconds. When the active
+    segment grows past ``max_segment_bytes`` it is rotated to
+    ``<path>.<n>.gz``. Every segment has a ``.idx`` sidecar of
+    ``(report_id, time, offset, length)`` records so that the entries for a
+    single report can be read back without scanning the whole log.
+
+    Only the active file's index and those of the ``index_segments`` most
+    recently used rotated segments are kept in memory; older sidecars are
+    read back on demand, and only for segments whose time range overlaps
+    the query. A batch that fails to write is logged and put back in front
+    of the buffer for the next flush.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fsync_interval: float = 1.0,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        batch_size: int = 500,
+        index_segments: int = 8,
+    ) -> None:
+        self._path = path
+        self._fsync_interval = fsync_interval
+        self._max_segment_bytes = max_segment_bytes
+        self._batch_size = batch_size
+        self._index_segments = index_segments
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._io_lock = asyncio.Lock()
+        # report_id -> refs into the active file
+        self._index: Dict[str, List[IndexRef]] = {}
+        # segment -> its report_id -> refs, least recently used first
+        self._segment_indexes: "OrderedDict[int, Dict[str, List[IndexRef]]]" = OrderedDict()
+        # segment -> (first, last) entry time
+        self._segment_ranges: Dict[int, Tuple[str, str]] = {}
+        self._index_loaded = False
+        self._segment_seq = 0
+        self._active_size = 0
+        self._last_fsync = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AuditLogWriter":
+        return cls(
+            path=os.environ.get("AUDIT_LOG_PATH", "/workspace/moderation_service/audit.log"),
+            fsync_interval=float(os.environ.get("AUDIT_FSYNC_INTERVAL_SECONDS", "1.0")),
+            max_segment_bytes=int(os.environ.get("AUDIT_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024))),
+            batch_size=int(os.environ.get("AUDIT_BATCH_SIZE", "500")),
+            index_segments=int(os.environ.get("AUDIT_INDEX_SEGMENTS", "8")),
+        )
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Drain whatever was recorded after the last batch
+        await self.flush(fsync=True)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        self._pending.append(entry)
+        if len(self._pending) >= self._batch_size:
+            self._wakeup.set()
+        if self._task is None:
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                pass
+
+    async def flush(self, fsync: bool = False) -> None:
+        async with self._io_lock:
+            batch, self._pending = self._pending, []
+            if batch or fsync:
+                try:
+                    await asyncio.to_thread(self._write_batch, batch, fsync)
+                except Exception:
+                    # Retried ahead of anything recorded meanwhile; entries are indexed only once written
+                    self._pending[:0] = batch
+                    raise
+
+    async def query(
+        self,
+        report_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return audit entries for ``report_id`` within ``[since, until]``, oldest first."""
+        await self.flush()
+        lo = _utc_iso(since) if since else None
+        hi = _utc_iso(until) if until else None
+        async with self._io_lock:
+            return await asyncio.to_thread(self._query, report_id, lo, hi)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._fsync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            due = time.monotonic() - self._last_fsync >= self._fsync_interval
+            if self._pending or due:
+                try:
+                    await self.flush(fsync=due)
+                except Exception as exc:
+                    # Keep the writer alive; the entries stay buffered for the next attempt
+                    log_exception("audit_flush_failed", exc, pending=len(self._pending))
+
+    # --- blocking helpers, always run in a worker thread ---
+
+    def _segment_path(self, segment: int) -> str:
+        return f"{self._path}.{segment:06d}.gz"
+
+    def _load_index(self) -> None:
+        self._segment_indexes.clear()
+        self._segment_ranges.clear()
+        directory = os.path.dirname(self._path) or "."
+        base = os.path.basename(self._path)
+        segments: List[int] = []
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.startswith(base + ".") and name.endswith(".idx") and name != base + ".idx":
+                    try:
+                        segments.append(int(name[len(base) + 1 : -len(".idx")]))
+                    except ValueError:
+                        continue
+        segments.sort()
+        for segment in segments:
+            index = self._load_sidecar(segment)
+            if index:
+                self._segment_ranges[segment] = _time_range(index)
+                self._cache_segment(segment, index)
+        self._segment_seq = max(segments, default=0)
+        self._index = self._load_sidecar(None)
+        self._active_size = os.path.getsize(self._path) if os.path.exists(self._path) else 0
+        self._index_loaded = True
+
+    def _load_sidecar(self, segment: Optional[int]) -> Dict[str, List[IndexRef]]:
+        idx_path = self._path + ".idx" if segment is None else f"{self._path}.{segment:06d}.idx"
+        index: Dict[str, List[IndexRef]] = {}
+        if not os.path.exists(idx_path):
+            return index
+        with open(idx_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    report_id, ts, offset, length = json.loads(line)
+                except ValueError:
+                    continue
+                index.setdefault(report_id, []).append((segment, ts, offset, length))
+        return index
+
+    def _cache_segment(self, segment: int, index: Dict[str, List[IndexRef]]) -> None:
+        self._segment_indexes[segment] = index
+        self._segment_indexes.move_to_end(segment)
+        while len(self._segment_indexes) > self._index_segments:
+            self._segment_indexes.popitem(last=False)
+
+    def _segment_index(self, segment: int) -> Dict[str, List[IndexRef]]:
+        index = self._segment_indexes.get(segment)
+        if index is None:
+            index = self._load_sidecar(segment)
+        self._cache_segment(segment, index)
+        return index
+
+    def _query(self, report_id: str, lo: Optional[str], hi: Optional[str]) -> List[Dict[str, Any]]:
+        if not self._index_loaded:
+            self._load_index()
+        refs = list(self._index.get(report_id, []))
+        for segment, (first, last) in self._segment_ranges.items():
+            if (lo is None or last >= lo) and (hi is None or first <= hi):
+                refs.extend(self._segment_index(segment).get(report_id, []))
+        refs = [ref for ref in refs if (lo is None or ref[1] >= lo) and (hi is None or ref[1] <= hi)]
+        return self._read_refs(refs) if refs else []
+
+    def _write_batch(self, batch: List[Dict[str, Any]], fsync: bool) -> None:
+        if not self._index_loaded:
+            self._load_index()
+        if batch:
+            lines = [(json.dumps(entry) + "\n").encode("utf-8") for entry in batch]
+            with open(self._path, "ab") as log, open(self._path + ".idx", "a", encoding="utf-8") as idx:
+                # From the real end of the file: a failed earlier attempt may have left unindexed bytes
+                offset = log.seek(0, os.SEEK_END)
+                refs = []
+                for entry, line in zip(batch, lines):
+                    report_id = entry.get("report_id")
+                    if report_id:
+                        refs.append((report_id, (None, entry.get("time", ""), offset, len(line))))
+                    offset += len(line)
+                log.write(b"".join(lines))
+                idx.write("".join(json.dumps([report_id, *ref[1:]]) + "\n" for report_id, ref in refs))
+                if fsync:
+                    log.flush()
+                    os.fsync(log.fileno())
+            for report_id, ref in refs:
+                self._index.setdefault(report_id, []).append(ref)
+            self._active_size = offset
+        elif fsync and os.path.exists(self._path):
+            with open(self._path, "ab") as log:
+                os.fsync(log.fileno())
+        if fsync:
+            self._last_fsync = time.monotonic()
+        if self._active_size >= self._max_segment_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._segment_seq += 1
+        segment = self._segment_seq
+        with open(self._path, "rb") as src, gzip.open(self._segment_path(segment), "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(self._path + ".idx", f"{self._path}.{segment:06d}.idx")
+        os.remove(self._path)
+        self._active_size = 0
+        index = {report_id: [(segment,) + ref[1:] for ref in refs] for report_id, refs in self._index.items()}
+        self._index = {}
+        if index:
+            self._segment_ranges[segment] = _time_range(index)
+            self._cache_segment(segment, index)
+
+    def _read_refs(self, refs: List[IndexRef]) -> List[Dict[str, Any]]:
+        by_segment: Dict[Optional[int], List[Tuple[int, int]]] = {}
+        for segment, _ts, offset, length in refs:
+            by_segment.setdefault(segment, []).append((offset, length))
+        entries: List[Dict[str, Any]] = []
+        for segment, spans in by_segment.items():
+            if segment is None:
+                opener = open(self._path, "rb")
+            else:
+                opener = gzip.open(self._segment_path(segment), "rb")
+            with opener as f:
+                for offset, length in sorted(spans):
+                    f.seek(offset)
+                    entries.append(json.loads(f.read(length)))
+        entries.sort(key=lambda e: e.get("time", ""))
+        return entries
+
+
+def _time_range(index: Dict[str, List[IndexRef]]) -> Tuple[str, str]:
+    stamps = [ref[1] for refs in index.values() for ref in refs]
+    return min(stamps), max(stamps)
+
+
+def _utc_iso(value: datetime) -> str:
+    # Entries are stamped with aware UTC isoformat strings, which sort chronologically
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+from datetime import datetime
 from typing import List, Dict, Any
 
 from ..models import Report
@@ -33,3 +34,17 @@ class GroupChatClient:
         print(f"[GroupChat] Queued report {report.id} for content {report.content_id}: {report.reason}")
         self._sent_messages.append(payload)
 
+
+
+    async def send_sla_breach(self, report: Report, deadline: datetime) -> None:
+        await asyncio.sleep(0)
+        payload = {
+            "type": "sla_breach",
+            "report_id": report.id,
+            "content_id": report.content_id,
+            "escalation_level": report.escalation_level,
+            "sla_minutes": report.sla_minutes,
+            "deadline": deadline.isoformat(),
+        }
+        print(f"[GroupChat] SLA breached for report {report.id} (level {report.escalation_level}, due {deadline.isoformat()})")
+        self._sent_messages.append(payload)
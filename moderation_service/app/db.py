@@ -1,17 +1,70 @@
 from __future__ import annotations
 
+import json
 import os
 from typing import Iterator
+from sqlalchemy import inspect, text
 from sqlmodel import SQLModel, Session, create_engine
 
+from shared.sqlstats import instrument_engine
+
+from .models import CLOSED_STATUSES
+
 
 MOD_DB_URL = os.environ.get("MOD_DB_URL")
 engine = create_engine(MOD_DB_URL or "sqlite:///./moderation.db", echo=False)
+instrument_engine(engine)
+
+
+# Columns added to ReportRow after the table first shipped: name -> DDL type and default
+_REPORT_COLUMNS = {
+    "open_content_key": "VARCHAR",
+    "reporter_count": "INTEGER NOT NULL DEFAULT 1",
+    "reason_counts_json": "VARCHAR NOT NULL DEFAULT '{}'",
+}
 
 
 def init_db() -> None:
-    from .sqlmodels import ReportRow  # noqa: F401
+    from .sqlmodels import AppealRow, ReportRow, TransparencyCounterRow  # noqa: F401
     SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist; add the columns and indexes introduced later
+    _upgrade_report_table(ReportRow.__table__)
+
+
+def _upgrade_report_table(table) -> None:
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    missing = [name for name in _REPORT_COLUMNS if name not in existing]
+    closed = ", ".join(f"'{status.value}'" for status in CLOSED_STATUSES)
+    with engine.begin() as conn:
+        for name in missing:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {_REPORT_COLUMNS[name]}"))
+        if "open_content_key" in missing:
+            # Reports that were open keep coalescing: the newest open report per content takes the key
+            conn.execute(
+                text(
+                    f"""
+                    UPDATE {table.name} SET open_content_key = content_id
+                    WHERE status NOT IN ({closed})
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {table.name} AS newer
+                        WHERE newer.content_id = {table.name}.content_id
+                        AND newer.status NOT IN ({closed})
+                        AND (newer.created_at > {table.name}.created_at
+                             OR (newer.created_at = {table.name}.created_at AND newer.id > {table.name}.id))
+                    )
+                    """
+                )
+            )
+        if "reason_counts_json" in missing:
+            # Each existing row stood for one submission with its own reason
+            rows = conn.execute(text(f"SELECT id, reason FROM {table.name}")).all()
+            if rows:
+                conn.execute(
+                    text(f"UPDATE {table.name} SET reason_counts_json = :counts WHERE id = :id"),
+                    [{"id": row.id, "counts": json.dumps({row.reason: 1})} for row in rows],
+                )
+    for index in table.indexes:
+        index.create(engine, checkfirst=True)
 
 
 def get_session() -> Iterator[Session]:
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
 import asyncio
+import os
 
 from fastapi import FastAPI, Request
 from fastapi.responses import Response
-from fastapi.staticfiles import StaticFiles
 
-from .api import router as api_router
+from shared.compression import install_compression
+from shared.idempotency import install_idempotency
+from shared.profiling import RequestProfiler, install_profiling
+from shared.serialization import FastJSONResponse
+from shared.sqlstats import begin_request, end_request
+from shared.staticassets import StaticAssets
+
+from .aggregates import SqlTransparencyAggregates, TransparencyAggregates
+from .api import rebuild_aggregates, router as api_router
 from .admin import router as admin_router
+from .audit import AuditLogWriter
 from .clients.group_chat import GroupChatClient
 from .queue import AbuseQueueProcessor
-from .storage import InMemoryReportStore, PostgresReportStore
-from .db import init_db
+from .scoring import ReportScorer
+from .sla import SlaScheduler
+from .storage import InMemoryAppealStore, InMemoryReportStore, PostgresAppealStore, PostgresReportStore
+from .db import engine, init_db
 from prometheus_client import Counter, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
 import time
 import json
@@ -19,24 +30,29 @@ import uuid
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Moderation Service", version="0.1.0")
+    app = FastAPI(title="Moderation Service", version="0.1.0", default_response_class=FastJSONResponse)
 
     # Core state
     use_db = bool(os.environ.get("MOD_DB_URL"))
+    app.state.audit = AuditLogWriter.from_env()
     if use_db:
         init_db()
-        app.state.store = PostgresReportStore()
+        app.state.aggregates = SqlTransparencyAggregates(engine)
+        app.state.store = PostgresReportStore(audit=app.state.audit, aggregates=app.state.aggregates)
+        app.state.appeals = PostgresAppealStore(aggregates=app.state.aggregates)
     else:
-        app.state.store = InMemoryReportStore()
+        app.state.aggregates = TransparencyAggregates.from_env()
+        app.state.store = InMemoryReportStore(audit=app.state.audit, aggregates=app.state.aggregates)
+        app.state.appeals = InMemoryAppealStore(aggregates=app.state.aggregates)
     app.state.group_chat = GroupChatClient()
-    app.state.abuse_queue = AbuseQueueProcessor(app.state.store, app.state.group_chat)
+    app.state.scorer = ReportScorer.from_env()
+    app.state.abuse_queue = AbuseQueueProcessor(
+        app.state.store, app.state.group_chat, aging_per_minute=float(os.environ.get("MOD_QUEUE_AGING_PER_MINUTE", "10"))
+    )
 
     # Static files for admin stub
-    app.mount(
-        "/static",
-        StaticFiles(directory="/workspace/moderation_service/static"),
-        name="static",
-    )
+    app.state.static_assets = StaticAssets("/workspace/moderation_service/static")
+    app.mount("/static", app.state.static_assets, name="static")
 
     registry: CollectorRegistry = CollectorRegistry()
     http_requests_total = Counter(
@@ -52,19 +68,50 @@ def create_app() -> FastAPI:
         buckets=(5,10,25,50,100,250,500,1000,2500,5000),
         registry=registry,
     )
+    db_queries_per_request = Histogram(
+        "db_queries_per_request",
+        "SQL statements issued per HTTP request",
+        labelnames=("service", "method", "route"),
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+        registry=registry,
+    )
+    db_time_per_request_ms = Histogram(
+        "db_time_per_request_ms",
+        "Time spent in SQL per HTTP request in ms",
+        labelnames=("service", "method", "route"),
+        buckets=(1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000),
+        registry=registry,
+    )
+    db_n_plus_one_total = Counter(
+        "db_n_plus_one_total",
+        "Requests that repeated one SQL statement past the N+1 threshold",
+        labelnames=("service", "method", "route"),
+        registry=registry,
+    )
     moderation_escalations_total = Counter("moderation_escalations_total", "Total escalations", registry=registry)
+    moderation_sla_breaches_total = Counter("moderation_sla_breaches_total", "Escalated reports past their SLA deadline", registry=registry)
+    app.state.sla = SlaScheduler(app.state.store, app.state.group_chat, breaches_total=moderation_sla_breaches_total)
+
+    # Retried report submissions with the same Idempotency-Key get the first response back
+    install_idempotency(app, engine, [("POST", "/api/reports")], registry=registry)
 
     @app.middleware("http")
     async def metrics_and_logs(request: Request, call_next):
         service = "moderation_py"
         req_id = request.headers.get("x-request-id") or str(uuid.uuid4())
         start = time.perf_counter()
-        response = await call_next(request)
+        stats, stats_token = begin_request()
+        try:
+            response = await call_next(request)
+        finally:
+            end_request(stats_token)
         duration_ms = (time.perf_counter() - start) * 1000.0
         route = request.url.path
         status = str(response.status_code)
         http_requests_total.labels(service, request.method, route, status).inc()
         http_request_duration_ms.labels(service, request.method, route, status).observe(duration_ms)
+        db_queries_per_request.labels(service, request.method, route).observe(stats.count)
+        db_time_per_request_ms.labels(service, request.method, route).observe(stats.time_ms)
         response.headers["x-request-id"] = req_id
         print(json.dumps({
             "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
@@ -75,22 +122,52 @@ def create_app() -> FastAPI:
             "method": request.method,
             "status": int(status),
             "latency_ms": round(duration_ms, 3),
+            "db_queries": stats.count,
+            "db_time_ms": round(stats.time_ms, 3),
         }))
+        repeated = stats.repeated()
+        if repeated:
+            db_n_plus_one_total.labels(service, request.method, route).inc()
+            print(json.dumps({
+                "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "level": "warning",
+                "service": service,
+                "request_id": req_id,
+                "msg": "n_plus_one",
+                "route": route,
+                "method": request.method,
+                "statements": [{"sql": sql, "count": n} for sql, n in repeated],
+            }))
         return response
 
     @app.get("/metrics")
     def metrics() -> Response:
         return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
 
+    # Request profiling is only wired in when PROFILE_DIR and a trigger are configured
+    profiler = RequestProfiler.from_env()
+    if profiler is not None:
+        install_profiling(app, profiler)
+
+    # Outermost, so every response (including profiled ones) is compressed once
+    install_compression(app, registry=registry)
+
     app.state.moderation_escalations_total = moderation_escalations_total
 
     @app.on_event("startup")
     async def on_startup() -> None:
+        await app.state.audit.start()
+        if not await app.state.aggregates.start():
+            await rebuild_aggregates(app)
         await app.state.abuse_queue.start()
+        await app.state.sla.start()
 
     @app.on_event("shutdown")
     async def on_shutdown() -> None:
+        await app.state.sla.stop()
         await app.state.abuse_queue.stop()
+        await app.state.audit.stop()
+        await app.state.aggregates.stop()
 
     app.include_router(api_router)
     app.include_router(admin_router)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
@@ -16,6 +16,9 @@ class ReportStatus(str, Enum):
     DISMISSED = "dismissed"
 
 
+CLOSED_STATUSES = (ReportStatus.ACTION_TAKEN, ReportStatus.DISMISSED)
+
+
 class ReportCreate(BaseModel):
     content_id: str = Field(..., description="Unique identifier for the content under review")
     content_text: str = Field(..., description="Snapshot of the content text at report time")
@@ -36,6 +39,8 @@ class Report(BaseModel):
     reporter_id: Optional[str] = None
     status: ReportStatus = Field(default=ReportStatus.PENDING)
     admin_notes: List[str] = Field(default_factory=list)
+    reporter_count: int = Field(default=1, description="Number of submissions coalesced into this report")
+    reason_counts: Dict[str, int] = Field(default_factory=dict, description="Submissions per reason")
     escalation_level: int = Field(default=0)
     sla_minutes: Optional[int] = None
     escalated_at: Optional[datetime] = None
@@ -45,4 +50,24 @@ class Report(BaseModel):
 
     def add_admin_note(self, note: str) -> None:
         self.admin_notes.append(note)
-        self.updated_at = datetime.now(timezone.utc)
\ No newline at end of file
+        self.updated_at = datetime.now(timezone.utc)
+
+
+class AppealCreate(BaseModel):
+    report_id: str
+    user_id: str
+    reason: str
+
+
+class AppealUpdateStatus(BaseModel):
+    status: str
+
+
+class Appeal(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid4()))
+    report_id: str
+    user_id: str
+    reason: str
+    status: str = "new"
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
\ No newline at end of file
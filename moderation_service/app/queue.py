@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Optional
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
 
 from .models import ReportStatus
 from .storage import InMemoryReportStore
@@ -9,12 +12,28 @@ from .clients.group_chat import GroupChatClient
 
 
 class AbuseQueueProcessor:
-    """Background processor for abuse reports."""
+    """Background processor for abuse reports.
 
-    def __init__(self, store: InMemoryReportStore, group_chat: GroupChatClient) -> None:
+    Reports are handed to the group chat highest priority first. Waiting
+    reports age by ``aging_per_minute`` priority points per minute queued,
+    so low-priority items still drain behind a steady stream of urgent
+    ones. All items age at the same rate, so ordering by ``priority +
+    rate * waited`` is ordering by ``priority - rate * enqueued_at``: the
+    heap key is fixed at enqueue time and never needs re-sorting. ``bump``
+    pushes a new entry for a waiting report instead of re-keying the old
+    one; entries that no longer match ``_keys`` are skipped when popped.
+    """
+
+    def __init__(self, store: InMemoryReportStore, group_chat: GroupChatClient, aging_per_minute: float = 10.0) -> None:
         self._store = store
         self._group_chat = group_chat
-        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._aging_per_second = aging_per_minute / 60.0
+        # (aging-adjusted key, arrival order, report_id); the smallest key is the most urgent
+        self._heap: List[Tuple[float, int, str]] = []
+        # report_id -> current heap key of each waiting report
+        self._keys: Dict[str, float] = {}
+        self._arrivals = itertools.count()
+        self._ready = asyncio.Event()
         self._task: Optional[asyncio.Task] = None
 
     async def start(self) -> None:
@@ -30,20 +49,40 @@ class AbuseQueueProcessor:
                 pass
             self._task = None
 
-    async def enqueue(self, report_id: str) -> None:
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    async def enqueue(self, report_id: str, priority: float = 0.0) -> None:
         # Mark as queued as soon as we accept it
         await self._store.update_status(report_id, ReportStatus.QUEUED)
-        await self._queue.put(report_id)
+        self._push(report_id, self._aging_per_second * time.monotonic() - priority)
 
-    async def _run(self) -> None:
+    def bump(self, report_id: str, priority: float) -> None:
+        """Raise a waiting report's priority by ``priority``; no-op once it has been handed out."""
+        key = self._keys.get(report_id)
+        if key is not None and priority > 0:
+            self._push(report_id, key - priority)
+
+    def _push(self, report_id: str, key: float) -> None:
+        self._keys[report_id] = key
+        heapq.heappush(self._heap, (key, next(self._arrivals), report_id))
+        self._ready.set()
+
+    async def _next(self) -> str:
         while True:
-            report_id = await self._queue.get()
-            try:
-                report = await self._store.get_report(report_id)
-                if report is None:
-                    continue
-                await self._group_chat.send_report(report)
-                await self._store.update_status(report.id, ReportStatus.IN_REVIEW)
-            finally:
-                self._queue.task_done()
+            while not self._heap:
+                self._ready.clear()
+                await self._ready.wait()
+            key, _, report_id = heapq.heappop(self._heap)
+            if self._keys.get(report_id) == key:
+                del self._keys[report_id]
+                return report_id
 
+    async def _run(self) -> None:
+        while True:
+            report_id = await self._next()
+            report = await self._store.get_report(report_id)
+            if report is None:
+                continue
+            await self._group_chat.send_report(report)
+            await self._store.update_status(report.id, ReportStatus.IN_REVIEW)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .models import CLOSED_STATUSES, ReportCreate, ReportStatus
+
+# Starting points for a report before any term matches; unknown reasons get DEFAULT_REASON_WEIGHT
+DEFAULT_REASON_WEIGHTS: Dict[str, float] = {
+    "threat": 60.0,
+    "violence": 50.0,
+    "self_harm": 50.0,
+    "child_safety": 80.0,
+    "hate_speech": 40.0,
+    "harassment": 30.0,
+    "scam": 20.0,
+    "misinformation": 15.0,
+    "spam": 5.0,
+}
+DEFAULT_REASON_WEIGHT = 10.0
+
+# Used when MOD_SCORING_TERMS_PATH is not set; real deployments load a maintained list
+DEFAULT_TERMS: Dict[str, float] = {
+    "i will kill you": 80.0,
+    "kill you": 60.0,
+    "shoot you": 60.0,
+    "bomb": 40.0,
+    "burn your house": 60.0,
+    "hurt you": 40.0,
+    "knife": 25.0,
+    "gun": 25.0,
+    "kill myself": 70.0,
+    "suicide": 50.0,
+    "send money": 15.0,
+    "bank details": 20.0,
+    "verify your account": 20.0,
+    "pin number": 20.0,
+    "free money": 10.0,
+    "click here": 5.0,
+}
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over a fixed set of lower-cased terms.
+
+    ``matches(text)`` reports every term occurring in ``text`` as whole
+    words in one pass, however many terms there are. Each node's output
+    already includes the outputs reachable through its failure links.
+    """
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        self.terms: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Tuple[int, ...]] = [()]
+        for term in terms:
+            term = " ".join(term.lower().split())
+            if not term:
+                continue
+            node = 0
+            for ch in term:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                node = nxt
+            if not self._out[node]:
+                self._out[node] = (len(self.terms),)
+                self.terms.append(term)
+        self._lengths = [len(t) for t in self.terms]
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                if self._out[self._fail[child]]:
+                    self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def matches(self, text: str) -> Set[int]:
+        """Indexes into ``terms`` of the terms found in ``text`` as whole words."""
+        text = text.lower()
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        last = len(text) - 1
+        found: Set[int] = set()
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                if i < last and text[i + 1].isalnum():
+                    continue
+                for term in out[node]:
+                    start = i - lengths[term]
+                    if start < 0 or not text[start].isalnum():
+                        found.add(term)
+        return found
+
+
+def load_terms(path: str) -> Dict[str, float]:
+    """Reads ``term<TAB or comma>weight`` lines (weight defaults to 10; ``#`` starts a comment)."""
+    terms: Dict[str, float] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            term, sep, weight = line.replace("\t", ",").rpartition(",")
+            if not sep:
+                term, weight = weight, ""
+            terms[term.strip().lower()] = float(weight) if weight.strip() else 10.0
+    return terms
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            weights[name.strip().lower()] = float(value)
+    return weights
+
+
+class ReportScorer:
+    """Priority for a new report from its reason, its text and its reporter's record.
+
+    ``priority = (reason weight + matched term weights, capped at
+    max_term_score) * (0.5 + credibility)``, where credibility is the
+    smoothed share of the reporter's closed reports that led to action
+    (0.5 with no history, so anonymous and new reporters score x1).
+    """
+
+    def __init__(
+        self,
+        terms: Mapping[str, float],
+        reason_weights: Optional[Mapping[str, float]] = None,
+        max_term_score: float = 100.0,
+    ) -> None:
+        self.matcher = TermMatcher(terms)
+        normalized = {" ".join(t.lower().split()): float(w) for t, w in terms.items()}
+        self.weights = [normalized[t] for t in self.matcher.terms]
+        self.reason_weights = dict(DEFAULT_REASON_WEIGHTS if reason_weights is None else reason_weights)
+        self.max_term_score = max_term_score
+        # reporter_id -> [closed with action, dismissed]
+        self._outcomes: Dict[str, List[int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "ReportScorer":
+        path = os.environ.get("MOD_SCORING_TERMS_PATH")
+        return cls(
+            load_terms(path) if path else DEFAULT_TERMS,
+            reason_weights={**DEFAULT_REASON_WEIGHTS, **_parse_weights(os.environ.get("MOD_SCORING_REASON_WEIGHTS", ""))},
+            max_term_score=float(os.environ.get("MOD_SCORING_MAX_TERM_SCORE", "100")),
+        )
+
+    def matched_terms(self, text: str) -> List[str]:
+        return sorted(self.matcher.terms[i] for i in self.matcher.matches(text))
+
+    def credibility(self, reporter_id: Optional[str]) -> float:
+        actioned, dismissed = self._outcomes.get(reporter_id, (0, 0)) if reporter_id else (0, 0)
+        return (actioned + 1) / (actioned + dismissed + 2)
+
+    def score(self, data: ReportCreate) -> float:
+        term_score = sum(self.weights[i] for i in self.matcher.matches(data.content_text))
+        base = self.reason_weights.get(data.reason.lower(), DEFAULT_REASON_WEIGHT) + min(term_score, self.max_term_score)
+        return round(base * (0.5 + self.credibility(data.reporter_id)), 3)
+
+    def record_outcome(self, reporter_id: Optional[str], status: ReportStatus) -> None:
+        """Counts a closed report towards its reporter's credibility."""
+        if not reporter_id or status not in CLOSED_STATUSES:
+            return
+        counts = self._outcomes.setdefault(reporter_id, [0, 0])
+        counts[0 if status == ReportStatus.ACTION_TAKEN else 1] += 1
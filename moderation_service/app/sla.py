@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.logs import log_exception
+
+from .clients.group_chat import GroupChatClient
+from .models import CLOSED_STATUSES, Report
+
+
+def sla_deadline(report: Report) -> Optional[datetime]:
+    """Deadline of an escalated, still-open report, or None if no SLA applies."""
+    if report.escalation_level <= 0 or not report.sla_minutes or report.escalated_at is None:
+        return None
+    if report.closed_at is not None or report.status in CLOSED_STATUSES:
+        return None
+    escalated_at = report.escalated_at
+    if escalated_at.tzinfo is None:
+        escalated_at = escalated_at.replace(tzinfo=timezone.utc)
+    return escalated_at + timedelta(minutes=report.sla_minutes)
+
+
+class SlaScheduler:
+    """Tracks SLA deadlines of escalated reports and fires breach notifications.
+
+    A min-heap of deadlines that have not fired yet drives the timer task,
+    and a second min-heap of every tracked deadline answers ``overdue``;
+    in both, stale entries (the report was re-escalated or closed) are
+    skipped and dropped lazily. ``rebuild`` queues every open deadline, including ones that
+    passed while the service was down, so those breaches fire right after
+    startup. Breaches are not persisted, so one notified just before a
+    restart is sent again: delivery is at least once.
+    """
+
+    def __init__(self, store: Any, group_chat: GroupChatClient, breaches_total: Any = None) -> None:
+        self._store = store
+        self._group_chat = group_chat
+        self._breaches_total = breaches_total
+        self._deadlines: Dict[str, datetime] = {}
+        self._heap: List[Tuple[datetime, str]] = []
+        # Unlike _heap, entries stay here after firing until the report stops being overdue
+        self._by_deadline: List[Tuple[datetime, str]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.rebuild()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def rebuild(self) -> None:
+        self._deadlines.clear()
+        self._heap.clear()
+        self._by_deadline.clear()
+        for report in await self._store.list_reports():
+            deadline = sla_deadline(report)
+            if deadline is None:
+                continue
+            self._deadlines[report.id] = deadline
+            # Past deadlines stay in: the timer task fires them as soon as it runs
+            self._heap.append((deadline, report.id))
+        heapq.heapify(self._heap)
+        self._by_deadline = list(self._heap)
+        self._wakeup.set()
+
+    def track(self, report: Report) -> None:
+        """(Re)schedule ``report`` after a change to its escalation or status."""
+        deadline = sla_deadline(report)
+        if deadline is not None and self._deadlines.get(report.id) == deadline:
+            # Unchanged (e.g. a note was added); it is already queued or has fired
+            return
+        self._remove(report.id)
+        if deadline is None:
+            return
+        self._deadlines[report.id] = deadline
+        heapq.heappush(self._heap, (deadline, report.id))
+        heapq.heappush(self._by_deadline, (deadline, report.id))
+        self._wakeup.set()
+
+    def overdue(self, now: Optional[datetime] = None, limit: int = 100) -> List[str]:
+        """IDs of reports past their deadline, most overdue first."""
+        now = now or datetime.now(timezone.utc)
+        due: List[Tuple[datetime, str]] = []
+        seen = set()
+        while self._by_deadline and len(due) < limit and self._by_deadline[0][0] <= now:
+            deadline, report_id = heapq.heappop(self._by_deadline)
+            # Stale or duplicate entries are dropped for good; current ones are pushed back below
+            if self._deadlines.get(report_id) == deadline and report_id not in seen:
+                seen.add(report_id)
+                due.append((deadline, report_id))
+        for entry in due:
+            heapq.heappush(self._by_deadline, entry)
+        return [report_id for _, report_id in due]
+
+    def _remove(self, report_id: str) -> None:
+        # Its heap entry is dropped lazily once it no longer matches _deadlines
+        self._deadlines.pop(report_id, None)
+
+    async def _run(self) -> None:
+        while True:
+            timeout: Optional[float] = None
+            now = datetime.now(timezone.utc)
+            while self._heap:
+                deadline, report_id = self._heap[0]
+                if self._deadlines.get(report_id) != deadline:
+                    heapq.heappop(self._heap)
+                    continue
+                if deadline > now:
+                    timeout = (deadline - now).total_seconds()
+                    break
+                heapq.heappop(self._heap)
+                try:
+                    await self._fire(report_id, deadline)
+                except Exception as exc:
+                    log_exception("sla_breach_notify_failed", exc, report_id=report_id)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, report_id: str, deadline: datetime) -> None:
+        report = await self._store.get_report(report_id)
+        if report is None or sla_deadline(report) is None:
+            self._remove(report_id)
+            return
+        if sla_deadline(report) != deadline:
+            # Re-escalated meanwhile; the newer heap entry will fire instead
+            return
+        if self._breaches_total is not None:
+            self._breaches_total.inc()
+        await self._group_chat.send_sla_breach(report, deadline)
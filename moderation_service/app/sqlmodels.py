@@ -7,12 +7,16 @@ from sqlmodel import SQLModel, Field
 
 class ReportRow(SQLModel, table=True):
     id: str = Field(primary_key=True)
-    content_id: str
+    content_id: str = Field(index=True)
     content_text: str
     reason: str
     reporter_id: Optional[str] = None
     status: str = Field(index=True)
     admin_notes_json: str = Field(default="[]")
+    # Set to content_id while the report is open so that at most one open report exists per content
+    open_content_key: Optional[str] = Field(default=None, unique=True, index=True)
+    reporter_count: int = 1
+    reason_counts_json: str = Field(default="{}")
     escalation_level: int = 0
     sla_minutes: Optional[int] = None
     escalated_at: Optional[datetime] = None
@@ -20,3 +24,23 @@ class ReportRow(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+
+class AppealRow(SQLModel, table=True):
+    id: str = Field(primary_key=True)
+    report_id: str = Field(index=True)
+    user_id: str
+    reason: str
+    status: str = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+
+class TransparencyCounterRow(SQLModel, table=True):
+    """One transparency counter, e.g. ("reports_by_reason", "spam") or ("daily_reports", "2024-05-01")."""
+
+    __tablename__ = "transparencycounter"
+
+    metric: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    value: int = 0
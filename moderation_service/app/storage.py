@@ -1,118 +1,342 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Dict, List, Optional
-from datetime import datetime, timezone
+import bisect
 import json
-import os
+import sys
+import zlib
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
 
-from .models import Report, ReportCreate, ReportStatus
-from .db import get_session
-from .sqlmodels import ReportRow
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from .aggregates import SqlTransparencyAggregates, TransparencyAggregates
+from .audit import AuditLogWriter
+from .models import CLOSED_STATUSES, Appeal, AppealCreate, Report, ReportCreate, ReportStatus
+from .db import engine, get_session
+from .sqlmodels import AppealRow, ReportRow
+
+
+def _append_audit(audit: AuditLogWriter, action: str, report: Report) -> None:
+    # Only buffers the entry; the writer task does the disk I/O outside the store lock
+    audit.record(
+        {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "action": action,
+            "report_id": report.id,
+            "status": report.status.value,
+            "escalation_level": report.escalation_level,
+            "sla_minutes": report.sla_minutes,
+        }
+    )
+
+
+def _row_to_report(row: ReportRow) -> Report:
+    return Report(
+        id=row.id,
+        content_id=row.content_id,
+        content_text=row.content_text,
+        reason=row.reason,
+        reporter_id=row.reporter_id,
+        status=ReportStatus(row.status),
+        admin_notes=[],
+        reporter_count=row.reporter_count,
+        reason_counts=json.loads(row.reason_counts_json or "{}"),
+        escalation_level=row.escalation_level,
+        sla_minutes=row.sla_minutes,
+        escalated_at=row.escalated_at,
+        closed_at=row.closed_at,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Shorter content_text stays a str: zlib's header and checksum eat the saving
+_COMPRESS_MIN_CHARS = 96
+
+
+def _micros(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _datetime(micros: Optional[int]) -> Optional[datetime]:
+    return None if micros is None else _EPOCH + timedelta(microseconds=micros)
+
+
+def _pack_text(text: str) -> Union[str, bytes]:
+    if len(text) >= _COMPRESS_MIN_CHARS:
+        packed = zlib.compress(text.encode("utf-8"), 6)
+        if len(packed) < len(text):
+            return packed
+    return text
+
+
+def _record_key(report_id: str) -> Optional[bytes]:
+    try:
+        return UUID(report_id).bytes
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+class ReportRecord:
+    """Compact form of a ``Report`` kept by ``InMemoryReportStore``.
+
+    The id is the 16 raw UUID bytes, timestamps are integer microseconds,
+    ``reason`` and ``reporter_id`` are interned, ``status`` is the shared
+    enum member and ``content_text`` is zlib-compressed once it is long
+    enough to gain. ``reason_counts`` stays ``None`` while every
+    submission gave the first reason (it is then ``{reason:
+    reporter_count}``), and notes are a tuple shared when empty.
+    ``to_report()`` builds the Pydantic model for the API.
+    """
+
+    __slots__ = (
+        "key",
+        "content_id",
+        "text",
+        "reason",
+        "reporter_id",
+        "status",
+        "notes",
+        "reporter_count",
+        "reason_counts",
+        "escalation_level",
+        "sla_minutes",
+        "escalated_at",
+        "closed_at",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self, data: ReportCreate) -> None:
+        now = _micros(datetime.now(timezone.utc))
+        self.key = uuid4().bytes
+        self.content_id = data.content_id
+        self.text = _pack_text(data.content_text)
+        self.reason = sys.intern(data.reason)
+        self.reporter_id = sys.intern(data.reporter_id) if data.reporter_id is not None else None
+        self.status = ReportStatus.PENDING
+        self.notes: Tuple[str, ...] = ()
+        self.reporter_count = 1
+        self.reason_counts: Optional[Dict[str, int]] = None
+        self.escalation_level = 0
+        self.sla_minutes: Optional[int] = None
+        self.escalated_at: Optional[int] = None
+        self.closed_at: Optional[int] = None
+        self.created_at = now
+        self.updated_at = now
+
+    @property
+    def id(self) -> str:
+        return str(UUID(bytes=self.key))
+
+    def add_submission(self, reason: str) -> None:
+        if self.reason_counts is None and reason != self.reason:
+            self.reason_counts = {self.reason: self.reporter_count}
+        if self.reason_counts is not None:
+            reason = sys.intern(reason)
+            self.reason_counts[reason] = self.reason_counts.get(reason, 0) + 1
+        self.reporter_count += 1
+        self.touch()
+
+    def add_note(self, note: str) -> None:
+        self.notes = self.notes + (note,)
+        self.touch()
+
+    def touch(self) -> None:
+        self.updated_at = _micros(datetime.now(timezone.utc))
+
+    def to_report(self) -> Report:
+        # Fields are already valid, so the model is constructed without re-validation
+        return Report.model_construct(
+            id=self.id,
+            content_id=self.content_id,
+            content_text=self.text if isinstance(self.text, str) else zlib.decompress(self.text).decode("utf-8"),
+            reason=self.reason,
+            reporter_id=self.reporter_id,
+            status=self.status,
+            admin_notes=list(self.notes),
+            reporter_count=self.reporter_count,
+            reason_counts=dict(self.reason_counts) if self.reason_counts is not None else {self.reason: self.reporter_count},
+            escalation_level=self.escalation_level,
+            sla_minutes=self.sla_minutes,
+            escalated_at=_datetime(self.escalated_at),
+            closed_at=_datetime(self.closed_at),
+            created_at=_datetime(self.created_at),
+            updated_at=_datetime(self.updated_at),
+        )
 
 
 class InMemoryReportStore:
-    """Thread-safe in-memory report store suitable for development and tests."""
+    """Thread-safe in-memory report store suitable for development and tests.
+
+    Reports are held as ``ReportRecord`` objects keyed by raw UUID bytes,
+    about a third of the memory of ``Report`` models (see
+    ``scripts/report_store_memory.py``); every method returns freshly built
+    ``Report`` models, so callers never share state with the store.
+    """
 
-    def __init__(self) -> None:
-        self._reports: Dict[str, Report] = {}
+    def __init__(
+        self, audit: Optional[AuditLogWriter] = None, aggregates: Optional[TransparencyAggregates] = None
+    ) -> None:
+        self._reports: Dict[bytes, ReportRecord] = {}
+        # content_id -> key of the open report collecting submissions for it
+        self._open_by_content: Dict[str, bytes] = {}
         self._lock = asyncio.Lock()
-        self._audit_log_path = os.environ.get("AUDIT_LOG_PATH", "/workspace/moderation_service/audit.log")
+        self.audit = audit or AuditLogWriter.from_env()
+        self.aggregates = aggregates or TransparencyAggregates()
+
+    def _add(self, data: ReportCreate) -> Tuple[ReportRecord, Report]:
+        record = ReportRecord(data)
+        self._reports[record.key] = record
+        report = record.to_report()
+        self.aggregates.report_submitted(data.reason, report.created_at)
+        self.aggregates.report_opened(report.status, report.escalation_level)
+        return record, report
+
+    def _get(self, report_id: str) -> Optional[ReportRecord]:
+        key = _record_key(report_id)
+        return self._reports.get(key) if key is not None else None
 
     async def create_report(self, data: ReportCreate) -> Report:
         async with self._lock:
-            report = Report(
-                content_id=data.content_id,
-                content_text=data.content_text,
-                reason=data.reason,
-                reporter_id=data.reporter_id,
-            )
-            self._reports[report.id] = report
-            return report
+            return self._add(data)[1]
+
+    async def submit_report(self, data: ReportCreate) -> Tuple[Report, bool]:
+        """Create a report, or merge into the open report for the same content.
+
+        Returns the report and whether it was newly created.
+        """
+        async with self._lock:
+            key = self._open_by_content.get(data.content_id)
+            if key is not None:
+                record = self._reports[key]
+                record.add_submission(data.reason)
+                report = record.to_report()
+                self.aggregates.report_submitted(data.reason, report.updated_at)
+                return report, False
+            record, report = self._add(data)
+            self._open_by_content[record.content_id] = record.key
+            return report, True
+
+    def _release_content(self, record: ReportRecord) -> None:
+        if self._open_by_content.get(record.content_id) == record.key:
+            del self._open_by_content[record.content_id]
 
     async def get_report(self, report_id: str) -> Optional[Report]:
         async with self._lock:
-            return self._reports.get(report_id)
+            record = self._get(report_id)
+            return record.to_report() if record is not None else None
+
+    async def get_reports(self, report_ids: Iterable[str]) -> List[Report]:
+        """Reports for ``report_ids`` in the given order; unknown IDs are skipped."""
+        async with self._lock:
+            records = (self._get(report_id) for report_id in report_ids)
+            return [r.to_report() for r in records if r is not None]
 
     async def list_reports(self, status: Optional[ReportStatus] = None) -> List[Report]:
         async with self._lock:
-            values = list(self._reports.values())
-            if status is None:
-                return sorted(values, key=lambda r: r.created_at, reverse=True)
-            return sorted([r for r in values if r.status == status], key=lambda r: r.created_at, reverse=True)
+            records = [r for r in self._reports.values() if status is None or r.status == status]
+            records.sort(key=attrgetter("created_at"), reverse=True)
+            return [r.to_report() for r in records]
 
-    async def update_status(self, report_id: str, status: ReportStatus, admin_note: Optional[str] = None) -> Optional[Report]:
+    async def update_status(
+        self, report_id: str, status: ReportStatus, admin_note: Optional[str] = None
+    ) -> Optional[Tuple[Report, ReportStatus]]:
+        """Set the status; returns the report and its status before this change."""
         async with self._lock:
-            report = self._reports.get(report_id)
-            if report is None:
+            record = self._get(report_id)
+            if record is None:
                 return None
-            report.status = status
+            previous = record.status
+            self.aggregates.report_status_changed(record.status, status)
+            record.status = status
+            if status in CLOSED_STATUSES:
+                if record.closed_at is None:
+                    self.aggregates.report_closed()
+                    record.closed_at = _micros(datetime.now(timezone.utc))
+                record.touch()
+                self._release_content(record)
             if admin_note:
-                report.add_admin_note(admin_note)
-            return report
+                record.add_note(admin_note)
+            return record.to_report(), previous
 
     async def escalate(self, report_id: str, level_delta: int = 1, sla_minutes: Optional[int] = None, note: Optional[str] = None) -> Optional[Report]:
         async with self._lock:
-            report = self._reports.get(report_id)
-            if report is None:
+            record = self._get(report_id)
+            if record is None:
                 return None
-            report.escalation_level = max(0, report.escalation_level + level_delta)
-            report.sla_minutes = sla_minutes if sla_minutes is not None else report.sla_minutes
-            report.escalated_at = datetime.now(timezone.utc)
-            report.updated_at = datetime.now(timezone.utc)
+            level = max(0, record.escalation_level + level_delta)
+            self.aggregates.report_escalation_changed(record.escalation_level, level)
+            record.escalation_level = level
+            record.sla_minutes = sla_minutes if sla_minutes is not None else record.sla_minutes
+            record.escalated_at = _micros(datetime.now(timezone.utc))
+            record.touch()
             if note:
-                report.add_admin_note(note)
-            await self._append_audit("escalate", report)
+                record.add_note(note)
+            report = record.to_report()
+            _append_audit(self.audit, "escalate", report)
             return report
 
     async def deescalate(self, report_id: str, note: Optional[str] = None) -> Optional[Report]:
         async with self._lock:
-            report = self._reports.get(report_id)
-            if report is None:
+            record = self._get(report_id)
+            if record is None:
                 return None
-            report.escalation_level = max(0, report.escalation_level - 1)
-            report.updated_at = datetime.now(timezone.utc)
+            level = max(0, record.escalation_level - 1)
+            self.aggregates.report_escalation_changed(record.escalation_level, level)
+            record.escalation_level = level
+            record.touch()
             if note:
-                report.add_admin_note(note)
-            await self._append_audit("deescalate", report)
+                record.add_note(note)
+            report = record.to_report()
+            _append_audit(self.audit, "deescalate", report)
             return report
 
-    async def close(self, report_id: str, note: Optional[str] = None) -> Optional[Report]:
+    async def close(self, report_id: str, note: Optional[str] = None) -> Optional[Tuple[Report, ReportStatus]]:
+        """Close the report; returns it and its status before closing."""
         async with self._lock:
-            report = self._reports.get(report_id)
-            if report is None:
+            record = self._get(report_id)
+            if record is None:
                 return None
-            report.status = ReportStatus.DISMISSED if report.status != ReportStatus.ACTION_TAKEN else report.status
-            report.closed_at = datetime.now(timezone.utc)
-            report.updated_at = datetime.now(timezone.utc)
+            previous = record.status
+            status = ReportStatus.DISMISSED if record.status != ReportStatus.ACTION_TAKEN else record.status
+            self.aggregates.report_status_changed(record.status, status)
+            record.status = status
+            if record.closed_at is None:
+                self.aggregates.report_closed()
+            record.closed_at = _micros(datetime.now(timezone.utc))
+            record.touch()
+            self._release_content(record)
             if note:
-                report.add_admin_note(note)
-            await self._append_audit("close", report)
-            return report
-
-    async def _append_audit(self, action: str, report: Report) -> None:
-        entry = {
-            "time": datetime.now(timezone.utc).isoformat(),
-            "action": action,
-            "report_id": report.id,
-            "status": report.status.value,
-            "escalation_level": report.escalation_level,
-            "sla_minutes": report.sla_minutes,
-        }
-        try:
-            with open(self._audit_log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(entry) + "\n")
-        except Exception:
-            # best-effort audit; ignore errors in dev
-            pass
+                record.add_note(note)
+            report = record.to_report()
+            _append_audit(self.audit, "close", report)
+            return report, previous
 
 
 class PostgresReportStore:
     """SQL-backed report store using SQLModel/SQLAlchemy."""
 
-    def __init__(self) -> None:
-        # No state; sessions are per-call
-        ...
+    def __init__(
+        self, audit: Optional[AuditLogWriter] = None, aggregates: Optional[SqlTransparencyAggregates] = None
+    ) -> None:
+        # Sessions are per-call. The content index is only a cache in front of the
+        # unique open_content_key column, so stale entries are re-checked against the row.
+        # Counter deltas are written in each mutation's own transaction.
+        self.audit = audit or AuditLogWriter.from_env()
+        self.aggregates = aggregates or SqlTransparencyAggregates(engine)
+        self._open_by_content: Dict[str, str] = {}
 
     async def create_report(self, data: ReportCreate) -> Report:
         for session in get_session():
@@ -123,45 +347,89 @@ class PostgresReportStore:
                 reason=data.reason,
                 reporter_id=data.reporter_id,
                 status=ReportStatus.PENDING.value,
+                reason_counts_json=json.dumps({data.reason: 1}),
             )
             session.add(row)
+            changes = self.aggregates.changes()
+            changes.report_submitted(data.reason, row.created_at)
+            changes.report_opened(row.status, row.escalation_level)
+            changes.write(session)
             session.commit()
-            return Report(
-                id=row.id,
-                content_id=row.content_id,
-                content_text=row.content_text,
-                reason=row.reason,
-                reporter_id=row.reporter_id,
-                status=ReportStatus(row.status),
-                admin_notes=[],
-                escalation_level=row.escalation_level,
-                sla_minutes=row.sla_minutes,
-                escalated_at=row.escalated_at,
-                closed_at=row.closed_at,
-                created_at=row.created_at,
-                updated_at=row.updated_at,
-            )
+            return _row_to_report(row)
+
+    async def submit_report(self, data: ReportCreate) -> Tuple[Report, bool]:
+        for session in get_session():
+            for _ in range(2):
+                row = self._open_row(session, data.content_id)
+                if row is not None:
+                    counts = json.loads(row.reason_counts_json or "{}")
+                    counts[data.reason] = counts.get(data.reason, 0) + 1
+                    row.reason_counts_json = json.dumps(counts)
+                    row.reporter_count = (row.reporter_count or 1) + 1
+                    row.updated_at = datetime.now(timezone.utc)
+                    session.add(row)
+                    changes = self.aggregates.changes()
+                    changes.report_submitted(data.reason, row.updated_at)
+                    changes.write(session)
+                    session.commit()
+                    return _row_to_report(row), False
+                row = ReportRow(
+                    id=str(uuid4()),
+                    content_id=data.content_id,
+                    content_text=data.content_text,
+                    reason=data.reason,
+                    reporter_id=data.reporter_id,
+                    status=ReportStatus.PENDING.value,
+                    open_content_key=data.content_id,
+                    reason_counts_json=json.dumps({data.reason: 1}),
+                )
+                session.add(row)
+                try:
+                    # Flushed first so a duplicate open report fails before any counter is touched
+                    session.flush()
+                except IntegrityError:
+                    # Another worker opened a report for this content first; merge into it
+                    session.rollback()
+                    continue
+                changes = self.aggregates.changes()
+                changes.report_submitted(data.reason, row.created_at)
+                changes.report_opened(row.status, row.escalation_level)
+                changes.write(session)
+                session.commit()
+                self._open_by_content[data.content_id] = row.id
+                return _row_to_report(row), True
+        raise RuntimeError(f"could not coalesce report for content {data.content_id}")
+
+    def _open_row(self, session, content_id: str) -> Optional[ReportRow]:
+        report_id = self._open_by_content.get(content_id)
+        if report_id is not None:
+            row = session.exec(select(ReportRow).where(ReportRow.id == report_id).with_for_update()).first()
+            if row is not None and row.open_content_key == content_id:
+                return row
+            self._open_by_content.pop(content_id, None)
+        row = session.exec(
+            select(ReportRow).where(ReportRow.open_content_key == content_id).with_for_update()
+        ).first()
+        if row is not None:
+            self._open_by_content[content_id] = row.id
+        return row
 
     async def get_report(self, report_id: str) -> Optional[Report]:
         for session in get_session():
             row = session.get(ReportRow, report_id)
             if not row:
                 return None
-            return Report(
-                id=row.id,
-                content_id=row.content_id,
-                content_text=row.content_text,
-                reason=row.reason,
-                reporter_id=row.reporter_id,
-                status=ReportStatus(row.status),
-                admin_notes=[],
-                escalation_level=row.escalation_level,
-                sla_minutes=row.sla_minutes,
-                escalated_at=row.escalated_at,
-                closed_at=row.closed_at,
-                created_at=row.created_at,
-                updated_at=row.updated_at,
-            )
+            return _row_to_report(row)
+
+    async def get_reports(self, report_ids: Iterable[str]) -> List[Report]:
+        """Reports for ``report_ids`` in the given order, in one query; unknown IDs are skipped."""
+        report_ids = list(report_ids)
+        if not report_ids:
+            return []
+        for session in get_session():
+            rows = session.exec(select(ReportRow).where(ReportRow.id.in_(report_ids))).all()
+            by_id = {row.id: row for row in rows}
+            return [_row_to_report(by_id[report_id]) for report_id in report_ids if report_id in by_id]
 
     async def list_reports(self, status: Optional[ReportStatus] = None) -> List[Report]:
         for session in get_session():
@@ -169,77 +437,236 @@ class PostgresReportStore:
             if status is not None:
                 query = query.filter(ReportRow.status == status.value)
             rows = query.order_by(ReportRow.created_at.desc()).all()
-            results: List[Report] = []
-            for row in rows:
-                results.append(
-                    Report(
-                        id=row.id,
-                        content_id=row.content_id,
-                        content_text=row.content_text,
-                        reason=row.reason,
-                        reporter_id=row.reporter_id,
-                        status=ReportStatus(row.status),
-                        admin_notes=[],
-                        escalation_level=row.escalation_level,
-                        sla_minutes=row.sla_minutes,
-                        escalated_at=row.escalated_at,
-                        closed_at=row.closed_at,
-                        created_at=row.created_at,
-                        updated_at=row.updated_at,
-                    )
-                )
-            return results
+            return [_row_to_report(row) for row in rows]
 
-    async def update_status(self, report_id: str, status: ReportStatus, admin_note: Optional[str] = None) -> Optional[Report]:
-        report = await self.get_report(report_id)
-        if report is None:
-            return None
+    async def update_status(
+        self, report_id: str, status: ReportStatus, admin_note: Optional[str] = None
+    ) -> Optional[Tuple[Report, ReportStatus]]:
+        """Set the status; returns the report and its status before this change.
+
+        The previous status is read from the row locked for this update, so
+        of two concurrent closes only one sees an open report.
+        """
         for session in get_session():
-            row = session.get(ReportRow, report_id)
+            row = session.get(ReportRow, report_id, with_for_update=True)
             if not row:
                 return None
+            previous = ReportStatus(row.status)
+            changes = self.aggregates.changes()
+            changes.report_status_changed(row.status, status.value)
             row.status = status.value
             row.updated_at = datetime.now(timezone.utc)
+            if status in CLOSED_STATUSES:
+                row.open_content_key = None
+                if row.closed_at is None:
+                    changes.report_closed()
+                    row.closed_at = row.updated_at
             session.add(row)
+            changes.write(session)
             session.commit()
             if admin_note:
                 # In SQL path, we don't persist notes text list for brevity
                 pass
-            return await self.get_report(report_id)
+            report = await self.get_report(report_id)
+            return (report, previous) if report is not None else None
 
     async def escalate(self, report_id: str, level_delta: int = 1, sla_minutes: Optional[int] = None, note: Optional[str] = None) -> Optional[Report]:
         for session in get_session():
-            row = session.get(ReportRow, report_id)
+            row = session.get(ReportRow, report_id, with_for_update=True)
             if not row:
                 return None
-            row.escalation_level = max(0, (row.escalation_level or 0) + level_delta)
+            level = max(0, (row.escalation_level or 0) + level_delta)
+            changes = self.aggregates.changes()
+            changes.report_escalation_changed(row.escalation_level or 0, level)
+            row.escalation_level = level
             row.sla_minutes = sla_minutes if sla_minutes is not None else row.sla_minutes
             row.escalated_at = datetime.now(timezone.utc)
             row.updated_at = datetime.now(timezone.utc)
             session.add(row)
+            changes.write(session)
             session.commit()
-            return await self.get_report(report_id)
+            report = await self.get_report(report_id)
+            if report is not None:
+                _append_audit(self.audit, "escalate", report)
+            return report
 
     async def deescalate(self, report_id: str, note: Optional[str] = None) -> Optional[Report]:
         for session in get_session():
-            row = session.get(ReportRow, report_id)
+            row = session.get(ReportRow, report_id, with_for_update=True)
             if not row:
                 return None
-            row.escalation_level = max(0, (row.escalation_level or 0) - 1)
+            level = max(0, (row.escalation_level or 0) - 1)
+            changes = self.aggregates.changes()
+            changes.report_escalation_changed(row.escalation_level or 0, level)
+            row.escalation_level = level
             row.updated_at = datetime.now(timezone.utc)
             session.add(row)
+            changes.write(session)
             session.commit()
-            return await self.get_report(report_id)
+            report = await self.get_report(report_id)
+            if report is not None:
+                _append_audit(self.audit, "deescalate", report)
+            return report
 
-    async def close(self, report_id: str, note: Optional[str] = None) -> Optional[Report]:
+    async def close(self, report_id: str, note: Optional[str] = None) -> Optional[Tuple[Report, ReportStatus]]:
+        """Close the report; returns it and its status before closing, read under the row lock."""
         for session in get_session():
-            row = session.get(ReportRow, report_id)
+            row = session.get(ReportRow, report_id, with_for_update=True)
             if not row:
                 return None
+            previous = ReportStatus(row.status)
+            changes = self.aggregates.changes()
             if row.status != ReportStatus.ACTION_TAKEN.value:
+                changes.report_status_changed(row.status, ReportStatus.DISMISSED.value)
                 row.status = ReportStatus.DISMISSED.value
+            if row.closed_at is None:
+                changes.report_closed()
             row.closed_at = datetime.now(timezone.utc)
             row.updated_at = datetime.now(timezone.utc)
+            row.open_content_key = None
+            session.add(row)
+            changes.write(session)
+            session.commit()
+            report = await self.get_report(report_id)
+            if report is None:
+                return None
+            _append_audit(self.audit, "close", report)
+            return report, previous
+
+
+class InMemoryAppealStore:
+    """In-memory appeal store with status and report_id indexes."""
+
+    def __init__(self, aggregates: Optional[TransparencyAggregates] = None) -> None:
+        self._appeals: Dict[str, Appeal] = {}
+        # Index entries are (created_at, id), kept sorted so pages are slices from the end
+        self._all: List[Tuple[datetime, str]] = []
+        self._by_status: Dict[str, List[Tuple[datetime, str]]] = {}
+        self._by_report: Dict[str, List[Tuple[datetime, str]]] = {}
+        self._lock = asyncio.Lock()
+        self.aggregates = aggregates or TransparencyAggregates()
+
+    async def create_appeal(self, data: AppealCreate) -> Appeal:
+        async with self._lock:
+            appeal = Appeal(report_id=data.report_id, user_id=data.user_id, reason=data.reason)
+            key = (appeal.created_at, appeal.id)
+            self._appeals[appeal.id] = appeal
+            bisect.insort(self._all, key)
+            bisect.insort(self._by_status.setdefault(appeal.status, []), key)
+            bisect.insort(self._by_report.setdefault(appeal.report_id, []), key)
+            self.aggregates.appeal_created(appeal.status, appeal.created_at)
+            return appeal
+
+    async def get_appeal(self, appeal_id: str) -> Optional[Appeal]:
+        async with self._lock:
+            return self._appeals.get(appeal_id)
+
+    async def list_appeals(
+        self,
+        status: Optional[str] = None,
+        report_id: Optional[str] = None,
+        limit: Optional[int] = 50,
+        offset: int = 0,
+    ) -> List[Appeal]:
+        """Appeals newest first, optionally filtered, paginated by limit/offset."""
+        async with self._lock:
+            keys: Iterable[Tuple[datetime, str]]
+            if report_id is not None:
+                keys = reversed(self._by_report.get(report_id, []))
+                if status is not None:
+                    keys = (k for k in keys if self._appeals[k[1]].status == status)
+            elif status is not None:
+                keys = reversed(self._by_status.get(status, []))
+            else:
+                keys = reversed(self._all)
+            stop = None if limit is None else offset + limit
+            return [self._appeals[appeal_id] for _, appeal_id in islice(keys, offset, stop)]
+
+    async def update_status(self, appeal_id: str, status: str) -> Optional[Appeal]:
+        async with self._lock:
+            appeal = self._appeals.get(appeal_id)
+            if appeal is None:
+                return None
+            if appeal.status != status:
+                key = (appeal.created_at, appeal.id)
+                bucket = self._by_status.get(appeal.status, [])
+                i = bisect.bisect_left(bucket, key)
+                if i < len(bucket) and bucket[i] == key:
+                    del bucket[i]
+                bisect.insort(self._by_status.setdefault(status, []), key)
+                self.aggregates.appeal_status_changed(appeal.status, status)
+                appeal.status = status
+            appeal.updated_at = datetime.now(timezone.utc)
+            return appeal
+
+
+def _row_to_appeal(row: AppealRow) -> Appeal:
+    return Appeal(
+        id=row.id,
+        report_id=row.report_id,
+        user_id=row.user_id,
+        reason=row.reason,
+        status=row.status,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+class PostgresAppealStore:
+    """SQL-backed appeal store; status, report_id and created_at are indexed columns."""
+
+    def __init__(self, aggregates: Optional[SqlTransparencyAggregates] = None) -> None:
+        self.aggregates = aggregates or SqlTransparencyAggregates(engine)
+
+    async def create_appeal(self, data: AppealCreate) -> Appeal:
+        for session in get_session():
+            row = AppealRow(
+                id=str(uuid4()),
+                report_id=data.report_id,
+                user_id=data.user_id,
+                reason=data.reason,
+                status="new",
+            )
+            session.add(row)
+            changes = self.aggregates.changes()
+            changes.appeal_created(row.status, row.created_at)
+            changes.write(session)
+            session.commit()
+            return _row_to_appeal(row)
+
+    async def get_appeal(self, appeal_id: str) -> Optional[Appeal]:
+        for session in get_session():
+            row = session.get(AppealRow, appeal_id)
+            return _row_to_appeal(row) if row else None
+
+    async def list_appeals(
+        self,
+        status: Optional[str] = None,
+        report_id: Optional[str] = None,
+        limit: Optional[int] = 50,
+        offset: int = 0,
+    ) -> List[Appeal]:
+        for session in get_session():
+            stmt = select(AppealRow)
+            if status is not None:
+                stmt = stmt.where(AppealRow.status == status)
+            if report_id is not None:
+                stmt = stmt.where(AppealRow.report_id == report_id)
+            stmt = stmt.order_by(AppealRow.created_at.desc()).offset(offset)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            return [_row_to_appeal(row) for row in session.exec(stmt).all()]
+
+    async def update_status(self, appeal_id: str, status: str) -> Optional[Appeal]:
+        for session in get_session():
+            row = session.get(AppealRow, appeal_id, with_for_update=True)
+            if not row:
+                return None
+            changes = self.aggregates.changes()
+            changes.appeal_status_changed(row.status, status)
+            row.status = status
+            row.updated_at = datetime.now(timezone.utc)
             session.add(row)
+            changes.write(session)
             session.commit()
-            return await self.get_report(report_id)
\ No newline at end of file
+            return _row_to_appeal(row)
@@ -1,5 +1,7 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-# Run the moderation service
+# Run the moderation service; shared/ lives at the repository root
+cd "$(dirname "$0")"
+export PYTHONPATH="$(cd .. && pwd)${PYTHONPATH:+:$PYTHONPATH}"
 exec uvicorn app.main:app --host 0.0.0.0 --port 8082 --reload
\ No newline at end of file
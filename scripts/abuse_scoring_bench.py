@@ -0,0 +1,109 @@
+"""Report scoring throughput with a large term list: Aho-Corasick vs a per-term scan.
+
+Builds ``--terms`` synthetic terms (one to three words, plus the built-in
+threat terms) into ``ReportScorer``, then scores ``--texts`` report texts
+of 40-600 characters, a share of which contain listed terms. For
+comparison, a naive scorer that runs one ``re`` search per term is timed on
+``--naive-texts`` of the same texts (it is far too slow for the full set)
+and both are checked to find the same terms.
+
+    python scripts/abuse_scoring_bench.py --terms 50000 --texts 20000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SYLLABLES = "ka ze lo mu ti ra ne so bi gu pa we do fi ya ho ku ma nu le".split()
+FILLER = (
+    "the this is a post about our ward meeting tonight please share link here you are send me now "
+    "group chat taxi rank fees paid stokvel rent water outage again why report admin offer reply"
+).split()
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def _terms(n: int, rng: random.Random):
+    from moderation_service.app.scoring import DEFAULT_TERMS
+
+    terms = dict(DEFAULT_TERMS)
+    while len(terms) < n:
+        terms[" ".join(_word(rng) for _ in range(rng.randint(1, 3)))] = float(rng.choice((5, 10, 20, 40)))
+    return terms
+
+
+def _texts(n: int, terms, rng: random.Random):
+    listed = list(terms)
+    texts = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(8, 100))]
+        # About a third of reports contain one to three listed terms
+        if rng.random() < 0.33:
+            for _ in range(rng.randint(1, 3)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(listed))
+        texts.append(" ".join(words))
+    return texts
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--terms", type=int, default=50_000)
+    p.add_argument("--texts", type=int, default=20_000)
+    p.add_argument("--naive-texts", type=int, default=20)
+    p.add_argument("--seed", type=int, default=11)
+    args = p.parse_args(argv)
+
+    from moderation_service.app.models import ReportCreate
+    from moderation_service.app.scoring import ReportScorer
+
+    rng = random.Random(args.seed)
+    terms = _terms(args.terms, rng)
+    texts = _texts(args.texts, terms, rng)
+    reports = [ReportCreate(content_id=f"c{i}", content_text=t, reason="harassment", reporter_id=f"u{i % 500}") for i, t in enumerate(texts)]
+    chars = sum(len(t) for t in texts)
+
+    start = time.perf_counter()
+    scorer = ReportScorer(terms)
+    build = time.perf_counter() - start
+    print(f"{len(scorer.matcher):,} terms, automaton built in {build:.2f}s")
+
+    start = time.perf_counter()
+    scores = [scorer.score(r) for r in reports]
+    elapsed = time.perf_counter() - start
+    hits = sum(1 for t in texts if scorer.matcher.matches(t))
+    print(
+        f"aho-corasick  {len(texts) / elapsed:>10,.0f} reports/s  {chars / elapsed / 1e6:6.2f} MB/s  "
+        f"({hits:,} of {len(texts):,} texts matched, max priority {max(scores):.0f})"
+    )
+
+    sample = texts[: args.naive_texts]
+    # Whole-word matches where a word character is alphanumeric, as in TermMatcher
+    patterns = [(t, re.compile(r"(?<![^\W_])" + re.escape(t) + r"(?![^\W_])")) for t in scorer.matcher.terms]
+    start = time.perf_counter()
+    naive = []
+    for text in sample:
+        lowered = text.lower()
+        naive.append({t for t, pattern in patterns if pattern.search(lowered)})
+    naive_elapsed = time.perf_counter() - start
+    print(f"per-term re    {len(sample) / naive_elapsed:>10,.0f} reports/s  (on {len(sample)} texts)")
+    print(f"speedup        {naive_elapsed / len(sample) / (elapsed / len(texts)):>10,.0f}x")
+
+    for text, expected in zip(sample, naive):
+        found = set(scorer.matched_terms(text))
+        if found != expected:
+            print(f"FAILED: automaton and per-term scan disagree on {text[:80]!r}: {sorted(found ^ expected)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
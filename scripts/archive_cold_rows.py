@@ -0,0 +1,80 @@
+"""Move cold LedgerEntry (wallet) or WardIngest (events) rows into archive segments.
+
+Rows older than the retention horizon are written to compressed column
+segments under the archive directory, one segment per group or ward per
+batch, and then deleted from the database. The wallet app reads
+``ARCHIVE_DIR`` and ``ARCHIVE_RETENTION_DAYS`` (default 90); events_service
+reads ``EVENTS_ARCHIVE_DIR`` and ``EVENTS_ARCHIVE_RETENTION_DAYS`` (default
+30). Run it from cron:
+
+    ARCHIVE_DIR=/var/lib/wallet/archive python scripts/archive_cold_rows.py --service wallet
+    python scripts/archive_cold_rows.py --service events --older-than-days 7 --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _targets(service: str):
+    # The two apps share SQLModel metadata, so only one of them is imported
+    if service == "wallet":
+        from shared.archive import archive_cold_rows
+        from app.db import archive, engine, init_db, shards, write_engine
+        from app.models import LedgerEntry
+
+        init_db()
+        # Every wallet shard holds ledger entries; they share one archive
+        engines = [write_engine if shard.engine is engine else shard.engine for shard in shards.shards]
+        return archive_cold_rows, engines, archive, LedgerEntry, "group_id", "created_at", int(os.environ.get("ARCHIVE_RETENTION_DAYS", "90"))
+    from shared.archive import archive_cold_rows
+    from events_service.app.db import archive, init_db, write_engine
+    from events_service.app.models import WardIngest
+    from events_service.app.settings import get_settings
+
+    init_db()
+    return archive_cold_rows, [write_engine], archive, WardIngest, "ward", "received_at", get_settings().archive_retention_days
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--service", choices=("wallet", "events"), required=True)
+    p.add_argument("--older-than-days", type=int, help="retention horizon (default: from the service's settings)")
+    p.add_argument("--batch-size", type=int, default=50_000)
+    p.add_argument("--dry-run", action="store_true", help="only count the rows that would move")
+    args = p.parse_args(argv)
+
+    from sqlalchemy import func
+    from sqlmodel import Session, select
+
+    archive_cold_rows, engines, archive, model, key_column, ts_column, retention_days = _targets(args.service)
+    if archive is None:
+        print(f"{args.service}: no archive directory configured", file=sys.stderr)
+        return 2
+    cutoff = datetime.utcnow() - timedelta(days=args.older_than_days if args.older_than_days is not None else retention_days)
+    if args.dry_run:
+        count = 0
+        for engine in engines:
+            with Session(engine) as session:
+                count += session.exec(select(func.count()).select_from(model).where(getattr(model, ts_column) < cutoff)).one()
+        print(f"{args.service}: {count} {model.__tablename__} rows older than {cutoff.isoformat()}")
+        return 0
+    moved = sum(
+        archive_cold_rows(engine, archive, model, key_column, ts_column, cutoff, batch_size=args.batch_size) for engine in engines
+    )
+    entries = archive.entries(model.__tablename__)
+    print(
+        f"{args.service}: archived {moved} {model.__tablename__} rows older than {cutoff.isoformat()}; "
+        f"archive holds {sum(e['rows'] for e in entries)} rows in {len(entries)} segments "
+        f"({sum(e['bytes'] for e in entries) / 1024:.1f} KiB)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Show where wallet groups live, or move a group to another shard while the app runs.
+
+Shards come from ``WALLET_SHARD_URLS`` (comma-separated, in shard order),
+exactly as the app sees them; run this with the app's environment. During a
+move, writes to the group get 503 with ``Retry-After`` for roughly twice
+``WALLET_SHARD_REFRESH_SECONDS`` plus the copy time; reads are not blocked.
+
+    python scripts/move_wallet_group.py --show group-a group-b
+    python scripts/move_wallet_group.py --group group-a --to 2
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--show", nargs="+", metavar="GROUP", help="print the shard each group lives on")
+    p.add_argument("--group", help="group to move")
+    p.add_argument("--to", type=int, help="target shard index")
+    p.add_argument("--settle", type=float, help="seconds to wait after each pin change (default: 2x refresh + 1)")
+    args = p.parse_args(argv)
+    if not args.show and (args.group is None or args.to is None):
+        p.error("use --show GROUP... or --group GROUP --to SHARD")
+
+    from app.db import init_db, shards
+
+    init_db()
+    if args.show:
+        for group_id in args.show:
+            index = shards.shard_index(group_id)
+            pinned = "" if index == shards.home_index(group_id) else " (pinned)"
+            print(f"{group_id}: shard {index}{pinned}")
+        return 0
+    if not shards.sharded:
+        print("WALLET_SHARD_URLS lists fewer than two shards; nothing to move", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    copied = shards.move_group(args.group, args.to, settle=args.settle)
+    if not copied:
+        print(f"{args.group}: already on shard {args.to}")
+        return 0
+    rows = ", ".join(f"{n} {table}" for table, n in copied.items() if n)
+    print(f"{args.group}: moved to shard {args.to} in {time.perf_counter() - start:.1f}s ({rows or 'no rows'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Bytes per report held by the moderation in-memory store: Pydantic models vs compact records.
+
+Generates ``--reports`` submissions (reasons and reporters drawn from small
+pools, 40-600 characters of content text, a share of repeat submissions
+for the same content) and measures with tracemalloc what each
+representation keeps alive:
+
+* ``pydantic``: a ``Report`` per report in a dict keyed by id, as the
+  store held them before;
+* ``compact``: ``InMemoryReportStore``'s ``ReportRecord`` objects, built
+  through ``submit_report``.
+
+It also times turning every compact record back into a ``Report``
+(``list_reports``), the cost paid at the API boundary.
+
+    python scripts/report_store_memory.py --reports 200000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REASONS = ("spam", "harassment", "hate_speech", "scam", "violence", "misinformation")
+WORDS = (
+    "the this is a post about our ward meeting tonight please share link click here free money "
+    "you are send me now group chat taxi rank fees paid stokvel rent water outage again why "
+    "report admin scam offer loan urgent reply winner prize account verify details"
+).split()
+
+
+def _submissions(n: int, seed: int):
+    from moderation_service.app.models import ReportCreate
+
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        # About one submission in five repeats content that was already reported
+        content = f"post_{rng.randrange(i)}" if i and rng.random() < 0.2 else f"post_{i}"
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 100))]
+        out.append(
+            ReportCreate(
+                content_id=content,
+                content_text=" ".join(words),
+                reason=rng.choice(REASONS),
+                reporter_id=f"user_{rng.randrange(50_000)}",
+            )
+        )
+    return out
+
+
+def _measure(build) -> tuple:
+    # Build times under tracemalloc are meaningless, so only the retained bytes are reported
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return kept, used
+
+
+def _pydantic_store(submissions):
+    from moderation_service.app.models import Report
+
+    reports, open_by_content = {}, {}
+    for data in submissions:
+        report_id = open_by_content.get(data.content_id)
+        if report_id is not None:
+            report = reports[report_id]
+            report.reporter_count += 1
+            report.reason_counts[data.reason] = report.reason_counts.get(data.reason, 0) + 1
+            continue
+        report = Report(
+            content_id=data.content_id,
+            content_text=data.content_text,
+            reason=data.reason,
+            reporter_id=data.reporter_id,
+            reason_counts={data.reason: 1},
+        )
+        reports[report.id] = report
+        open_by_content[data.content_id] = report.id
+    return reports, open_by_content
+
+
+def _compact_store(submissions):
+    from moderation_service.app.aggregates import TransparencyAggregates
+    from moderation_service.app.storage import InMemoryReportStore
+
+    store = InMemoryReportStore(audit=_NullAudit(), aggregates=TransparencyAggregates())
+
+    async def fill() -> None:
+        for data in submissions:
+            await store.submit_report(data)
+
+    asyncio.run(fill())
+    return store
+
+
+class _NullAudit:
+    def record(self, entry) -> None:
+        pass
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--reports", type=int, default=100_000, help="submissions to generate")
+    p.add_argument("--seed", type=int, default=7)
+    args = p.parse_args(argv)
+
+    submissions = _submissions(args.reports, args.seed)
+    # Imported up front so module objects are not counted against either representation
+    import moderation_service.app.storage  # noqa: F401
+    text_bytes = sum(len(s.content_text) for s in submissions)
+    print(f"{args.reports:,} submissions, {text_bytes / args.reports:.0f} chars of content text on average")
+
+    (reports, _), pydantic_bytes = _measure(lambda: _pydantic_store(submissions))
+    count = len(reports)
+    del reports
+    store, compact_bytes = _measure(lambda: _compact_store(submissions))
+    assert len(store._reports) == count, (len(store._reports), count)
+
+    print(f"{count:,} reports after coalescing")
+    print(f"{'representation':<16} {'bytes/report':>13} {'total MiB':>10}")
+    for label, used in (("pydantic", pydantic_bytes), ("compact", compact_bytes)):
+        print(f"{label:<16} {used / count:>13,.0f} {used / 2**20:>10.1f}")
+    print(f"compact keeps {compact_bytes / pydantic_bytes:.0%} of the pydantic footprint")
+
+    start = time.perf_counter()
+    listed = asyncio.run(store.list_reports())
+    elapsed = time.perf_counter() - start
+    print(f"list_reports materialized {len(listed):,} reports in {elapsed:.2f}s ({len(listed) / elapsed:,.0f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
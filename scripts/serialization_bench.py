@@ -0,0 +1,166 @@
+"""Serialization throughput per response model: FastAPI's response_model path vs orjson rows.
+
+For each model this builds ``--rows`` unsaved ORM rows (or pydantic models
+for moderation) and times turning the list into JSON bytes:
+
+* ``fastapi``: validate against ``List[Model]``, dump in JSON mode and
+  ``json.dumps``, which is what a ``response_model`` endpoint does;
+* ``rows_response``: ``serialization.rows_response``, i.e. a precompiled
+  field getter and orjson with no validation (pydantic's own serializer for
+  rows that already are model instances);
+* ``rows_response+validate``: the same with ``SERIALIZE_VALIDATE=1``.
+
+events_service has no read models, so its hand-built ``.isoformat()`` dicts
+through ``jsonable_encoder`` are compared with ``serialize_event``.
+Each service runs in its own interpreter (the wallet and events apps share
+SQLModel table names).
+
+    python scripts/serialization_bench.py --rows 10000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _fastapi_path(model, rows) -> bytes:
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(List[model])
+    content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _compare(service: str, model, rows, serialization, repeat: int) -> None:
+    n = len(rows)
+
+    def validated() -> bytes:
+        serialization.VALIDATE = True
+        try:
+            return serialization.rows_response(rows, model).body
+        finally:
+            serialization.VALIDATE = False
+
+    results = [
+        ("fastapi", _time(lambda: _fastapi_path(model, rows), repeat)),
+        ("rows_response", _time(lambda: serialization.rows_response(rows, model).body, repeat)),
+        ("rows_response+validate", _time(validated, repeat)),
+    ]
+    base = results[0][1]
+    for label, elapsed in results:
+        print(f"{service:<11} {model.__name__:<18} {label:<22} {n / elapsed:>12,.0f} rows/s  {base / elapsed:5.1f}x")
+
+
+def bench_wallet(n: int, repeat: int) -> None:
+    from shared import serialization
+    from app.models import RSVP, Event, EventRead, RSVPRead, WalletRequest, WalletRequestRead
+
+    now = datetime.utcnow()
+    requests = [
+        WalletRequest(
+            id=i, group_id=f"g{i % 50}", requester_id=f"m{i % 200}", amount_cents=100 + i, currency="ZAR",
+            status="requested", created_at=now, updated_at=now, expires_at=now + timedelta(days=1),
+        )
+        for i in range(n)
+    ]
+    events = [
+        Event(id=i, title=f"Event {i}", description="desc", location="HQ", start_time=now, end_time=now, created_at=now, updated_at=now)
+        for i in range(n)
+    ]
+    rsvps = [RSVP(id=i, event_id=1, name=f"Guest {i}", email=f"g{i}@example.test", created_at=now, updated_at=now) for i in range(n)]
+    _compare("wallet", WalletRequestRead, requests, serialization, repeat)
+    _compare("wallet", EventRead, events, serialization, repeat)
+    _compare("wallet", RSVPRead, rsvps, serialization, repeat)
+
+
+def bench_events(n: int, repeat: int) -> None:
+    from fastapi.encoders import jsonable_encoder
+
+    from events_service.app.main import serialize_event
+    from events_service.app.models import Event
+    from shared.serialization import dumps
+
+    now = datetime.utcnow()
+    events = [
+        Event(id=i, slug=f"e-{i}", title=f"Event {i}", description="desc", location="HQ", start_at=now, end_at=None, capacity=100, is_published=True)
+        for i in range(n)
+    ]
+
+    def handbuilt() -> bytes:
+        def serialize(e):
+            return {
+                "id": e.id, "slug": e.slug, "title": e.title, "description": e.description, "location": e.location,
+                "start_at": e.start_at.isoformat(), "end_at": e.end_at.isoformat() if e.end_at else None,
+                "capacity": e.capacity, "is_published": e.is_published,
+            }
+        content = jsonable_encoder({"ok": True, "events": [serialize(e) for e in events]})
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    results = [
+        ("isoformat dicts", _time(handbuilt, repeat)),
+        ("serialize_event", _time(lambda: dumps({"ok": True, "events": [serialize_event(e) for e in events]}), repeat)),
+    ]
+    base = results[0][1]
+    for label, elapsed in results:
+        print(f"{'events':<11} {'Event':<18} {label:<22} {n / elapsed:>12,.0f} rows/s  {base / elapsed:5.1f}x")
+
+
+def bench_moderation(n: int, repeat: int) -> None:
+    from shared import serialization
+    from moderation_service.app.models import Appeal, Report
+
+    now = datetime.now(timezone.utc)
+    reports = [
+        Report(content_id=f"c{i}", content_text="some text " * 5, reason="spam", reporter_id=f"u{i}", reason_counts={"spam": 2, "abuse": 1}, created_at=now, updated_at=now)
+        for i in range(n)
+    ]
+    appeals = [Appeal(report_id=f"r{i}", user_id=f"u{i}", reason="mistake") for i in range(n)]
+    _compare("moderation", Report, reports, serialization, repeat)
+    _compare("moderation", Appeal, appeals, serialization, repeat)
+
+
+BENCHES = {"wallet": bench_wallet, "events": bench_events, "moderation": bench_moderation}
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--service", choices=("all", *BENCHES), default="all")
+    p.add_argument("--rows", type=int, default=10_000)
+    p.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = p.parse_args(argv)
+
+    if args.service != "all":
+        BENCHES[args.service](args.rows, args.repeat)
+        return 0
+    print(f"{'service':<11} {'model':<18} {'path':<22} {'throughput':>12}        vs first")
+    for service in BENCHES:
+        code = subprocess.call(
+            [sys.executable, os.path.abspath(__file__), "--service", service, "--rows", str(args.rows), "--repeat", str(args.repeat)],
+            cwd=ROOT,
+        )
+        if code:
+            return code
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Writes/sec for RSVP-style transactions on SQLite, per-request commits vs the group-commit writer.
+
+Each transaction reads the event, counts RSVPs, checks for a duplicate and
+inserts an RSVP and its ticket, as the RSVP endpoints do.
+``--threads`` workers play the request threadpool.
+
+    python scripts/sqlite_write_bench.py --threads 16 --writes 4000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, select  # noqa: E402
+
+from events_service.app.models import RSVP, Event, Ticket  # noqa: E402
+from shared.sqlite_writer import WriteQueue, configure_sqlite  # noqa: E402
+
+
+def _write(session: Session, i: int) -> None:
+    # Same shape as the RSVP handlers: look up the event, check capacity and duplicates, then insert
+    event = session.exec(select(Event).where(Event.slug == "bench")).one()
+    session.exec(select(func.count()).select_from(RSVP).where(RSVP.event_id == event.id)).one()
+    session.exec(select(RSVP).where(RSVP.event_id == event.id).where(RSVP.email == f"guest{i}@example.test")).first()
+    rsvp = RSVP(event_id=1, name=f"Guest {i}", email=f"guest{i}@example.test", status="confirmed")
+    session.add(rsvp)
+    session.flush()
+    session.add(Ticket(rsvp_id=rsvp.id, token=f"token-{i}", status="valid"))
+    session.flush()
+
+
+def _prepare(path: str, production: bool):
+    engine = create_engine(f"sqlite:///{path}", echo=False)
+    if production:
+        configure_sqlite(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(slug="bench", title="Bench", start_at=datetime.utcnow()))
+        session.commit()
+    return engine
+
+
+def _drive(threads: int, writes: int, write_one: Callable[[int], None]) -> tuple:
+    counter = iter(range(writes))
+    lock = threading.Lock()
+    errors = [0]
+
+    def worker() -> None:
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            try:
+                write_one(i)
+            except OperationalError:
+                errors[0] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start, errors[0]
+
+
+def bench_per_request(path: str, threads: int, writes: int) -> tuple:
+    engine = _prepare(path, production=False)
+
+    def write_one(i: int) -> None:
+        with Session(engine) as session:
+            _write(session, i)
+            session.commit()
+
+    return _drive(threads, writes, write_one)
+
+
+def bench_group_commit(path: str, threads: int, writes: int) -> tuple:
+    engine = _prepare(path, production=True)
+    writer = WriteQueue(engine)
+    try:
+        return _drive(threads, writes, lambda i: writer.submit(lambda session: _write(session, i)))
+    finally:
+        writer.close()
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--threads", type=int, default=16)
+    p.add_argument("--writes", type=int, default=2000)
+    p.add_argument("--dir", help="where to put the databases (default: a temp dir; use a real disk, not tmpfs)")
+    args = p.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="sqlite-bench-", dir=args.dir)
+    for label, bench in (("per-request commit", bench_per_request), ("WAL + group commit", bench_group_commit)):
+        elapsed, errors = bench(os.path.join(workdir, f"{bench.__name__}.db"), args.threads, args.writes)
+        ok = args.writes - errors
+        print(f"{label:<20} {ok / elapsed:9.0f} writes/s  ({ok} ok, {errors} 'database is locked' errors, {elapsed:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
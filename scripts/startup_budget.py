@@ -0,0 +1,113 @@
+"""Cold-start report for the Python services.
+
+For each app this runs two fresh interpreters:
+
+* ``python -X importtime -c "import <module>"``, digested into the total
+  import time and the slowest modules by self time;
+* a driver that imports the app, runs its startup hooks and serves one
+  request, timing import-to-first-response.
+
+It also lists modules which should load lazily (qrcode, ics, jinja2, ...)
+but were imported on the way to the first request. The budgets themselves
+are enforced by tests/test_startup.py; this is for finding what to defer.
+
+    python scripts/startup_budget.py
+    python scripts/startup_budget.py --service events --top 25
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, NamedTuple, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Target(NamedTuple):
+    module: str
+    factory: str
+    path: str
+    lazy: Tuple[str, ...]
+
+
+TARGETS: Dict[str, Target] = {
+    "wallet": Target("app.main", "app", "/metrics", ("jinja2",)),
+    "events": Target("events_service.app.main", "app", "/metrics", ("qrcode", "PIL", "ics", "arrow", "jinja2")),
+    "moderation": Target("moderation_service.app.main", "app", "/metrics", ("jinja2",)),
+}
+
+_DRIVER = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module} as m
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(m.{factory}) as client:
+    status = client.get({path!r}).status_code
+t2 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "ttfr_ms": (t2 - t0) * 1000, "status": status,
+                  "eager": [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def _env(workdir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'wallet.db')}")
+    env.setdefault("EVENTS_DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'events.db')}")
+    env.setdefault("AUDIT_LOG_PATH", os.path.join(workdir, "audit.log"))
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def importtime_digest(module: str, env: Dict[str, str], top: int) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Total import time of ``module`` in ms and the ``top`` slowest modules as (name, self_ms, cumulative_ms)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    rows: List[Tuple[str, float, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(self_us) / 1000.0, int(cumulative_us) / 1000.0))
+    total = sum(self_ms for _, self_ms, _ in rows)
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return total, rows[:top]
+
+
+def first_request(target: Target, env: Dict[str, str]) -> dict:
+    driver = _DRIVER.format(module=target.module, factory=target.factory, path=target.path, lazy=target.lazy)
+    proc = subprocess.run(
+        [sys.executable, "-c", driver], cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--service", choices=[*TARGETS, "all"], default="all")
+    p.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = p.parse_args(argv)
+
+    for name in TARGETS if args.service == "all" else [args.service]:
+        target = TARGETS[name]
+        env = _env(tempfile.mkdtemp(prefix="startup-"))
+        total_ms, slowest = importtime_digest(target.module, env, args.top)
+        result = first_request(target, env)
+        print(f"== {name} ({target.module})")
+        print(f"   -X importtime total: {total_ms:.1f} ms")
+        for module, self_ms, cumulative_ms in slowest:
+            print(f"   {self_ms:9.1f} ms self {cumulative_ms:9.1f} ms cumulative  {module}")
+        print(f"   import {result['import_ms']:.1f} ms, first response {result['ttfr_ms']:.1f} ms (HTTP {result['status']})")
+        if result["eager"]:
+            print(f"   imported at startup but should be lazy: {', '.join(result['eager'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Modules shared by the wallet app, events_service and moderation_service
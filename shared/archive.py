@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import threading
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Integer, delete
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+MAGIC = b"SEG1"
+_EPOCH = datetime(1970, 1, 1)
+
+# A segment file is MAGIC, a 4-byte header length, a JSON header and then one
+# zlib-compressed block per column. Readers only inflate the columns they ask
+# for. Column encodings:
+#   int  JSON list of ints (None allowed)
+#   ts   naive UTC datetimes as epoch microseconds, delta-encoded when non-null
+#   str  dictionary-encoded: {"values": [...], "codes": [...]}
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _encode_column(kind: str, values: Sequence[Any]) -> Tuple[dict, Any]:
+    if kind == "ts":
+        micros = [None if v is None else _to_micros(v) for v in values]
+        if None in micros:
+            return {"delta": False}, micros
+        deltas = [b - a for a, b in zip([0] + micros[:-1], micros)]
+        return {"delta": True}, deltas
+    if kind == "str":
+        index: Dict[Any, int] = {}
+        codes = [index.setdefault(v, len(index)) for v in values]
+        return {}, {"values": list(index), "codes": codes}
+    return {}, list(values)
+
+
+def _decode_column(kind: str, meta: dict, data: Any) -> List[Any]:
+    if kind == "ts":
+        if meta.get("delta"):
+            out, total = [], 0
+            for d in data:
+                total += d
+                out.append(_from_micros(total))
+            return out
+        return [None if v is None else _from_micros(v) for v in data]
+    if kind == "str":
+        values = data["values"]
+        return [values[c] for c in data["codes"]]
+    return data
+
+
+def write_segment(path: str, columns: Sequence[Tuple[str, str]], rows: Sequence[Sequence[Any]]) -> int:
+    """Writes ``rows`` (tuples in ``columns`` order) to ``path`` and fsyncs it; returns its size."""
+    blocks: List[bytes] = []
+    header: Dict[str, Any] = {"rows": len(rows), "columns": []}
+    for i, (name, kind) in enumerate(columns):
+        meta, data = _encode_column(kind, [row[i] for row in rows])
+        block = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 9)
+        header["columns"].append({"name": name, "kind": kind, "length": len(block), **meta})
+        blocks.append(block)
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack(">I", len(head)) + head)
+        for block in blocks:
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def read_segment(path: str, columns: Optional[Sequence[str]] = None) -> Dict[str, List[Any]]:
+    """Returns ``{column: values}`` for the requested columns (all by default)."""
+    wanted = set(columns) if columns is not None else None
+    out: Dict[str, List[Any]] = {}
+    with open(path, "rb") as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"{path} is not a segment file")
+        (head_len,) = struct.unpack(">I", f.read(4))
+        header = json.loads(f.read(head_len))
+        for col in header["columns"]:
+            if wanted is not None and col["name"] not in wanted:
+                f.seek(col["length"], os.SEEK_CUR)
+                continue
+            data = json.loads(zlib.decompress(f.read(col["length"])))
+            out[col["name"]] = _decode_column(col["kind"], col, data)
+    return out
+
+
+class SegmentArchive:
+    """Immutable column segments under ``root`` indexed by ``manifest.json``.
+
+    Each manifest entry records the table, the partition key (group or ward),
+    the time range and row count of one segment, so readers pick segments
+    without opening them. Segments are written and fsynced before the
+    manifest is atomically replaced, and the manifest is reloaded whenever
+    another process (the archiver) has rewritten it.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self._lock = threading.Lock()
+        self._entries: List[dict] = []
+        self._mtime: Optional[int] = None
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, var: str = "ARCHIVE_DIR") -> Optional["SegmentArchive"]:
+        root = os.environ.get(var)
+        return cls(root) if root else None
+
+    # --- manifest ---
+
+    def entries(self, table: str, key: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[dict]:
+        """Manifest entries for ``table`` overlapping ``[start, end)``, optionally for one key."""
+        self._refresh()
+        lo = start.isoformat() if start else None
+        hi = end.isoformat() if end else None
+        return [
+            e
+            for e in self._entries
+            if e["table"] == table
+            and (key is None or e["key"] == key)
+            and (lo is None or e["max_ts"] >= lo)
+            and (hi is None or e["min_ts"] < hi)
+        ]
+
+    def latest(self, table: str) -> Dict[str, datetime]:
+        """Newest archived timestamp per key, from the manifest alone."""
+        out: Dict[str, str] = {}
+        for e in self.entries(table):
+            if e["max_ts"] > out.get(e["key"], ""):
+                out[e["key"]] = e["max_ts"]
+        return {k: datetime.fromisoformat(v) for k, v in out.items()}
+
+    def _refresh(self, force: bool = False) -> None:
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime and not force:
+            return
+        with self._lock:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)["segments"]
+            self._mtime = mtime
+
+    def _save(self, entries: List[dict]) -> None:
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"segments": entries}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+
+    # --- segments ---
+
+    def add(self, table: str, segments: Dict[str, Tuple[Sequence[Tuple[str, str]], str, List[Sequence[Any]]]]) -> None:
+        """Writes one segment per key; ``segments`` maps key -> (columns, ts column, rows)."""
+        new_entries = []
+        for key, (columns, ts_column, rows) in segments.items():
+            ts_index = [name for name, _ in columns].index(ts_column)
+            stamps = [row[ts_index] for row in rows]
+            directory = os.path.join(self.root, table)
+            os.makedirs(directory, exist_ok=True)
+            name = f"{min(stamps):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:12]}.seg"
+            size = write_segment(os.path.join(directory, name), columns, rows)
+            new_entries.append(
+                {
+                    "table": table,
+                    "key": key,
+                    "file": f"{table}/{name}",
+                    "rows": len(rows),
+                    "bytes": size,
+                    "min_ts": min(stamps).isoformat(),
+                    "max_ts": max(stamps).isoformat(),
+                }
+            )
+        self._refresh(force=True)
+        with self._lock:
+            self._entries = self._entries + new_entries
+            self._save(self._entries)
+            self._mtime = os.stat(self.manifest_path).st_mtime_ns
+
+    def scan(
+        self,
+        table: str,
+        key: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+        ts_column: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields archived rows as dicts; with ``ts_column`` rows outside ``[start, end)`` are dropped."""
+        wanted = None if columns is None else list(dict.fromkeys(list(columns) + ([ts_column] if ts_column else [])))
+        for entry in self.entries(table, key, start, end):
+            data = read_segment(os.path.join(self.root, entry["file"]), wanted)
+            names = list(data)
+            for values in zip(*(data[n] for n in names)):
+                row = dict(zip(names, values))
+                if ts_column and ((start and row[ts_column] < start) or (end and row[ts_column] >= end)):
+                    continue
+                yield row
+
+
+def _column_kind(column) -> str:
+    if isinstance(column.type, DateTime):
+        return "ts"
+    if isinstance(column.type, Integer):
+        return "int"
+    return "str"
+
+
+def archive_cold_rows(
+    engine: Engine,
+    archive: SegmentArchive,
+    model,
+    key_column: str,
+    ts_column: str,
+    cutoff: datetime,
+    batch_size: int = 50_000,
+) -> int:
+    """Moves rows of ``model`` older than ``cutoff`` into segments, one per key per batch.
+
+    Segments and the manifest are durable before the batch is deleted. If
+    the process dies in between, the rows exist in both places until the
+    next run; readers de-duplicate on the primary key.
+    """
+    table = model.__table__
+    columns = [(c.name, _column_kind(c)) for c in table.columns]
+    ts = getattr(model, ts_column)
+    moved = 0
+    while True:
+        with Session(engine) as session:
+            rows = session.exec(select(model).where(ts < cutoff).order_by(ts, model.id).limit(batch_size)).all()
+            if not rows:
+                return moved
+            by_key: Dict[str, List[Sequence[Any]]] = {}
+            for row in rows:
+                by_key.setdefault(str(getattr(row, key_column)), []).append(tuple(getattr(row, name) for name, _ in columns))
+            archive.add(table.name, {key: (columns, ts_column, items) for key, items in by_key.items()})
+            session.execute(delete(model).where(model.id.in_([row.id for row in rows])))
+            session.commit()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            return moved
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import anyio
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# (content-type prefix, minimum body size or None for never), first match wins; types not listed are not compressed
+DEFAULT_POLICY: Tuple[Tuple[str, Optional[int]], ...] = (
+    # Live feeds: compressing would hold events back until a flush
+    ("text/event-stream", None),
+    ("text/", 1024),
+    ("application/json", 1024),
+    ("application/x-ndjson", 1024),
+    ("application/javascript", 1024),
+    ("application/xml", 1024),
+    ("image/svg+xml", 1024),
+)
+# Streamed bodies are flushed to the client once this much input is pending (and after the first chunk)
+STREAM_FLUSH_BYTES = 16 * 1024
+
+
+def _accepts_gzip(header: bytes) -> bool:
+    for part in header.decode("latin-1").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            name, _, value = params.strip().partition("=")
+            try:
+                return name.strip() != "q" or float(value) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def parse_policy(spec: str) -> List[Tuple[str, Optional[int]]]:
+    """``"text/csv=512,text/event-stream=off"`` -> ``[("text/csv", 512), ("text/event-stream", None)]``."""
+    policy = []
+    for item in spec.split(","):
+        prefix, _, size = item.strip().partition("=")
+        if prefix:
+            policy.append((prefix.strip().lower(), None if size.strip().lower() in ("off", "none", "") else int(size)))
+    return policy
+
+
+class LoopLag:
+    """Samples how late the event loop wakes from a short sleep; ``lag`` is a moving average in seconds."""
+
+    def __init__(self, interval: float = 0.05, alpha: float = 0.3, gauge: Optional[Gauge] = None) -> None:
+        self.interval = interval
+        self.alpha = alpha
+        self.gauge = gauge
+        self.lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            late = max(0.0, loop.time() - started - self.interval)
+            self.lag = self.alpha * late + (1 - self.alpha) * self.lag
+            if self.gauge is not None:
+                self.gauge.set(self.lag * 1000.0)
+
+
+class CompressionMiddleware:
+    """gzip-encodes responses for clients that accept it.
+
+    Which responses qualify is decided by ``policy`` on the Content-Type:
+    bodies below the type's minimum size, unlisted types, responses that
+    already carry a Content-Encoding and HEAD requests pass through as
+    they are. Streamed bodies are compressed chunk by chunk: the first
+    chunk (a page's head) and every ``STREAM_FLUSH_BYTES`` of input are
+    sync-flushed so the client is never waiting on the compressor. The
+    level is ``level``, or ``busy_level`` while the event loop lags more
+    than ``busy_lag`` seconds; whole bodies of ``offload_size`` bytes or
+    more are compressed in a worker thread.
+    """
+
+    def __init__(
+        self,
+        app,
+        policy: Sequence[Tuple[str, Optional[int]]] = DEFAULT_POLICY,
+        level: int = 6,
+        busy_level: int = 1,
+        busy_lag: float = 0.025,
+        offload_size: int = 256 * 1024,
+        loop_lag: Optional[LoopLag] = None,
+        registry: Optional[CollectorRegistry] = None,
+    ) -> None:
+        self.app = app
+        self.policy = [(prefix.lower(), size) for prefix, size in policy]
+        self.level = level
+        self.busy_level = busy_level
+        self.busy_lag = busy_lag
+        self.offload_size = offload_size
+        self._responses = Counter(
+            "http_compression_responses_total",
+            "Responses seen by the compression middleware, by outcome",
+            labelnames=("outcome",),
+            registry=registry,
+        )
+        self._bytes_in = Counter(
+            "http_compression_bytes_in_total", "Response bytes before compression", labelnames=("level",), registry=registry
+        )
+        self._bytes_saved = Counter(
+            "http_compression_bytes_saved_total", "Response bytes saved by compression", labelnames=("level",), registry=registry
+        )
+        self._seconds = Histogram(
+            "http_compression_seconds",
+            "Time spent compressing one response body or chunk",
+            labelnames=("level",),
+            buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+            registry=registry,
+        )
+        self.loop_lag = loop_lag or LoopLag()
+
+    def _minimum_size(self, content_type: str) -> Optional[int]:
+        content_type = content_type.lower()
+        for prefix, size in self.policy:
+            if content_type.startswith(prefix):
+                return size
+        return None
+
+    def current_level(self) -> int:
+        return self.busy_level if self.loop_lag.lag > self.busy_lag else self.level
+
+    def _record(self, level: int, size_in: int, size_out: int, seconds: float) -> None:
+        label = str(level)
+        self._bytes_in.labels(label).inc(size_in)
+        self._bytes_saved.labels(label).inc(size_in - size_out)
+        self._seconds.labels(label).observe(seconds)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        if not _accepts_gzip(dict(scope.get("headers") or []).get(b"accept-encoding", b"")):
+            await self.app(scope, receive, send)
+            return
+        self.loop_lag.start()
+        await self.app(scope, receive, _Responder(self, send).send)
+
+
+class _Responder:
+    """Per-response state: holds ``http.response.start`` until the first body chunk decides the encoding."""
+
+    def __init__(self, middleware: CompressionMiddleware, send) -> None:
+        self.middleware = middleware
+        self.downstream = send
+        self.start: Optional[dict] = None
+        self.compressor = None
+        self.level = 0
+        self.passthrough = False
+        self.buffer: Optional[List[bytes]] = None
+        self.pending = 0
+        self.size_in = 0
+        self.size_out = 0
+        self.seconds = 0.0
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+        if self.passthrough:
+            await self.downstream(message)
+        elif self.buffer is not None:
+            self.buffer.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._whole(b"".join(self.buffer))
+        elif self.compressor is not None:
+            await self._stream(message)
+        else:
+            await self._first(message)
+
+    def _skip(self, headers: dict, body: bytes, more_body: bool) -> Optional[str]:
+        m = self.middleware
+        status = self.start["status"]
+        if status < 200 or status in (204, 304):
+            return "status"
+        if b"content-encoding" in headers:
+            return "encoded"
+        minimum = m._minimum_size(headers.get(b"content-type", b"").decode("latin-1"))
+        if minimum is None:
+            return "type"
+        known = int(headers[b"content-length"]) if b"content-length" in headers else None
+        if not more_body and len(body) < minimum or known is not None and known < minimum:
+            return "small"
+        return None
+
+    def _headers(self, content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = []
+        vary = []
+        for name, value in self.start["headers"]:
+            lower = name.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"vary":
+                vary.append(value)
+                continue
+            if lower == b"etag" and not value.startswith(b"W/"):
+                # The encoded body is a different representation of the same resource
+                value = b"W/" + value
+            headers.append((name, value))
+        if not any(b"accept-encoding" in v.lower() for v in vary):
+            vary.append(b"Accept-Encoding")
+        headers.append((b"vary", b", ".join(vary)))
+        headers.append((b"content-encoding", b"gzip"))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        return headers
+
+    async def _first(self, message: dict) -> None:
+        m = self.middleware
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = {name.lower(): value for name, value in self.start["headers"]}
+        reason = self._skip(headers, body, more_body)
+        if reason is not None:
+            m._responses.labels(reason).inc()
+            self.passthrough = True
+            await self.downstream(self.start)
+            await self.downstream(message)
+            return
+        self.level = m.current_level()
+        if not more_body:
+            await self._whole(body)
+            return
+        if b"content-length" in headers:
+            # A complete body split into chunks on the way (BaseHTTPMiddleware re-streams every response)
+            self.buffer = [body]
+            return
+        m._responses.labels("streamed").inc()
+        self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        await self.downstream({**self.start, "headers": self._headers(None)})
+        await self._stream(message, flush=True)
+
+    async def _whole(self, body: bytes) -> None:
+        m = self.middleware
+        started = time.perf_counter()
+        if len(body) >= m.offload_size:
+            compressed = await anyio.to_thread.run_sync(_gzip, body, self.level)
+        else:
+            compressed = _gzip(body, self.level)
+        m._record(self.level, len(body), len(compressed), time.perf_counter() - started)
+        m._responses.labels("compressed").inc()
+        await self.downstream({**self.start, "headers": self._headers(len(compressed))})
+        await self.downstream({"type": "http.response.body", "body": compressed})
+
+    async def _stream(self, message: dict, flush: bool = False) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        started = time.perf_counter()
+        out = self.compressor.compress(body)
+        self.pending += len(body)
+        if not more_body:
+            out += self.compressor.flush(zlib.Z_FINISH)
+        elif flush or self.pending >= STREAM_FLUSH_BYTES:
+            out += self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.pending = 0
+        self.seconds += time.perf_counter() - started
+        self.size_in += len(body)
+        self.size_out += len(out)
+        if not more_body:
+            self.middleware._record(self.level, self.size_in, self.size_out, self.seconds)
+        if out or not more_body:
+            await self.downstream({"type": "http.response.body", "body": out, "more_body": more_body})
+
+
+def install_compression(app, registry: Optional[CollectorRegistry] = None) -> None:
+    """Adds ``CompressionMiddleware`` configured from ``COMPRESSION_*``; call it last so it wraps every other middleware."""
+    if os.environ.get("COMPRESSION_ENABLED", "1").lower() in ("0", "false", "no"):
+        return
+    loop_lag = LoopLag(gauge=Gauge("event_loop_lag_ms", "Moving average of event loop wake-up delay in ms", registry=registry))
+    app.add_middleware(
+        CompressionMiddleware,
+        policy=parse_policy(os.environ.get("COMPRESSION_POLICY", "")) + list(DEFAULT_POLICY),
+        level=int(os.environ.get("COMPRESSION_LEVEL", "6")),
+        busy_level=int(os.environ.get("COMPRESSION_BUSY_LEVEL", "1")),
+        busy_lag=float(os.environ.get("COMPRESSION_BUSY_LAG_MS", "25")) / 1000.0,
+        offload_size=int(os.environ.get("COMPRESSION_OFFLOAD_BYTES", str(256 * 1024))),
+        loop_lag=loop_lag,
+        registry=registry,
+    )
+
+    @app.on_event("shutdown")
+    async def stop_loop_lag() -> None:
+        await loop_lag.stop()
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from prometheus_client import CollectorRegistry, Counter
+from sqlalchemy import Column, Float, Integer, LargeBinary, MetaData, String, Table, Text, delete, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from .logs import log_exception
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+
+# Responses a retry could legitimately change are not stored: server errors,
+# timeouts, conflicts and rate limiting
+_UNSTORED_STATUSES = {408, 409, 425, 429}
+# Hop-by-hop and per-response headers are not replayed
+_UNSTORED_HEADERS = {b"x-request-id", b"x-profile-id", b"date", b"server", b"content-length"}
+# A worker that dies mid-request blocks retries of its key for at most this long
+_CLAIM_SECONDS = 60.0
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: Optional[int] = None  # None while the first request is still running
+    headers: Optional[List[Tuple[bytes, bytes]]] = None
+    body: bytes = b""
+
+    @property
+    def pending(self) -> bool:
+        return self.status is None
+
+
+class MemoryStore:
+    """Per-process store; fine for a single worker, retries to other workers re-execute."""
+
+    blocking = False
+
+    def __init__(self) -> None:
+        self._items: Dict[str, Tuple[StoredResponse, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        item = self._items.get(key)
+        if item is None or item[1] <= time.time():
+            return None
+        return item[0]
+
+    def claim(self, key: str, fingerprint: str, expires_at: float) -> bool:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[1] > time.time():
+                return False
+            self._items[key] = (StoredResponse(fingerprint), expires_at)
+            return True
+
+    def complete(self, key: str, response: StoredResponse, expires_at: float) -> None:
+        with self._lock:
+            self._items[key] = (response, expires_at)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def sweep(self, now: float, limit: int) -> int:
+        with self._lock:
+            expired = [k for k, (_, exp) in self._items.items() if exp <= now][:limit]
+            for k in expired:
+                del self._items[k]
+        return len(expired)
+
+
+_metadata = MetaData()
+idempotency_keys = Table(
+    "idempotency_keys",
+    _metadata,
+    Column("key", String(64), primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("status", Integer, nullable=True),
+    Column("headers", Text, nullable=True),
+    Column("body", LargeBinary, nullable=True),
+    Column("expires_at", Float, nullable=False, index=True),
+)
+
+
+class SqlStore:
+    """Keys in the ``idempotency_keys`` table, shared by every worker on the database.
+
+    A claim inserts a pending row; the primary key makes concurrent claims
+    from different processes race safely. Expired rows are treated as absent
+    and replaced on the next claim.
+    """
+
+    blocking = True
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        _metadata.create_all(engine)
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        t = idempotency_keys
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(t.c.fingerprint, t.c.status, t.c.headers, t.c.body)
+                .where(t.c.key == key)
+                .where(t.c.expires_at > time.time())
+            ).first()
+        if row is None:
+            return None
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(row.headers)] if row.headers else None
+        return StoredResponse(row.fingerprint, row.status, headers, row.body or b"")
+
+    def claim(self, key: str, fingerprint: str, expires_at: float) -> bool:
+        t = idempotency_keys
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(delete(t).where(t.c.key == key).where(t.c.expires_at <= time.time()))
+                conn.execute(t.insert().values(key=key, fingerprint=fingerprint, expires_at=expires_at))
+        except IntegrityError:
+            return False
+        return True
+
+    def complete(self, key: str, response: StoredResponse, expires_at: float) -> None:
+        t = idempotency_keys
+        headers = json.dumps([(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.headers or []])
+        with self.engine.begin() as conn:
+            conn.execute(
+                t.update()
+                .where(t.c.key == key)
+                .values(status=response.status, headers=headers, body=response.body, expires_at=expires_at)
+            )
+
+    def release(self, key: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(idempotency_keys).where(idempotency_keys.c.key == key))
+
+    def sweep(self, now: float, limit: int) -> int:
+        t = idempotency_keys
+        with self.engine.begin() as conn:
+            expired = select(t.c.key).where(t.c.expires_at <= now).limit(limit).scalar_subquery()
+            return conn.execute(delete(t).where(t.c.key.in_(expired))).rowcount or 0
+
+
+def _route_pattern(template: str) -> Pattern[str]:
+    parts = re.split(r"(\{[^}]+\})", template)
+    return re.compile("^" + "".join("[^/]+" if p.startswith("{") else re.escape(p) for p in parts) + "$")
+
+
+def principal(scope: Dict[str, Any]) -> str:
+    """Who is retrying: a digest of the Authorization header, else ``X-Client-Id``, else the peer address."""
+    headers = dict(scope.get("headers") or [])
+    auth = headers.get(b"authorization")
+    if auth:
+        return "auth:" + hashlib.sha256(auth).hexdigest()
+    client_id = headers.get(b"x-client-id")
+    if client_id:
+        return "client:" + client_id.decode("latin-1")
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "")
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for a repeated ``Idempotency-Key``.
+
+    Applies to the ``(method, path template)`` pairs in ``routes``. The key is
+    scoped to the principal and route, so two clients (or two endpoints) never
+    share one. The first request runs the handler and its response is kept
+    for ``ttl`` seconds; retries get it back with ``Idempotent-Replayed: true``
+    and the handler is not called. A duplicate that arrives while the first is
+    still running waits for it, in this process via a shared future and across
+    workers by polling the store, and answers 409 after ``wait_timeout``.
+    Reusing a key with a different body is a 422. 5xx responses release the
+    key so a retry runs again.
+    """
+
+    def __init__(
+        self,
+        app,
+        store,
+        routes: Iterable[Tuple[str, str]],
+        ttl: float = 86400.0,
+        wait_timeout: float = 10.0,
+        registry: Optional[CollectorRegistry] = None,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.routes = [(method.upper(), template, _route_pattern(template)) for method, template in routes]
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._requests = Counter(
+            "idempotency_requests_total",
+            "Requests carrying an Idempotency-Key, by outcome",
+            labelnames=("route", "outcome"),
+            registry=registry,
+        )
+
+    async def _store(self, method: str, *args):
+        fn = getattr(self.store, method)
+        if self.store.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _match(self, method: str, path: str) -> Optional[str]:
+        for m, template, pattern in self.routes:
+            if m == method and pattern.match(path):
+                return template
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        template = self._match(scope["method"], scope["path"])
+        header = dict(scope.get("headers") or []).get(IDEMPOTENCY_HEADER) if template else None
+        if not header:
+            await self.app(scope, receive, send)
+            return
+
+        key = hashlib.sha256(
+            "\n".join((principal(scope), scope["method"], template, header.decode("latin-1"))).encode("utf-8")
+        ).hexdigest()
+        body, replay_receive = await _buffer_body(receive)
+        fingerprint = hashlib.sha256(
+            b"\n".join((scope["path"].encode("utf-8"), scope.get("query_string", b""), body))
+        ).hexdigest()
+
+        # Coalesce duplicates within this process: wait for the running one, then look again
+        while key in self._inflight:
+            await asyncio.shield(self._inflight[key])
+        done = asyncio.get_running_loop().create_future()
+        self._inflight[key] = done
+        try:
+            outcome = await self._handle(scope, replay_receive, send, key, fingerprint)
+        finally:
+            del self._inflight[key]
+            done.set_result(None)
+        self._requests.labels(template, outcome).inc()
+
+    async def _handle(self, scope, receive, send, key: str, fingerprint: str) -> str:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            stored = await self._store("get", key)
+            if stored is not None and stored.fingerprint != fingerprint:
+                await _send_error(send, 422, "Idempotency-Key was already used with a different request")
+                return "mismatch"
+            if stored is not None and not stored.pending:
+                await _send_stored(send, stored)
+                return "replayed"
+            if stored is None and await self._store("claim", key, fingerprint, time.time() + _CLAIM_SECONDS):
+                break
+            # Another worker holds the key
+            if time.monotonic() >= deadline:
+                await _send_error(send, 409, "A request with this Idempotency-Key is still in progress")
+                return "conflict"
+            await asyncio.sleep(0.05)
+
+        captured = StoredResponse(fingerprint, headers=[])
+        chunks: List[bytes] = []
+
+        async def capture(message) -> None:
+            if message["type"] == "http.response.start":
+                captured.status = message["status"]
+                captured.headers = [(k, v) for k, v in message.get("headers", []) if k.lower() not in _UNSTORED_HEADERS]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self._store("release", key)
+            raise
+        if captured.status is None or captured.status >= 500 or captured.status in _UNSTORED_STATUSES:
+            await self._store("release", key)
+            return "not_stored"
+        captured.body = b"".join(chunks)
+        await self._store("complete", key, captured, time.time() + self.ttl)
+        return "stored"
+
+
+async def _buffer_body(receive):
+    chunks: List[bytes] = []
+    more = True
+    while more:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        more = message.get("more_body", False)
+    body = b"".join(chunks)
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay
+
+
+async def _send_stored(send, stored: StoredResponse) -> None:
+    headers = list(stored.headers or [])
+    headers.append((b"content-length", str(len(stored.body)).encode("latin-1")))
+    headers.append((REPLAYED_HEADER, b"true"))
+    await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+    await send({"type": "http.response.body", "body": stored.body})
+
+
+async def _send_error(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class KeySweeper:
+    """Deletes expired keys every ``interval`` seconds, ``batch`` rows per statement.
+
+    A failed sweep is logged and counted and retried on the next interval.
+    """
+
+    def __init__(self, store, interval: float = 60.0, batch: int = 500, registry: Optional[CollectorRegistry] = None) -> None:
+        self.store = store
+        self.interval = interval
+        self.batch = batch
+        self._task: Optional[asyncio.Task] = None
+        self.failures_total = Counter(
+            "idempotency_sweep_failures_total", "Expired-key sweeps that raised", registry=registry
+        )
+
+    def sweep(self) -> int:
+        total = 0
+        while True:
+            removed = self.store.sweep(time.time(), self.batch)
+            total += removed
+            if removed < self.batch:
+                return total
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as exc:
+                self.failures_total.inc()
+                log_exception("idempotency_sweep_failed", exc)
+
+
+def store_from_env(engine: Engine):
+    """``IDEMPOTENCY_STORE=sql`` keeps keys in the service database; the default is in memory."""
+    if os.environ.get("IDEMPOTENCY_STORE", "memory").lower() == "sql":
+        return SqlStore(engine)
+    return MemoryStore()
+
+
+def install_idempotency(app, engine: Engine, routes: Iterable[Tuple[str, str]], registry: Optional[CollectorRegistry] = None) -> None:
+    store = store_from_env(engine)
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=store,
+        routes=list(routes),
+        ttl=float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400")),
+        wait_timeout=float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "10")),
+        registry=registry,
+    )
+    sweeper = KeySweeper(
+        store,
+        interval=float(os.environ.get("IDEMPOTENCY_SWEEP_INTERVAL_SECONDS", "60")),
+        batch=int(os.environ.get("IDEMPOTENCY_SWEEP_BATCH", "500")),
+        registry=registry,
+    )
+
+    @app.on_event("startup")
+    async def start_idempotency_sweeper() -> None:
+        await sweeper.start()
+
+    @app.on_event("shutdown")
+    async def stop_idempotency_sweeper() -> None:
+        await sweeper.stop()
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any
+
+
+def log(level: str, msg: str, **fields: Any) -> None:
+    """One JSON log line on stdout, in the same shape as the services' request logs."""
+    print(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "level": level, "msg": msg, **fields}, default=str))
+
+
+def log_exception(msg: str, exc: BaseException, **fields: Any) -> None:
+    log("error", msg, error=f"{type(exc).__name__}: {exc}"[:500], **fields)
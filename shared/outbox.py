@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from sqlalchemy import func, inspect, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Field, Session, SQLModel, select
+
+from .logs import log, log_exception
+
+# Session-level Postgres advisory lock held by the one dispatcher relaying a database
+_DISPATCH_LOCK = 0x6F7574626F78
+
+
+class OutboxEvent(SQLModel, table=True):
+    """Domain event written in the same transaction as the change it describes."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    aggregate_type: str
+    aggregate_id: str = Field(index=True)
+    event_type: str
+    payload: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    dispatched_at: Optional[datetime] = Field(default=None, index=True)
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[datetime] = Field(default=None, description="Set after a failed send; retried from then on")
+    dead_lettered_at: Optional[datetime] = Field(default=None, index=True, description="Set when attempts ran out; never sent again")
+
+
+# Columns added after the table shipped, for databases created by create_all rather than migrations
+_LATER_COLUMNS = {"next_attempt_at": "TIMESTAMP", "dead_lettered_at": "TIMESTAMP"}
+
+
+def upgrade_outbox_table(engine: Engine) -> None:
+    """Adds outbox columns that an existing ``outboxevent`` table lacks."""
+    table = OutboxEvent.__table__
+    columns = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for name, ddl in _LATER_COLUMNS.items():
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {ddl}"))
+    for index in table.indexes:
+        index.create(engine, checkfirst=True)
+
+
+def add_event(session: Session, aggregate_type: str, aggregate_id: Any, event_type: str, payload: dict) -> None:
+    """Stage a domain event in the caller's transaction; it is relayed after commit."""
+    session.add(
+        OutboxEvent(
+            aggregate_type=aggregate_type,
+            aggregate_id=str(aggregate_id),
+            event_type=event_type,
+            payload=json.dumps(payload),
+        )
+    )
+
+
+class FileSink:
+    """Appends delivered events as JSON lines; a local stand-in for a real broker."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def send(self, events: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in events))
+
+
+class HttpSink:
+    """POSTs ``{"events": [...]}`` to a webhook; any non-2xx response is a failure."""
+
+    def __init__(self, url: str, timeout: float = 5.0) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events: List[Dict[str, Any]]) -> None:
+        body = json.dumps({"events": events}).encode("utf-8")
+        req = urllib.request.Request(self.url, data=body, headers={"content-type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            if resp.status >= 300:
+                raise RuntimeError(f"outbox sink returned {resp.status}")
+
+
+def sink_from_env() -> Optional[Any]:
+    target = os.environ.get("OUTBOX_SINK")
+    if not target:
+        return None
+    if target.startswith(("http://", "https://")):
+        return HttpSink(target)
+    return FileSink(target[len("file://"):] if target.startswith("file://") else target)
+
+
+class OutboxDispatcher:
+    """Relays committed outbox rows to a sink in batches, at least once.
+
+    Each round loads the oldest pending events and sends them per
+    aggregate, in id order, outside any transaction. A failed send is
+    retried after an exponential backoff (``retry_delay`` doubling up to
+    ``max_retry_delay``) and the aggregate's later events wait behind it,
+    so consumers see an aggregate's events in the order they were written.
+    After ``max_attempts`` failures an event is dead-lettered: it stays in
+    the table with ``dead_lettered_at`` set and the events behind it go on.
+
+    On Postgres only the dispatcher holding an advisory lock relays a
+    database, so several app workers never interleave one aggregate's
+    events; the others skip it until the lock is free. ``engine`` may be a
+    list (one per shard); each round then drains every database in turn.
+    """
+
+    def __init__(
+        self,
+        engine: Union[Engine, Sequence[Engine]],
+        sink: Any,
+        registry: Optional[CollectorRegistry] = None,
+        batch_size: int = 200,
+        interval: float = 1.0,
+        max_attempts: int = 10,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 300.0,
+    ) -> None:
+        self._engines: List[Engine] = [engine] if isinstance(engine, Engine) else list(engine)
+        self._sink = sink
+        self._batch_size = batch_size
+        self._interval = interval
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._task: Optional[asyncio.Task] = None
+        self.dispatched_total = Counter("outbox_dispatched_total", "Outbox events delivered", registry=registry)
+        self.failures_total = Counter("outbox_dispatch_failures_total", "Outbox deliveries that failed", registry=registry)
+        self.dead_lettered_total = Counter(
+            "outbox_dead_lettered_total", "Outbox events given up on after max attempts", registry=registry
+        )
+        self.lag_seconds = Gauge("outbox_lag_seconds", "Age of the oldest undelivered outbox event", registry=registry)
+        self.batch_seconds = Histogram(
+            "outbox_batch_seconds",
+            "Time to relay one outbox batch",
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+            registry=registry,
+        )
+
+    @classmethod
+    def from_env(
+        cls, engine: Union[Engine, Sequence[Engine]], registry: Optional[CollectorRegistry] = None
+    ) -> Optional["OutboxDispatcher"]:
+        """A dispatcher for ``OUTBOX_SINK``, or None when no sink is configured."""
+        sink = sink_from_env()
+        if sink is None:
+            return None
+        return cls(
+            engine,
+            sink,
+            registry=registry,
+            max_attempts=int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "10")),
+            max_retry_delay=float(os.environ.get("OUTBOX_MAX_RETRY_SECONDS", "300")),
+        )
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delivered = await asyncio.to_thread(self.dispatch_once)
+            except Exception as exc:
+                log_exception("outbox_dispatch_failed", exc)
+                delivered = 0
+            # Keep draining while batches come back full
+            if delivered < self._batch_size:
+                await asyncio.sleep(self._interval)
+
+    def dispatch_once(self) -> int:
+        start = time.perf_counter()
+        delivered, lag = 0, 0.0
+        for engine in self._engines:
+            count, oldest = self._dispatch_from(engine)
+            delivered += count
+            lag = max(lag, oldest)
+        self.lag_seconds.set(lag)
+        if delivered:
+            self.dispatched_total.inc(delivered)
+            self.batch_seconds.observe(time.perf_counter() - start)
+        return delivered
+
+    def _dispatch_from(self, engine: Engine) -> Tuple[int, float]:
+        """Relays one batch from ``engine``; returns (delivered, age of its oldest pending event)."""
+        with _dispatch_lock(engine) as held:
+            if not held:
+                return 0, 0.0
+            now = datetime.utcnow()
+            with Session(engine) as session:
+                rows = session.exec(
+                    select(OutboxEvent)
+                    .where(OutboxEvent.dispatched_at == None, OutboxEvent.dead_lettered_at == None)  # noqa: E711
+                    .order_by(OutboxEvent.id.asc())
+                    .limit(self._batch_size)
+                ).all()
+                if not rows:
+                    return 0, 0.0
+                lag = max(0.0, (now - rows[0].created_at).total_seconds())
+                blocked = _first_waiting(session, rows, now)
+                session.expunge_all()
+            by_aggregate: Dict[tuple, List[OutboxEvent]] = {}
+            for row in rows:
+                key = (row.aggregate_type, row.aggregate_id)
+                # Behind an event that is still backing off, possibly outside this batch
+                if key in blocked and row.id >= blocked[key]:
+                    continue
+                by_aggregate.setdefault(key, []).append(row)
+            delivered: List[int] = []
+            failed: List[Tuple[OutboxEvent, str]] = []
+            for events in by_aggregate.values():
+                try:
+                    self._sink.send([_to_message(e) for e in events])
+                except Exception as exc:
+                    self.failures_total.inc()
+                    # Only the head is retried; the rest follow it once it goes through
+                    failed.append((events[0], f"{type(exc).__name__}: {exc}"[:500]))
+                    continue
+                delivered.extend(e.id for e in events)
+            with Session(engine) as session:
+                if delivered:
+                    session.exec(
+                        update(OutboxEvent)  # type: ignore[call-overload]
+                        .where(OutboxEvent.id.in_(delivered))
+                        .values(dispatched_at=datetime.utcnow())
+                    )
+                for event, error in failed:
+                    self._record_failure(session, event, error)
+                session.commit()
+        return len(delivered), lag
+
+    def _record_failure(self, session: Session, event: OutboxEvent, error: str) -> None:
+        attempts = event.attempts + 1
+        values: Dict[str, Any] = {"attempts": attempts, "last_error": error}
+        if attempts >= self._max_attempts:
+            values["dead_lettered_at"] = datetime.utcnow()
+            self.dead_lettered_total.inc()
+            log(
+                "error",
+                "outbox_event_dead_lettered",
+                event_id=event.id,
+                aggregate_type=event.aggregate_type,
+                aggregate_id=event.aggregate_id,
+                attempts=attempts,
+                error=error,
+            )
+        else:
+            delay = min(self._max_retry_delay, self._retry_delay * 2 ** (attempts - 1))
+            values["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=delay)
+        session.exec(update(OutboxEvent).where(OutboxEvent.id == event.id).values(**values))  # type: ignore[call-overload]
+
+
+@contextmanager
+def _dispatch_lock(engine: Engine) -> Iterator[bool]:
+    """Whether this process may relay ``engine`` now; elects one dispatcher per Postgres database.
+
+    Other databases are assumed to have a single dispatcher (SQLite has one writer process).
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    conn: Connection = engine.connect()
+    try:
+        held = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _DISPATCH_LOCK}).scalar()
+        conn.commit()
+        try:
+            yield bool(held)
+        finally:
+            if held:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _DISPATCH_LOCK})
+                conn.commit()
+    finally:
+        conn.close()
+
+
+def _first_waiting(session: Session, rows: Sequence[OutboxEvent], now: datetime) -> Dict[tuple, int]:
+    """Lowest pending id per aggregate in ``rows`` whose retry is not yet due."""
+    ids = sorted({r.aggregate_id for r in rows})
+    result = session.exec(
+        select(OutboxEvent.aggregate_type, OutboxEvent.aggregate_id, func.min(OutboxEvent.id))
+        .where(
+            OutboxEvent.aggregate_id.in_(ids),
+            OutboxEvent.dispatched_at == None,  # noqa: E711
+            OutboxEvent.dead_lettered_at == None,  # noqa: E711
+            OutboxEvent.next_attempt_at > now,
+        )
+        .group_by(OutboxEvent.aggregate_type, OutboxEvent.aggregate_id)
+    ).all()
+    return {(aggregate_type, aggregate_id): first for aggregate_type, aggregate_id, first in result}
+
+
+def _to_message(event: OutboxEvent) -> Dict[str, Any]:
+    return {
+        "id": event.id,
+        "aggregate_type": event.aggregate_type,
+        "aggregate_id": event.aggregate_id,
+        "event_type": event.event_type,
+        "payload": json.loads(event.payload),
+        "created_at": event.created_at.isoformat(),
+    }
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+PROFILE_HEADER = "x-profile"
+
+# Leaf frames of threads that are parked rather than doing work
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", os.path.join("futures", "thread.py"))
+
+
+def sign_profile_token(secret: str, ttl: int = 300) -> str:
+    """Token for the ``X-Profile`` header (and the admin endpoints), valid for ``ttl`` seconds."""
+    expires = str(int(time.time()) + ttl)
+    sig = hmac.new(secret.encode("utf-8"), expires.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{expires}.{sig}"
+
+
+def verify_profile_token(secret: str, token: Optional[str]) -> bool:
+    if not secret or not token or "." not in token:
+        return False
+    expires, sig = token.split(".", 1)
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode("utf-8"), expires.encode("utf-8"), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, sig)
+
+
+class _Sampler(threading.Thread):
+    """Samples every thread's stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident) or f"thread-{ident}")
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+            if self._done.wait(self.interval):
+                break
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Opt-in sampling profiler for individual requests.
+
+    A request is profiled when it carries a valid signed ``X-Profile`` token
+    or is picked by ``sample_rate``. While it runs, a background thread
+    samples the stacks of all busy threads (the event loop and threadpool
+    workers), so concurrent requests show up too; only one profile is taken
+    at a time. Profiles are written as collapsed stacks to ``directory``,
+    which keeps at most ``max_profiles`` of them.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        secret: str = "",
+        sample_rate: float = 0.0,
+        max_profiles: int = 100,
+        interval: float = 0.005,
+    ) -> None:
+        self.directory = directory
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.interval = interval
+        self._busy = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestProfiler"]:
+        """Profiler configured from PROFILE_* variables, or None when profiling is off."""
+        directory = os.environ.get("PROFILE_DIR")
+        secret = os.environ.get("PROFILE_SECRET", "")
+        sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+        if not directory or not (secret or sample_rate > 0):
+            return None
+        return cls(
+            directory,
+            secret=secret,
+            sample_rate=sample_rate,
+            max_profiles=int(os.environ.get("PROFILE_MAX_FILES", "100")),
+            interval=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000.0,
+        )
+
+    def wants(self, request: Request) -> bool:
+        token = request.headers.get(PROFILE_HEADER)
+        if token is not None:
+            return verify_profile_token(self.secret, token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def profile(self, request: Request, call_next: Any) -> Any:
+        if not self._busy.acquire(blocking=False):
+            return await call_next(request)
+        sampler = _Sampler(self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            sampler.stop()
+            self._busy.release()
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        meta = {
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 3),
+            "samples": sampler.samples,
+            "interval_ms": self.interval * 1000.0,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        profile_id = await asyncio.to_thread(self._save, meta, sampler.counts)
+        response.headers["x-profile-id"] = profile_id
+        return response
+
+    # --- on-disk ring ---
+
+    def _save(self, meta: Dict[str, Any], counts: Dict[str, int]) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", meta["path"]).strip("-")[:60] or "root"
+        profile_id = f"{time.time_ns()}-{meta['method'].lower()}-{slug}"
+        meta["id"] = profile_id
+        base = os.path.join(self.directory, profile_id)
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {n}\n" for stack, n in sorted(counts.items()))
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        for stale in self._ids()[: -self.max_profiles]:
+            for ext in (".collapsed", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, stale + ext))
+                except FileNotFoundError:
+                    pass
+        return profile_id
+
+    def _ids(self) -> List[str]:
+        return sorted(name[: -len(".json")] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        out = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(os.path.join(self.directory, profile_id + ".json"), "r", encoding="utf-8") as f:
+                    out.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return out
+
+    def read_collapsed(self, profile_id: str) -> Optional[str]:
+        if not re.fullmatch(r"[A-Za-z0-9-]+", profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, profile_id + ".collapsed"), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+def to_speedscope(name: str, collapsed: str, interval_ms: float) -> Dict[str, Any]:
+    """Convert collapsed stacks to a speedscope "sampled" profile."""
+    frames: List[Dict[str, str]] = []
+    index: Dict[str, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if not stack:
+            continue
+        ids = []
+        for frame in stack.split(";"):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame})
+            ids.append(index[frame])
+        samples.append(ids)
+        weights.append(int(count) * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def install_profiling(app: FastAPI, profiler: RequestProfiler) -> None:
+    """Add the profiling middleware and, when ``profiler.secret`` is set, the /admin/profiles endpoints to ``app``."""
+    app.state.profiler = profiler
+
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        if profiler.wants(request) and not request.url.path.startswith("/admin/profiles"):
+            return await profiler.profile(request, call_next)
+        return await call_next(request)
+
+    # Without a secret nothing could authorize a download, so profiles are only written to PROFILE_DIR
+    if not profiler.secret:
+        return
+
+    router = APIRouter(prefix="/admin/profiles", tags=["admin"])
+
+    def _authorize(request: Request) -> None:
+        if not verify_profile_token(profiler.secret, request.headers.get(PROFILE_HEADER)):
+            raise HTTPException(status_code=403, detail="Invalid or missing profile token")
+
+    @router.get("")
+    async def list_profiles(request: Request) -> dict:
+        _authorize(request)
+        return {"profiles": await asyncio.to_thread(profiler.list_profiles)}
+
+    @router.get("/{profile_id}")
+    async def download_profile(request: Request, profile_id: str, format: str = "collapsed"):
+        _authorize(request)
+        collapsed = await asyncio.to_thread(profiler.read_collapsed, profile_id)
+        if collapsed is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        if format == "speedscope":
+            speedscope = to_speedscope(profile_id, collapsed, profiler.interval * 1000.0)
+            return JSONResponse(speedscope, headers={"content-disposition": f'attachment; filename="{profile_id}.speedscope.json"'})
+        return PlainTextResponse(collapsed, headers={"content-disposition": f'attachment; filename="{profile_id}.collapsed"'})
+
+    app.include_router(router)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import create_engine
+
+CLIENT_HEADER = "x-client-id"
+
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+)
+
+
+def _replica_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        return create_engine(url, echo=False, connect_args={"check_same_thread": False})
+    return create_engine(url, echo=False, pool_pre_ping=True)
+
+
+def client_key(request) -> str:
+    """Identifies a client for read-your-writes: ``X-Client-Id`` if sent, else the peer address."""
+    return request.headers.get(CLIENT_HEADER) or (request.client.host if request.client else "")
+
+
+class ReplicaRouter:
+    """Chooses the engine for read-only handlers.
+
+    Reads go round-robin to replicas that passed the last health check and
+    are within ``max_lag`` seconds of the primary; with none available they
+    fall back to the primary. A client that wrote in the last
+    ``read_your_writes`` seconds keeps reading from the primary so it sees
+    its own changes. Replicas count as unhealthy until the first check.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: Optional[List[Engine]] = None,
+        read_your_writes: float = 5.0,
+        max_lag: float = 10.0,
+        health_interval: float = 5.0,
+    ) -> None:
+        self.primary = primary
+        self.replicas: List[Engine] = list(replicas or [])
+        self.read_your_writes = read_your_writes
+        self.max_lag = max_lag
+        self.health_interval = health_interval
+        self.lag: Dict[int, Optional[float]] = {i: None for i in range(len(self.replicas))}
+        self._healthy: List[Engine] = []
+        self._cycle = itertools.cycle(())
+        self._lock = threading.Lock()
+        self._recent_writes: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, primary: Engine) -> "ReplicaRouter":
+        urls = [u.strip() for u in os.environ.get("REPLICA_DATABASE_URLS", "").split(",") if u.strip()]
+        return cls(
+            primary,
+            [_replica_engine(url) for url in urls],
+            read_your_writes=float(os.environ.get("REPLICA_READ_YOUR_WRITES_SECONDS", "5")),
+            max_lag=float(os.environ.get("REPLICA_MAX_LAG_SECONDS", "10")),
+            health_interval=float(os.environ.get("REPLICA_HEALTH_INTERVAL_SECONDS", "5")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # --- routing ---
+
+    def note_write(self, client: str) -> None:
+        now = time.monotonic()
+        self._recent_writes[client] = now + self.read_your_writes
+        if len(self._recent_writes) > 10_000:
+            for key, until in list(self._recent_writes.items()):
+                if until <= now:
+                    self._recent_writes.pop(key, None)
+
+    def engine_for(self, client: Optional[str] = None) -> Engine:
+        if client is not None:
+            until = self._recent_writes.get(client)
+            if until is not None and until > time.monotonic():
+                return self.primary
+        with self._lock:
+            return next(self._cycle, self.primary)
+
+    # --- health ---
+
+    def check_health(self) -> None:
+        healthy: List[Engine] = []
+        for i, replica in enumerate(self.replicas):
+            try:
+                with replica.connect() as conn:
+                    if replica.dialect.name == "postgresql":
+                        lag = float(conn.execute(_PG_LAG_SQL).scalar() or 0.0)
+                    else:
+                        conn.execute(text("SELECT 1"))
+                        lag = 0.0
+            except Exception:
+                self.lag[i] = None
+                continue
+            self.lag[i] = lag
+            if lag <= self.max_lag:
+                healthy.append(replica)
+        with self._lock:
+            if healthy != self._healthy:
+                self._healthy = healthy
+                self._cycle = itertools.cycle(healthy)
+
+    async def start(self) -> None:
+        if not self.replicas:
+            return
+        await asyncio.to_thread(self.check_health)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await asyncio.to_thread(self.check_health)
+            except Exception:
+                pass
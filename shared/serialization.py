@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Sequence, Type
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+# Z for UTC like pydantic's JSON output; int keys (e.g. per-status counts) are allowed
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# SERIALIZE_VALIDATE=1 puts rows through their response model first, as FastAPI's default path does
+VALIDATE = os.environ.get("SERIALIZE_VALIDATE", "").lower() in ("1", "true", "yes")
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson-rendered JSON; datetimes, enums and nested models are encoded natively."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def make_serializer(fields: Sequence[str]) -> Callable[[Any], Dict[str, Any]]:
+    """``obj -> dict`` reading ``fields`` off an ORM row or model with one attrgetter call."""
+    names = tuple(fields)
+    get = attrgetter(*names)
+    if len(names) == 1:
+        return lambda obj: {names[0]: get(obj)}
+    return lambda obj: dict(zip(names, get(obj)))
+
+
+@lru_cache(maxsize=None)
+def row_serializer(model: Type[BaseModel]) -> Callable[[Any], Dict[str, Any]]:
+    """Serializer for the fields of response model ``model``, built once per model."""
+    return make_serializer(tuple(model.model_fields))
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def rows_response(rows: Iterable[Any], model: Type[BaseModel], status_code: int = 200) -> Response:
+    """JSON array of ``rows`` shaped as ``model``, bypassing FastAPI's response_model pass.
+
+    DB rows are trusted to match their read model, so by default fields are
+    copied straight into orjson without validation. Rows that already are
+    ``model`` instances go through pydantic's own serializer, which is faster.
+    """
+    rows = list(rows)
+    if rows and type(rows[0]) is model:
+        body = _list_adapter(model).dump_json(rows)
+    elif VALIDATE:
+        adapter = _list_adapter(model)
+        body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    else:
+        serialize = row_serializer(model)
+        body = dumps([serialize(row) for row in rows])
+    return Response(body, status_code=status_code, media_type="application/json")
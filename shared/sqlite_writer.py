@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """Apply the production pragmas on every new connection.
+
+    WAL lets readers proceed while the writer commits, and with
+    ``synchronous=NORMAL`` a commit only syncs at checkpoints. Transactions
+    are begun explicitly so that SAVEPOINTs work with the sqlite3 driver.
+    """
+    mmap_size = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    busy_timeout_ms = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    cache_kib = int(os.environ.get("SQLITE_CACHE_KIB", "65536"))
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={mmap_size}")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        cursor.execute(f"PRAGMA cache_size=-{cache_kib}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        # Writers take the lock up front; upgrading a deferred read transaction
+        # fails with "database is locked" instead of waiting out busy_timeout
+        immediate = conn.get_execution_options().get("sqlite_begin_immediate")
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def immediate_engine(engine: Engine) -> Engine:
+    """``engine`` sharing its pool, whose transactions begin with BEGIN IMMEDIATE under configure_sqlite."""
+    return engine.execution_options(sqlite_begin_immediate=True)
+
+
+_Job = Tuple[Callable[[Session], Any], contextvars.Context, Future]
+
+
+class WriteQueue:
+    """Single writer thread that group-commits write transactions.
+
+    ``submit(fn)`` hands ``fn(session)`` to the writer and blocks until it
+    has committed. The writer takes whatever jobs are queued (up to
+    ``max_batch``), runs each in its own SAVEPOINT of one shared transaction
+    and commits once, so a burst of N requests costs one fsync instead of N
+    and never contends for the database lock. A job that raises only rolls
+    back its own savepoint and re-raises in the caller. ``fn`` must flush,
+    not commit; sessions do not expire objects on commit, so what ``fn``
+    returns stays readable.
+    """
+
+    def __init__(self, engine: Engine, max_batch: int = 64, max_wait: float = 0.002) -> None:
+        self._engine = immediate_engine(engine)
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn: Callable[[Session], Any]) -> Any:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                    self._thread.start()
+        future: Future = Future()
+        # Runs under the caller's context so per-request query stats still apply
+        self._queue.put((fn, contextvars.copy_context(), future))
+        return future.result()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _take_batch(self) -> Tuple[List[_Job], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        while len(batch) < self._max_batch:
+            try:
+                job = self._queue.get(timeout=self._max_wait)
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            batch, closing = self._take_batch()
+            if batch:
+                self._commit_batch(batch)
+            if closing:
+                return
+
+    def _commit_batch(self, batch: List[_Job]) -> None:
+        done: List[Tuple[Future, Any]] = []
+        try:
+            with Session(self._engine, expire_on_commit=False) as session:
+                for fn, ctx, future in batch:
+                    try:
+                        with session.begin_nested():
+                            result = ctx.run(fn, session)
+                    except Exception as exc:
+                        future.set_exception(exc)
+                        continue
+                    done.append((future, result))
+                session.commit()
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for future, result in done:
+            future.set_result(result)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.environ.get("SQL_SLOW_QUERY_LOG") or None
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_slow_log_lock = threading.Lock()
+
+
+class QueryStats:
+    """Queries issued on behalf of one request."""
+
+    __slots__ = ("count", "time_ms", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.time_ms = 0.0
+        self.statements: Counter = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Normalized statements run at least ``threshold`` times, a likely N+1."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+
+
+def begin_request() -> Tuple[QueryStats, Token]:
+    """Start collecting for the current request; sync handlers see it through the copied context.
+
+    Pair with ``end_request`` in a ``finally``. Collection stops when the
+    middleware gets the response back, so queries run while a streaming
+    body is being sent (``iter_rows`` and other generators) are not counted.
+    """
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Replace literals and bind markers with ``?`` and collapse IN lists and whitespace."""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def params_fingerprint(parameters: Any) -> str:
+    return hashlib.sha1(repr(parameters).encode("utf-8", "replace")).hexdigest()[:16]
+
+
+def _log_slow(sql: str, parameters: Any, elapsed_ms: float) -> None:
+    line = json.dumps(
+        {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "level": "warning",
+            "msg": "slow_query",
+            "duration_ms": round(elapsed_ms, 3),
+            "sql": sql,
+            "params_fingerprint": params_fingerprint(parameters),
+        }
+    )
+    if SLOW_QUERY_LOG is None:
+        print(line)
+        return
+    with _slow_log_lock, open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every cursor execution and attribute it to the current request, if any."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000.0
+        stats = _current.get()
+        sql = None
+        if stats is not None:
+            sql = normalize_sql(statement)
+            stats.count += 1
+            stats.time_ms += elapsed_ms
+            stats.statements[sql] += 1
+        if elapsed_ms >= SLOW_QUERY_MS:
+            _log_slow(sql or normalize_sql(statement), parameters, elapsed_ms)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+import anyio
+
+# Cache headers for fingerprinted names (content can never change) and for plain names (revalidate via ETag)
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Variants are only kept when compressing saves at least this many bytes
+MIN_SAVING = 64
+
+
+@dataclass(frozen=True)
+class Asset:
+    path: str  # as requested in templates, e.g. "css/styles.css"
+    fingerprinted: str  # "css/styles.3f9a0c1b2d4e.css"
+    digest: str
+    media_type: str
+    bodies: Dict[str, bytes]  # content-coding ("identity", "gzip", "br") -> bytes
+
+
+def _fingerprint(path: str, digest: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+def _compress(data: bytes) -> Dict[str, bytes]:
+    bodies = {"identity": data}
+    # mtime=0 keeps the gzip bytes (and so the ETag) identical across builds
+    candidates = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli  # optional; without it only gzip variants are built
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        candidates["br"] = brotli.compress(data, quality=11)
+    for coding, body in candidates.items():
+        if len(body) + MIN_SAVING <= len(data):
+            bodies[coding] = body
+    return bodies
+
+
+def _accepted(header: str) -> Set[str]:
+    """Content-codings the client accepts (q > 0)."""
+    codings = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            codings.add(coding.strip().lower())
+    return codings
+
+
+class StaticAssets:
+    """ASGI app serving a static directory from an in-memory manifest.
+
+    On first use every file under ``directory`` is read once, hashed and
+    compressed (gzip, plus brotli when the ``brotli`` package is installed);
+    requests are then answered from memory without touching the filesystem.
+    Each file is served under its plain name with ``Cache-Control:
+    no-cache`` and an ETag, and under a content-hashed name (``url(path)``)
+    with a year-long immutable lifetime. The encoding is picked from
+    ``Accept-Encoding`` (br, then gzip). Changed files are picked up on
+    restart or ``build()``.
+    """
+
+    def __init__(self, directory: str, prefix: str = "/static") -> None:
+        self.directory = directory
+        self.prefix = prefix.rstrip("/")
+        self._assets: Optional[Dict[str, Tuple[Asset, bool]]] = None
+        self._lock = threading.Lock()
+
+    def build(self) -> Dict[str, str]:
+        """(Re)reads the directory; returns the manifest, plain name -> fingerprinted name."""
+        assets: Dict[str, Tuple[Asset, bool]] = {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if name.startswith("."):
+                    continue
+                full = os.path.join(root, name)
+                path = os.path.relpath(full, self.directory).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if media_type.startswith("text/") or media_type in ("application/javascript", "application/json", "image/svg+xml"):
+                    media_type += "; charset=utf-8"
+                asset = Asset(path, _fingerprint(path, digest), digest, media_type, _compress(data))
+                assets[path] = (asset, False)
+                assets[asset.fingerprinted] = (asset, True)
+        self._assets = assets
+        return self.manifest
+
+    def _loaded(self) -> Dict[str, Tuple[Asset, bool]]:
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self.build()
+        return self._assets  # type: ignore[return-value]
+
+    @property
+    def manifest(self) -> Dict[str, str]:
+        return {path: asset.fingerprinted for path, (asset, hashed) in self._loaded().items() if not hashed}
+
+    def url(self, path: str) -> str:
+        """Fingerprinted URL for ``path``, for templates; unknown paths get their plain URL."""
+        entry = self._loaded().get(path.lstrip("/"))
+        return f"{self.prefix}/{entry[0].fingerprinted if entry else path.lstrip('/')}"
+
+    async def __call__(self, scope, receive, send) -> None:
+        assert scope["type"] == "http"
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send(send, 405, [(b"allow", b"GET, HEAD")], b"Method Not Allowed", scope)
+            return
+        if self._assets is None:
+            await anyio.to_thread.run_sync(self._loaded)
+        # Under a Mount, root_path holds the mount prefix and path the full path
+        path = scope["path"]
+        root = scope.get("root_path", "")
+        if root and path.startswith(root):
+            path = path[len(root) :]
+        entry = self._assets.get(path.lstrip("/"))  # type: ignore[union-attr]
+        if entry is None:
+            await self._send(send, 404, [(b"content-type", b"text/plain; charset=utf-8")], b"Not Found", scope)
+            return
+        asset, hashed = entry
+        request_headers = dict(scope["headers"])
+        accepted = _accepted(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        coding = next((c for c in ("br", "gzip") if c in accepted and c in asset.bodies), "identity")
+        body = asset.bodies[coding]
+        etag = f'"{asset.digest}"' if coding == "identity" else f'"{asset.digest}-{coding}"'
+        headers = [
+            (b"cache-control", (IMMUTABLE if hashed else REVALIDATE).encode()),
+            (b"etag", etag.encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]):
+            await self._send(send, 304, headers, b"", scope)
+            return
+        headers.append((b"content-type", asset.media_type.encode()))
+        if coding != "identity":
+            headers.append((b"content-encoding", coding.encode()))
+        await self._send(send, 200, headers, body, scope)
+
+    @staticmethod
+    async def _send(send, status: int, headers: list, body: bytes, scope) -> None:
+        if status != 304:
+            headers = headers + [(b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" or status == 304 else body})
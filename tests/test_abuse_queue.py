@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+
+from moderation_service.app.audit import AuditLogWriter
+from moderation_service.app.clients.group_chat import GroupChatClient
+from moderation_service.app.models import CLOSED_STATUSES, ReportCreate, ReportStatus
+from moderation_service.app.queue import AbuseQueueProcessor
+from moderation_service.app.storage import InMemoryReportStore
+
+
+def _store(tmp_path) -> InMemoryReportStore:
+    return InMemoryReportStore(audit=AuditLogWriter(str(tmp_path / "audit.log")))
+
+
+def test_merged_submissions_move_a_waiting_report_up(tmp_path):
+    async def scenario():
+        store = _store(tmp_path)
+        queue = AbuseQueueProcessor(store, GroupChatClient())
+        first = await store.create_report(ReportCreate(content_id="a", content_text="t", reason="spam"))
+        second = await store.create_report(ReportCreate(content_id="b", content_text="t", reason="spam"))
+        await queue.enqueue(first.id, priority=50)
+        await queue.enqueue(second.id, priority=10)
+        queue.bump(second.id, 60)
+        assert len(queue) == 2
+        assert [await queue._next(), await queue._next()] == [second.id, first.id]
+        # Handed-out reports are not re-queued by a late bump
+        queue.bump(first.id, 10)
+        assert len(queue) == 0
+
+    asyncio.run(scenario())
+
+
+def test_only_one_of_concurrent_closes_sees_the_open_report(tmp_path):
+    async def scenario():
+        store = _store(tmp_path)
+        report = await store.create_report(ReportCreate(content_id="a", content_text="t", reason="spam"))
+        results = await asyncio.gather(
+            store.close(report.id), store.update_status(report.id, ReportStatus.ACTION_TAKEN), store.close(report.id)
+        )
+        previous = [prev for _, prev in results]
+        assert sum(status not in CLOSED_STATUSES for status in previous) == 1
+        assert await store.close("missing") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from moderation_service.app.audit import AuditLogWriter
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _entry(report_id: str, n: int) -> dict:
+    return {"time": (START + timedelta(minutes=n)).isoformat(), "action": "escalate", "report_id": report_id, "n": n}
+
+
+def test_only_recent_segment_indexes_stay_in_memory(tmp_path):
+    async def scenario():
+        audit = AuditLogWriter(str(tmp_path / "audit.log"), max_segment_bytes=2000, batch_size=10, index_segments=2)
+        for n in range(200):
+            audit.record(_entry(f"r{n % 3}", n))
+            if n % 10 == 9:
+                await audit.flush()
+        assert audit._segment_seq > 4
+        assert len(audit._segment_indexes) <= 2
+
+        entries = await audit.query("r1")
+        assert [e["n"] for e in entries] == list(range(1, 200, 3))
+        recent = await audit.query("r1", since=START + timedelta(minutes=150))
+        assert [e["n"] for e in recent] == list(range(151, 200, 3))
+
+        # A restarted writer finds every segment again
+        reopened = AuditLogWriter(str(tmp_path / "audit.log"), max_segment_bytes=2000, index_segments=1)
+        assert await reopened.query("r1") == entries
+        assert len(reopened._segment_indexes) <= 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_is_logged_and_retried(tmp_path, capsys):
+    async def scenario():
+        directory = tmp_path / "missing"
+        audit = AuditLogWriter(str(directory / "audit.log"), fsync_interval=0.01)
+        audit.record(_entry("r1", 1))
+        await asyncio.sleep(0.05)
+        assert '"msg": "audit_flush_failed"' in capsys.readouterr().out
+        assert len(audit._pending) == 1
+
+        directory.mkdir()
+        audit.record(_entry("r1", 2))
+        await asyncio.sleep(0.05)
+        await audit.stop()
+        assert [e["n"] for e in await audit.query("r1")] == [1, 2]
+
+    asyncio.run(scenario())
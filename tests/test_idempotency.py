@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from prometheus_client import CollectorRegistry
+from sqlalchemy import create_engine
+
+from shared.idempotency import IdempotencyMiddleware, KeySweeper, MemoryStore, SqlStore
+
+ROUTES = [("POST", "/items/{item_id}"), ("POST", "/fail")]
+
+
+def _app(store, delay: float = 0.0):
+    """An app whose handlers record every call; returns (app, calls, registry)."""
+    calls = []
+    registry = CollectorRegistry()
+    api = FastAPI()
+
+    @api.post("/items/{item_id}")
+    async def create_item(item_id: str, request: Request):
+        body = await request.json()
+        calls.append(body)
+        if delay:
+            await asyncio.sleep(delay)
+        return {"item": item_id, "call": len(calls), **body}
+
+    @api.post("/fail")
+    async def fail():
+        calls.append(None)
+        return JSONResponse({"detail": "unavailable"}, status_code=503)
+
+    api.add_middleware(IdempotencyMiddleware, store=store, routes=ROUTES, registry=registry)
+    return api, calls, registry
+
+
+def _client(api) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test")
+
+
+def _post(client, path, body, key="k1", client_id="alice"):
+    return client.post(path, json=body, headers={"Idempotency-Key": key, "X-Client-Id": client_id})
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    return SqlStore(create_engine(f"sqlite:///{tmp_path / 'keys.db'}"))
+
+
+def test_retry_replays_the_first_response(store):
+    api, calls, registry = _app(store)
+
+    async def run():
+        async with _client(api) as client:
+            first = await _post(client, "/items/a", {"amount": 5})
+            second = await _post(client, "/items/a", {"amount": 5})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json() == {"item": "a", "call": 1, "amount": 5}
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+    assert registry.get_sample_value("idempotency_requests_total", {"route": "/items/{item_id}", "outcome": "replayed"}) == 1
+
+
+def test_same_key_with_a_different_body_is_rejected(store):
+    api, calls, _ = _app(store)
+
+    async def run():
+        async with _client(api) as client:
+            await _post(client, "/items/a", {"amount": 5})
+            return await _post(client, "/items/a", {"amount": 6})
+
+    response = asyncio.run(run())
+    assert response.status_code == 422
+    assert "different request" in response.json()["detail"]
+    assert len(calls) == 1
+
+
+def test_keys_are_scoped_to_the_caller(store):
+    api, calls, _ = _app(store)
+
+    async def run():
+        async with _client(api) as client:
+            await _post(client, "/items/a", {"amount": 5}, client_id="alice")
+            return await _post(client, "/items/a", {"amount": 5}, client_id="bob")
+
+    response = asyncio.run(run())
+    assert "idempotent-replayed" not in response.headers
+    assert len(calls) == 2
+
+
+def test_concurrent_duplicates_run_the_handler_once(store):
+    api, calls, _ = _app(store, delay=0.05)
+
+    async def run():
+        async with _client(api) as client:
+            return await asyncio.gather(*(_post(client, "/items/a", {"amount": 5}) for _ in range(5)))
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert {r.status_code for r in responses} == {200}
+    assert all(r.json() == responses[0].json() for r in responses)
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 4
+
+
+def test_duplicates_on_another_worker_wait_for_the_first(tmp_path):
+    # Two middleware instances over one SQL store stand in for two worker processes
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.db'}")
+    api_a, calls_a, _ = _app(SqlStore(engine), delay=0.1)
+    api_b, calls_b, _ = _app(SqlStore(engine), delay=0.1)
+
+    async def run():
+        async with _client(api_a) as a, _client(api_b) as b:
+            first = asyncio.ensure_future(_post(a, "/items/a", {"amount": 5}))
+            await asyncio.sleep(0.02)
+            second = await _post(b, "/items/a", {"amount": 5})
+            return await first, second
+
+    first, second = asyncio.run(run())
+    assert len(calls_a) + len(calls_b) == 1
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+
+
+def test_server_errors_release_the_key(store):
+    api, calls, _ = _app(store)
+
+    async def run():
+        async with _client(api) as client:
+            await _post(client, "/fail", {})
+            return await _post(client, "/fail", {})
+
+    response = asyncio.run(run())
+    assert response.status_code == 503
+    assert "idempotent-replayed" not in response.headers
+    assert len(calls) == 2
+
+
+def test_sweep_removes_expired_keys(store):
+    store.claim("old", "f", 1.0)
+    store.claim("new", "f", 4_000_000_000.0)
+    assert KeySweeper(store, batch=1, registry=CollectorRegistry()).sweep() == 1
+    assert store.get("new") is not None
+
+
+def test_failed_sweeps_are_logged_and_counted(capsys):
+    class BrokenStore(MemoryStore):
+        def sweep(self, now, limit):
+            raise RuntimeError("no such table: idempotency_keys")
+
+    registry = CollectorRegistry()
+    sweeper = KeySweeper(BrokenStore(), interval=0.01, registry=registry)
+
+    async def run():
+        await sweeper.start()
+        await asyncio.sleep(0.1)
+        await sweeper.stop()
+
+    asyncio.run(run())
+    assert registry.get_sample_value("idempotency_sweep_failures_total") >= 1
+    out = capsys.readouterr().out
+    assert '"msg": "idempotency_sweep_failed"' in out
+    assert "no such table" in out
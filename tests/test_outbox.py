@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from prometheus_client import CollectorRegistry
+from sqlalchemy import update
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from shared.outbox import OutboxDispatcher, OutboxEvent, add_event
+
+
+class Sink:
+    """Records sent events; fails every send that includes an aggregate listed in ``failing``."""
+
+    def __init__(self) -> None:
+        self.sent = []
+        self.failing = set()
+
+    def send(self, events):
+        if any(e["aggregate_id"] in self.failing for e in events):
+            raise RuntimeError("broker unavailable")
+        self.sent.extend(events)
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}")
+    SQLModel.metadata.create_all(engine, tables=[OutboxEvent.__table__])
+    return engine
+
+
+def _stage(engine, *events):
+    with Session(engine) as session:
+        for aggregate_id, n in events:
+            add_event(session, "order", aggregate_id, "changed", {"n": n})
+        session.commit()
+
+
+def _rows(engine):
+    with Session(engine) as session:
+        return {row.id: row for row in session.exec(select(OutboxEvent))}
+
+
+def _make_due(engine):
+    with Session(engine) as session:
+        session.exec(update(OutboxEvent).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+
+
+def test_failed_events_back_off_and_hold_their_aggregate(tmp_path):
+    engine, sink = _engine(tmp_path), Sink()
+    dispatcher = OutboxDispatcher(engine, sink, registry=CollectorRegistry(), retry_delay=60)
+    _stage(engine, ("a", 1), ("b", 1))
+    sink.failing = {"a"}
+    assert dispatcher.dispatch_once() == 1
+
+    # A later event for "a" waits behind the one backing off; "b" keeps flowing
+    sink.failing = set()
+    _stage(engine, ("a", 2), ("b", 2))
+    assert dispatcher.dispatch_once() == 1
+    assert [(e["aggregate_id"], e["payload"]["n"]) for e in sink.sent] == [("b", 1), ("b", 2)]
+    head = _rows(engine)[1]
+    assert head.attempts == 1 and head.next_attempt_at > datetime.utcnow() + timedelta(seconds=50)
+
+    _make_due(engine)
+    assert dispatcher.dispatch_once() == 2
+    assert [e["payload"]["n"] for e in sink.sent if e["aggregate_id"] == "a"] == [1, 2]
+
+
+def test_events_are_dead_lettered_after_max_attempts(tmp_path, capsys):
+    engine, sink = _engine(tmp_path), Sink()
+    registry = CollectorRegistry()
+    dispatcher = OutboxDispatcher(engine, sink, registry=registry, max_attempts=3)
+    _stage(engine, ("a", 1))
+    sink.failing = {"a"}
+    for _ in range(3):
+        _make_due(engine)
+        dispatcher.dispatch_once()
+    assert _rows(engine)[1].dead_lettered_at is not None
+    assert registry.get_sample_value("outbox_dead_lettered_total") == 1
+    assert '"msg": "outbox_event_dead_lettered"' in capsys.readouterr().out
+
+    # The poison event no longer blocks the aggregate
+    sink.failing = set()
+    _stage(engine, ("a", 2))
+    assert dispatcher.dispatch_once() == 1
+    assert [e["payload"]["n"] for e in sink.sent] == [2]
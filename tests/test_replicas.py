@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+from sqlalchemy import event, text
+from sqlmodel import Session, create_engine
+
+from shared.replicas import ReplicaRouter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _engine(path, name: str):
+    """A SQLite engine whose ``whoami`` table names the database it is bound to."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS whoami (name TEXT)"))
+        conn.execute(text("DELETE FROM whoami"))
+        conn.execute(text("INSERT INTO whoami VALUES (:name)"), {"name": name})
+    return engine
+
+
+def _fail_connects(engine) -> dict:
+    """Makes new connections to ``engine`` fail while ``state["down"]`` is set."""
+    state = {"down": False}
+
+    @event.listens_for(engine, "do_connect")
+    def connect(dialect, conn_rec, cargs, cparams):
+        if state["down"]:
+            raise OSError("replica unreachable")
+
+    return state
+
+
+def _whoami(engine) -> str:
+    with Session(engine) as session:
+        return session.exec(text("SELECT name FROM whoami")).one()[0]
+
+
+def test_reads_go_to_healthy_replicas_round_robin(tmp_path):
+    primary = _engine(tmp_path / "primary.db", "primary")
+    replicas = [_engine(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(2)]
+    router = ReplicaRouter(primary, replicas)
+    # Unchecked replicas are not trusted yet
+    assert _whoami(router.engine_for()) == "primary"
+
+    router.check_health()
+    assert router.lag == {0: 0.0, 1: 0.0}
+    assert sorted(_whoami(router.engine_for()) for _ in range(4)) == ["replica0", "replica0", "replica1", "replica1"]
+
+
+def test_clients_read_their_own_writes_from_the_primary(tmp_path):
+    router = ReplicaRouter(_engine(tmp_path / "primary.db", "primary"), [_engine(tmp_path / "replica.db", "replica")])
+    router.check_health()
+    router.note_write("writer")
+    assert _whoami(router.engine_for("writer")) == "primary"
+    assert _whoami(router.engine_for("reader")) == "replica"
+
+    router.read_your_writes = 0
+    router.note_write("writer")
+    assert _whoami(router.engine_for("writer")) == "replica"
+
+
+def test_falls_back_to_the_primary_when_replicas_fail_or_lag(tmp_path):
+    primary = _engine(tmp_path / "primary.db", "primary")
+    replica = _engine(tmp_path / "replica.db", "replica")
+    missing = create_engine(f"sqlite:///{tmp_path / 'no-such-dir' / 'replica.db'}")
+    router = ReplicaRouter(primary, [replica, missing])
+    down = _fail_connects(replica)
+
+    router.check_health()
+    assert router.lag == {0: 0.0, 1: None}
+    assert {_whoami(router.engine_for()) for _ in range(3)} == {"replica"}
+
+    down["down"] = True
+    replica.dispose()
+    router.check_health()
+    assert router.lag == {0: None, 1: None}
+    assert _whoami(router.engine_for()) == "primary"
+
+    down["down"] = False
+    router.check_health()
+    assert _whoami(router.engine_for()) == "replica"
+
+    router.max_lag = -1
+    router.check_health()
+    assert _whoami(router.engine_for()) == "primary"
+
+
+# Run in a fresh interpreter: events_service and the wallet app both define an ``event`` table in SQLModel's metadata
+_EVENTS_SCENARIO = """
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from events_service.app.db import replicas
+from events_service.app.main import app
+from events_service.app.models import Event
+
+replica = replicas.replicas[0]
+with Session(replica) as session:
+    session.add(Event(slug="replica-only", title="On the replica", start_at=datetime.utcnow()))
+    session.commit()
+
+down = False
+
+@event.listens_for(replica, "do_connect")
+def connect(dialect, conn_rec, cargs, cparams):
+    if down:
+        raise OSError("replica unreachable")
+
+def slugs(client, client_id):
+    body = client.get("/api/events", headers={"X-Client-Id": client_id}).json()
+    return [e["slug"] for e in body["events"]]
+
+seen = {}
+with TestClient(app) as client:
+    seen["reader"] = slugs(client, "reader")
+    # The RSVP is written to the primary, and its author reads from there for a while
+    form = {"name": "Ann", "email": "ann@example.com"}
+    seen["rsvp_status"] = client.post("/api/events/launch-party/rsvp", data=form, headers={"X-Client-Id": "ann"}).status_code
+    seen["writer_after_write"] = slugs(client, "ann")
+    seen["reader_after_write"] = slugs(client, "reader")
+    down = True
+    replica.dispose()
+    replicas.check_health()
+    seen["reader_replica_down"] = slugs(client, "reader")
+print(json.dumps(seen))
+"""
+
+
+def test_events_read_only_handlers_use_the_replica_until_it_fails(tmp_path):
+    primary = tmp_path / "primary.db"
+    replica = tmp_path / "replica.db"
+    # The replica gets the events schema up front; the app creates the primary's at startup
+    env = dict(os.environ)
+    env.update(
+        EVENTS_DATABASE_URL=f"sqlite:///{replica}",
+        PYTHONPATH=ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    )
+    subprocess.run(
+        [sys.executable, "-c", "import events_service.app.models; from events_service.app.db import init_db; init_db()"], cwd=ROOT, env=env, check=True
+    )
+    env.update(
+        EVENTS_DATABASE_URL=f"sqlite:///{primary}",
+        REPLICA_DATABASE_URLS=f"sqlite:///{replica}",
+        # Health is only checked at startup and by the scenario
+        REPLICA_HEALTH_INTERVAL_SECONDS="3600",
+        EVENTS_RATE_LIMIT_ENABLED="false",
+        EVENTS_TEMPLATE_CACHE_DIR=str(tmp_path / "templates"),
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", _EVENTS_SCENARIO], cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True, check=True
+    )
+    seen = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert seen["reader"] == ["replica-only"]
+    assert seen["rsvp_status"] == 200
+    assert seen["writer_after_write"] == ["launch-party"]
+    assert seen["reader_after_write"] == ["replica-only"]
+    assert seen["reader_replica_down"] == ["launch-party"]
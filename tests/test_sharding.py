@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import sys
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.sharding import group_hash, jump_hash
+
+SHARDS = 3
+
+
+def test_jump_hash_matches_reference_vectors():
+    # Published test vectors of the reference implementation
+    vectors = [(1, 1, 0), (42, 57, 43), (0xDEAD10CC, 1, 0), (0xDEAD10CC, 666, 361), (256, 1024, 520)]
+    assert [jump_hash(key, buckets) for key, buckets, _ in vectors] == [bucket for _, _, bucket in vectors]
+    # Placements of existing groups must never change between releases
+    assert [jump_hash(group_hash(f"g{i}"), 5) for i in range(10)] == [4, 4, 1, 4, 3, 2, 4, 4, 1, 4]
+
+
+def test_adding_a_shard_only_moves_groups_onto_it():
+    keys = [group_hash(f"group-{i}") for i in range(2000)]
+    for buckets in range(1, 8):
+        moved = [k for k in keys if jump_hash(k, buckets) != jump_hash(k, buckets + 1)]
+        assert all(jump_hash(k, buckets + 1) == buckets for k in moved)
+        # About 1/(N+1) of the keys move
+        assert abs(len(moved) / len(keys) - 1 / (buckets + 1)) < 0.05
+
+
+@pytest.fixture(scope="module")
+def wallet(tmp_path_factory):
+    """The wallet app on a SQLite primary plus three SQLite shards; yields (client, shard map)."""
+    workdir = tmp_path_factory.mktemp("wallet-shards")
+    env = {
+        "DATABASE_URL": f"sqlite:///{workdir}/primary.db",
+        "WALLET_SHARD_URLS": ",".join(f"sqlite:///{workdir}/shard{i}.db" for i in range(SHARDS)),
+        # Pins are re-read on every routing decision
+        "WALLET_SHARD_REFRESH_SECONDS": "0",
+        "AUDIT_LOG_PATH": f"{workdir}/audit.log",
+    }
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in env.items():
+            mp.setenv(name, value)
+        from fastapi.testclient import TestClient
+
+        from app.db import shards
+        from app.main import app
+
+        with TestClient(app) as client:
+            yield client, shards
+    # The app reads its configuration at import time; later imports get a fresh one
+    for name in [m for m in sys.modules if m == "app" or m.startswith("app.")]:
+        del sys.modules[name]
+
+
+def _create(client, group_id: str, amount_cents: int = 100):
+    return client.post("/wallet/requests", json={"group_id": group_id, "requester_id": "m", "amount_cents": amount_cents})
+
+
+def _placement(shards, group_id: str):
+    """Indexes of the shards holding any wallet request of ``group_id``."""
+    from app.models import WalletRequest
+
+    placed = []
+    for shard in shards.shards:
+        with Session(shard.engine) as session:
+            if session.exec(select(func.count()).select_from(WalletRequest).where(WalletRequest.group_id == group_id)).one():
+                placed.append(shard.index)
+    return placed
+
+
+def test_groups_are_stored_on_their_shard(wallet):
+    client, shards = wallet
+    groups = [f"route-{i}" for i in range(20)]
+    ids = []
+    for group_id in groups:
+        for amount in (100, 200):
+            r = _create(client, group_id, amount)
+            assert r.status_code == 201, r.text
+            ids.append(r.json()["id"])
+    assert len(set(ids)) == len(ids)
+    assert len({shards.shard_index(g) for g in groups}) == SHARDS
+    for group_id in groups:
+        assert shards.shard_index(group_id) == jump_hash(group_hash(group_id), SHARDS)
+        assert _placement(shards, group_id) == [shards.shard_index(group_id)]
+
+    # Requests are found by id on any shard, and the unscoped listing gathers every shard
+    accepted = client.post(f"/wallet/requests/{ids[-1]}/accept", params={"actor_id": "a"})
+    assert accepted.status_code == 200 and accepted.json()["group_id"] == groups[-1]
+    listed = {r["id"] for r in client.get("/wallet/requests").json()}
+    assert set(ids) <= listed
+
+
+def test_moved_group_is_read_and_written_on_its_new_shard(wallet):
+    client, shards = wallet
+    group_id = "mover"
+    paid = _create(client, group_id).json()["id"]
+    assert client.post(f"/wallet/requests/{paid}/pay", params={"payer_id": "p"}).status_code == 200
+    source = shards.shard_index(group_id)
+    target = (source + 1) % SHARDS
+
+    shards.move_group(group_id, target, settle=0)
+    assert shards.shard_index(group_id) == target
+    assert _placement(shards, group_id) == [target]
+    assert _create(client, group_id).status_code == 201
+    assert _placement(shards, group_id) == [target]
+    assert client.get(f"/wallet/groups/{group_id}/reconciliation").json()["ok"]
+
+
+def test_writes_to_a_moving_group_get_503_with_retry_after(wallet):
+    client, shards = wallet
+    group_id = "frozen"
+    request_id = _create(client, group_id).json()["id"]
+    home = shards.shard_index(group_id)
+    shards._pin(group_id, home, moving=True)
+    try:
+        for r in (_create(client, group_id), client.post(f"/wallet/requests/{request_id}/pay", params={"payer_id": "p"})):
+            assert r.status_code == 503
+            assert r.headers["retry-after"] == "1"
+        # Reads and other groups are unaffected
+        assert client.get(f"/wallet/groups/{group_id}/balances").status_code == 200
+        assert _create(client, "not-frozen").status_code == 201
+    finally:
+        shards._pin(group_id, home, moving=False)
+    assert _create(client, group_id).status_code == 201
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from moderation_service.app.clients.group_chat import GroupChatClient
+from moderation_service.app.models import Report, ReportStatus
+from moderation_service.app.sla import SlaScheduler
+
+
+def _report(report_id: str, minutes_ago: int, sla_minutes: int = 10) -> Report:
+    escalated_at = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    return Report(
+        id=report_id,
+        content_id=report_id,
+        content_text="text",
+        reason="spam",
+        escalation_level=1,
+        sla_minutes=sla_minutes,
+        escalated_at=escalated_at,
+    )
+
+
+def test_overdue_returns_current_deadlines_most_overdue_first():
+    sla = SlaScheduler(store=None, group_chat=GroupChatClient())
+    for report in (_report("a", 15), _report("b", 30), _report("c", 5), _report("d", 20)):
+        sla.track(report)
+    assert sla.overdue() == ["b", "d", "a"]
+    assert sla.overdue(limit=2) == ["b", "d"]
+
+    # Closing drops the report; re-escalating moves it to its new deadline
+    closed = _report("b", 30)
+    closed.status = ReportStatus.DISMISSED
+    sla.track(closed)
+    sla.track(_report("d", 12))
+    sla.track(_report("a", 15, sla_minutes=60))
+    assert sla.overdue() == ["d"]
+    # Answering a query does not consume the entries
+    assert sla.overdue() == ["d"]
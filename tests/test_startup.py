@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough for a loaded CI machine; a regression to eager imports costs seconds
+IMPORT_BUDGET_MS = 1500.0
+FIRST_RESPONSE_BUDGET_MS = 2500.0
+
+# module, modules that must not be loaded on the way to the first request
+SERVICES = {
+    "wallet": ("app.main", ("jinja2",)),
+    "events": ("events_service.app.main", ("qrcode", "PIL", "ics", "arrow", "jinja2")),
+    "moderation": ("moderation_service.app.main", ("jinja2",)),
+}
+
+_DRIVER = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module} as m
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(m.app) as client:
+    status = client.get("/metrics").status_code
+t2 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "first_response_ms": (t2 - t0) * 1000, "status": status,
+                  "eager": [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+@pytest.mark.parametrize("service", sorted(SERVICES))
+def test_cold_start_stays_within_budget_and_defers_heavy_imports(service, tmp_path):
+    module, lazy = SERVICES[service]
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=f"sqlite:///{tmp_path / 'wallet.db'}",
+        EVENTS_DATABASE_URL=f"sqlite:///{tmp_path / 'events.db'}",
+        AUDIT_LOG_PATH=str(tmp_path / "audit.log"),
+        PYTHONPATH=ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    )
+    # A fresh interpreter, so nothing imported by other tests counts
+    proc = subprocess.run(
+        [sys.executable, "-c", _DRIVER.format(module=module, lazy=lazy)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert result["status"] == 200
+    assert result["eager"] == [], f"imported at startup but should be lazy: {result['eager']}"
+    assert result["import_ms"] < IMPORT_BUDGET_MS
+    assert result["first_response_ms"] < FIRST_RESPONSE_BUDGET_MS